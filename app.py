@@ -1,12 +1,41 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
 from services.voice_service import get_voice_service
 from services.speech_service import get_speech_service
+from services.translation_cache import get_translation_cache, normalize_text
+from services.translation_memory import get_translation_memory
+from services.executors import get_executor
+from services.text_segmenter import group_sentences, join_fragments, join_separator, split_sentences
+from services.single_flight import bytes_digest, file_digest, get_single_flight, make_request_key, single_flight_stats
+from services.history_writer import init_history_writer
+from services.rate_limiter import GatedService, RateLimitTimeout, get_gate, rate_limit_stats
+from services.client_pool import client_pool_stats, start_warm_up
+from services.lang_detect import detect_language, detect_language_with_confidence
+from services.glossary import init_glossary, restore_terms
+from services.image_preprocess import discard_preprocessed, preprocess_bytes, preprocess_image
+from services.ocr_cache import OCRCache, get_ocr_cache
+from services.ocr_bytes import accepts_bytes, recognize_bytes
+from services.upload_buffer import BufferReader, SpooledUploadRequest, buffer_view
+from services.ocr_tiler import image_size, needs_tiling, recognize_tiled
+from services.pdf_ocr import count_pages, iter_pdf_pages
+from services.upload_store import get_upload_store
+from services.audio_cache import get_audio_cache, tts_cache_key
+from services.audio_tools import concat_audio
+from services.asr_bytes import accepts_audio_bytes, inline_format, resolve_engine, transcribe_from_bytes, transcribe_via_file
+from services.long_audio import SAMPLE_RATE as SEGMENT_SAMPLE_RATE, iter_long_audio
+from services.audio_normalize import SAMPLE_RATE, exceeds_limits, normalize_audio
+from services.transcript_cache import get_transcript_cache
+from services.history_pages import decode_cursor, encode_cursor, get_history_counter
 from flask_sqlalchemy import SQLAlchemy
 from config import config
-from models import db, User, TranslationHistory  # 重新导入 TranslationHistory
+from models import db, User, TranslationHistory, GlossaryEntry  # 重新导入 TranslationHistory
 import logging
 import json
+import time
+import shutil
+import tempfile
+from concurrent.futures import wait
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 import os
@@ -25,6 +54,8 @@ def create_app():
         static_folder=str(base_path / "static"),
         template_folder=str(base_path / "templates"),
     )
+    # 单张图片OCR的上传文件优先缓存在内存中，可直接读取而无需落盘
+    app.request_class = SpooledUploadRequest
 
     # 加载配置
     app.config.from_object(config)
@@ -40,6 +71,24 @@ def create_app():
         except Exception as e:
             logger.error(f"❌ 数据库表初始化失败: {e}")
 
+    # 历史记录异步批量写入
+    history_writer = init_history_writer(
+        app,
+        enabled=config.HISTORY_WRITE_BEHIND,
+        flush_interval=config.HISTORY_FLUSH_INTERVAL_MS / 1000,
+        batch_size=config.HISTORY_BATCH_SIZE,
+        max_queue=config.HISTORY_QUEUE_SIZE
+    )
+
+    # 术语表（编译后的自动机按用户与语言对缓存）
+    glossary = init_glossary(app)
+
+    # 内容寻址的上传文件存储（依赖 translation_history 表上的引用计数触发器）
+    upload_store = get_upload_store()
+
+    # 历史记录计数（由 translation_history 上的触发器维护，分页时无需 COUNT(*)）
+    history_counter = get_history_counter()
+
     # ==================== 辅助函数 ====================
 
     def allowed_file(filename):
@@ -49,57 +98,428 @@ def create_app():
             filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
     def save_uploaded_file(file):
-        """保存上传的文件"""
-        from werkzeug.utils import secure_filename
-
-        # 创建上传目录
-        upload_folder = 'static/uploads'
-        os.makedirs(upload_folder, exist_ok=True)
-
-        # 生成安全的唯一文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        original_name = secure_filename(file.filename)
-        base_name, ext = os.path.splitext(original_name)
-        unique_filename = f"{timestamp}_{base_name}{ext}"
-
-        # 保存文件路径
-        filepath = os.path.join(upload_folder, unique_filename)
-
-        # 保存文件
-        file.save(filepath)
-
-        return {
-            'filename': unique_filename,
-            'filepath': filepath,
-            'url': f'/static/uploads/{unique_filename}'
-        }
+        """保存上传的文件（按内容哈希存储，相同内容只保存一份）"""
+        return upload_store.put(file)
 
     def get_ocr_service():
-        """获取OCR服务实例"""
+        """获取OCR服务实例（调用经过限流闸门）"""
         try:
             from services.ocr_service import get_ocr_service as get_service
-            return get_service()
+            return GatedService(get_service(), get_gate('ocr'), ['recognize_from_path', 'recognize_from_bytes'])
         except ImportError:
             logger.error("OCR服务模块未找到，请创建 services/ocr_service.py")
             raise
 
     def get_translation_service():
-        """获取翻译服务实例"""
+        """获取翻译服务实例（调用经过限流闸门）"""
         try:
             from services.translation_service import get_translation_service as get_service
-            return get_service()
+            return GatedService(get_service(), get_gate('translate'), ['translate', 'translate_batch'])
         except ImportError:
             logger.error("翻译服务模块未找到，请创建 services/translation_service.py")
             raise
 
+    def resolve_source_lang(text, source_lang):
+        """源语言为 auto 时在本地识别实际语言，识别不可靠时仍交给翻译服务判断"""
+        if source_lang != 'auto' or not config.LANG_DETECT_ENABLED:
+            return source_lang
+        detected, confidence = detect_language_with_confidence(text)
+        if detected and confidence >= config.LANG_DETECT_MIN_CONFIDENCE:
+            return detected
+        return source_lang
+
+    def translate_with_cache(text, source_lang, target_lang, user_id=None):
+        """带缓存的翻译：先查翻译缓存，未命中时再调用翻译服务并回写缓存
+
+        翻译前按全局术语表及 user_id 对应的个人术语表把术语替换为占位符，翻译后还原为指定译法。
+        """
+        source_lang = resolve_source_lang(text, source_lang)
+        if source_lang == target_lang:
+            return {
+                'success': True,
+                'translated': text,
+                'message': '源语言与目标语言相同，无需翻译',
+                'source_lang': source_lang,
+                'cached': False,
+                'skipped': True
+            }
+
+        glossary_terms = []
+        if config.GLOSSARY_ENABLED:
+            # 缓存与翻译记忆都以占位符文本为键，与术语的具体译法无关
+            text, glossary_terms = glossary.protect(text, user_id, source_lang, target_lang)
+
+        result = lookup_or_translate(text, source_lang, target_lang)
+        if glossary_terms and result.get('success'):
+            result['translated'] = restore_terms(result['translated'], glossary_terms)
+        result['glossary_terms'] = len(glossary_terms)
+        return result
+
+    def lookup_or_translate(text, source_lang, target_lang):
+        """查询翻译缓存，未命中时调用翻译服务"""
+        cache = get_translation_cache() if config.TRANSLATION_CACHE_ENABLED else None
+
+        if cache is not None:
+            cached_text = cache.get(text, source_lang, target_lang)
+            if cached_text is not None:
+                return {
+                    'success': True,
+                    'translated': cached_text,
+                    'message': '翻译成功',
+                    'source_lang': source_lang,
+                    'cached': True
+                }
+
+        def call_service():
+            if config.TRANSLATION_MEMORY_ENABLED:
+                # 按句复用翻译记忆，只把未翻译过的句子发给翻译服务
+                result = get_translation_memory().translate(
+                    text, source_lang, target_lang, get_translation_service()
+                )
+            else:
+                result = get_translation_service().translate(text, source_lang, target_lang)
+            if cache is not None and result.get('success'):
+                cache.set(text, source_lang, target_lang, result['translated'])
+            return result
+
+        # 相同文本的并发请求合并为一次服务调用
+        key = make_request_key(normalize_text(text), source_lang, target_lang)
+        result = get_single_flight('translate').do(key, call_service)
+        result['source_lang'] = source_lang
+        result['cached'] = False
+        return result
+
+    def recognize_cached(source, fingerprint, digest, recognize, owner=None):
+        """先查询OCR结果缓存，未命中时识别；内容相同的并发请求只调用一次OCR服务
+
+        内容哈希相同的结果对所有用户共享；启用近似命中时只匹配 owner（上传用户）自己的图片。
+        """
+        cache = get_ocr_cache() if config.OCR_CACHE_ENABLED else None
+        if cache is None:
+            return get_single_flight('ocr').do(digest(source), recognize, source)
+
+        executor = get_executor('image', config.IMAGE_PREPROCESS_WORKERS)
+        image_fingerprint = executor.submit(fingerprint, source, cache.near_enabled).result()
+        image_fingerprint['owner'] = owner
+        cached = cache.lookup(image_fingerprint)
+        if cached is not None:
+            return cached
+
+        result = get_single_flight('ocr').do(image_fingerprint['content_hash'], recognize, source)
+        # 部分图块失败的分块识别结果不缓存，下次请求重新识别
+        if result.get('success') and not result.get('partial'):
+            cache.store(image_fingerprint, result)
+        return result
+
+    def recognize_image(filepath, owner=None):
+        """识别图片文件中的文字"""
+        return recognize_cached(filepath, OCRCache.fingerprint, file_digest, recognize_preprocessed, owner)
+
+    def recognize_image_bytes(data, owner=None):
+        """识别内存中图片（bytes / memoryview）的文字，全程不读写磁盘"""
+        return recognize_cached(data, OCRCache.fingerprint_bytes, bytes_digest, recognize_preprocessed_bytes, owner)
+
+    def page_recognizer(owner):
+        """PDF逐页识别使用的识别函数，各页按上传用户查询OCR缓存"""
+        return lambda filepath: recognize_image(filepath, owner)
+
+    def is_pdf(filename):
+        return filename.lower().endswith('.pdf')
+
+    def recognize_pdf(filepath, owner=None):
+        """逐页识别PDF并合并为与单张图片相同格式的结果"""
+        pages = list(iter_pdf_pages(filepath, page_recognizer(owner)))
+        texts = [page['text'] for page in pages if page['success'] and page['text']]
+        confidences = [page['confidence'] for page in pages if page.get('confidence') is not None]
+        failed = [page['page'] for page in pages if not page['success']]
+        return {
+            'success': bool(texts) or not failed,
+            'text': '\n\n'.join(texts),
+            'confidence': sum(confidences) / len(confidences) if confidences else 0,
+            'message': f'识别完成，共{len(pages)}页' + (f'，第{failed}页识别失败' if failed else ''),
+            'pages': pages,
+        }
+
+    def submit_ocr_bytes(data):
+        """把内存中的图片交给OCR服务（服务不支持直接提交数据时经临时文件按路径识别）"""
+        return recognize_bytes(get_ocr_service(), data)
+
+    def ocr_accepts_bytes():
+        """OCR服务提供 recognize_from_bytes 时上传的图片可全程在内存中识别"""
+        return accepts_bytes(get_ocr_service())
+
+    def should_tile(source):
+        """长截图、超大海报等整图缩放后文字过小的图片改为分块识别"""
+        if not config.OCR_TILING_ENABLED:
+            return False
+        size = image_size(source)
+        return size is not None and needs_tiling(*size)
+
+    def recognize_preprocessed_bytes(data):
+        """在图片处理线程池中预处理内存中的图片，再直接提交OCR服务"""
+        with BufferReader(data) as source:
+            tiled = should_tile(source)
+        if tiled:
+            with BufferReader(data) as source:
+                return recognize_tiled(source, submit_ocr_bytes)
+
+        if config.IMAGE_PREPROCESS_ENABLED:
+            executor = get_executor('image', config.IMAGE_PREPROCESS_WORKERS)
+            try:
+                data = executor.submit(preprocess_bytes, data).result()['data']
+            except Exception as e:
+                logger.warning(f"图片预处理失败，使用原图识别: {e}")
+        return submit_ocr_bytes(data)
+
+    def recognize_preprocessed(filepath):
+        """在图片处理线程池中预处理图片，再把处理后的文件交给OCR服务"""
+        if should_tile(filepath):
+            return recognize_tiled(filepath, submit_ocr_bytes)
+        if not config.IMAGE_PREPROCESS_ENABLED:
+            return get_ocr_service().recognize_from_path(filepath)
+
+        executor = get_executor('image', config.IMAGE_PREPROCESS_WORKERS)
+        try:
+            prepared = executor.submit(preprocess_image, filepath).result()
+        except Exception as e:
+            logger.warning(f"图片预处理失败，使用原图识别: {e}")
+            return get_ocr_service().recognize_from_path(filepath)
+        try:
+            return get_ocr_service().recognize_from_path(prepared['path'])
+        finally:
+            discard_preprocessed(prepared)
+
+    def synthesize_speech(text, lang, gender, speed):
+        """语音合成：先查音频缓存，未命中时参数相同的并发请求只调用一次语音合成服务"""
+        key = tts_cache_key(text, lang, gender, speed)
+        if not config.TTS_CACHE_ENABLED:
+            return get_single_flight('tts').do(key, get_tts_service().text_to_speech, text, lang, gender, speed)
+
+        cache = get_audio_cache()
+        cached = cache.lookup(key)
+        if cached is not None:
+            return cached
+
+        def synthesize():
+            result = get_tts_service().text_to_speech(text, lang, gender, speed)
+            return cache.store(key, result) if result.get('success') else result
+
+        return get_single_flight('tts').do(key, synthesize)
+
+    def iter_speech_chunks(chunks, lang, gender, speed):
+        """分块并发合成语音，按原顺序产出 (序号, 结果)
+
+        最多 TTS_CHUNK_WORKERS 块在途，第一块合成完即可产出，首段音频的等待时间与全文长度无关。
+        """
+        executor = get_executor('tts', config.TTS_CHUNK_WORKERS)
+        pending = deque()
+
+        def emit():
+            index, future = pending.popleft()
+            result = future.result()
+            if not result.get('success'):
+                raise RuntimeError(result.get('message', '语音合成失败'))
+            return index, result
+
+        try:
+            for index, (chunk, _) in enumerate(chunks):
+                pending.append((index, executor.submit(synthesize_speech, chunk, lang, gender, speed)))
+                if len(pending) >= config.TTS_CHUNK_WORKERS:
+                    yield emit()
+            while pending:
+                yield emit()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def merge_speech(text, lang, gender, speed, results):
+        """把各块音频按顺序拼接为完整音频
+
+        合并结果总是登记到音频缓存，由其按容量淘汰（未启用 TTS_CACHE_ENABLED 时只是不参与查询），
+        全文重复请求在启用缓存时直接命中。
+        """
+        if len(results) == 1:
+            return results[0]
+        fmt = results[0].get('format') or 'mp3'
+        cache = get_audio_cache()
+        # 临时文件与缓存文件在同一目录树下，登记时原子改名即可
+        os.makedirs(cache.root, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=cache.root, prefix='.merge_', suffix='.' + fmt)
+        os.close(fd)
+        merged = {
+            'success': True,
+            'message': '语音合成成功',
+            'filepath': path,
+            'duration': sum(result.get('duration') or 0 for result in results),
+            'format': fmt,
+            'cached': False,
+        }
+        try:
+            concat_audio([result['filepath'] for result in results], path, fmt)
+            stored = cache.store(tts_cache_key(text, lang, gender, speed), merged)
+        except Exception:
+            stored = merged
+        if stored is merged:
+            if os.path.exists(path):
+                os.remove(path)
+            raise RuntimeError('合并音频失败')
+        return stored
+
+    def get_tts_service():
+        """获取语音合成服务实例（调用经过限流闸门）"""
+        return GatedService(get_voice_service(), get_gate('tts'), ['text_to_speech'])
+
     def get_speech_recognition_service():
-        """获取语音识别服务实例"""
+        """获取语音识别服务实例（调用经过限流闸门）"""
         try:
-            return get_speech_service()
+            return GatedService(get_speech_service(), get_gate('asr'), ['transcribe', 'transcribe_from_bytes'])
         except ImportError:
             logger.error("语音识别服务模块未找到，请创建 services/speech_service.py")
             raise
 
+    def speech_accepts_bytes():
+        return accepts_audio_bytes(get_speech_service())
+
+    def transcribe_audio_bytes(data, voice_format, engine=None):
+        """识别内存中的音频数据（调用经过语音识别限流闸门）
+
+        语音识别服务支持字节数据时直接交给服务；否则指定了识别引擎时直接调用一句话识别，
+        都不满足时写入临时文件交给服务识别，识别引擎始终由服务或请求决定。
+        """
+        speech_service = get_speech_recognition_service()
+        if accepts_audio_bytes(speech_service):
+            return speech_service.transcribe_from_bytes(data, voice_format)
+        if engine is not None:
+            return get_gate('asr').call(transcribe_from_bytes, data, voice_format, engine)
+        return transcribe_via_file(speech_service, data, voice_format)
+
+    def request_asr_options():
+        """读取识别参数 engine（一句话识别引擎，如 16k_en、8k_zh）与 lang（音频语言），引擎无效时抛出 ValueError"""
+        engine = request.form.get('engine') or None
+        resolve_engine(engine)
+        return {'engine': engine, 'lang': request.form.get('lang') or None}
+
+    def request_allows_cache():
+        """请求参数 cache=0 / false / off / no 时本次请求不读写结果缓存"""
+        values = (request.get_json(silent=True) or {}) if request.is_json else request.form
+        return str(values.get('cache', request.args.get('cache', '1'))).lower() not in ('0', 'false', 'off', 'no')
+
+    def transcribe_normalized(file, use_cache=True, engine=None, lang=None):
+        """在音频处理线程池中把上传的音频规范化为16kHz单声道后直接提交识别
+
+        以规范化后PCM的哈希与识别引擎查询识别结果缓存，相同内容的并发请求只识别一次。
+        上传超过 ASR_NORMALIZE_MAX_BYTES、WAV文件头时长超过 ASR_NORMALIZE_MAX_SECONDS（均在解码前判断）、
+        解码失败（如缺少ffmpeg）或规范化后仍超过 ASR_INLINE_MAX_BYTES 时返回 None，由调用方按原始文件识别。
+        """
+        stream = file.stream
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+        if size > config.ASR_NORMALIZE_MAX_BYTES:
+            return None
+        executor = get_executor('audio', config.ASR_NORMALIZE_WORKERS)
+        with buffer_view(file) as view:
+            if exceeds_limits(view, file.filename):
+                return None
+            try:
+                normalized = executor.submit(normalize_audio, view, file.filename).result()
+            except Exception as e:
+                logger.warning(f"音频规范化失败，使用原始音频识别: {e}")
+                return None
+        if normalized['bytes'] > config.ASR_INLINE_MAX_BYTES:
+            return None
+
+        stats = {key: normalized[key] for key in ('original_bytes', 'bytes', 'trimmed_ms', 'gain_db')}
+        cache = get_transcript_cache() if use_cache and config.ASR_CACHE_ENABLED else None
+        engine = resolve_engine(engine, lang, SAMPLE_RATE)
+        key = make_request_key(normalized['pcm_hash'], engine or 'service')
+        if cache is not None:
+            cached = cache.lookup(key)
+            if cached is not None:
+                cached['normalized'] = stats
+                return cached
+
+        def transcribe():
+            result = transcribe_audio_bytes(normalized['data'], normalized['format'], engine)
+            if cache is not None:
+                cache.store(key, result)
+            return result
+
+        result = get_single_flight('asr').do(key, transcribe)
+        result.update({'normalized': stats, 'cached': False})
+        return result
+
+    def transcribe_upload(file, use_cache=True, engine=None, lang=None):
+        """识别上传的音频
+
+        启用 ASR_NORMALIZE_ENABLED 时先规范化再直接提交（并使用识别结果缓存）；否则接口支持的格式且不超过
+        ASR_INLINE_MAX_BYTES、且服务支持字节数据或请求指定了 engine 时直接从内存提交（原始音频采样率未知，
+        不按 lang 推断引擎），其余写入临时文件交给语音识别服务（由其负责转码与选择引擎）。
+        """
+        if config.ASR_NORMALIZE_ENABLED:
+            result = transcribe_normalized(file, use_cache, engine, lang)
+            if result is not None:
+                return result
+
+        stream = file.stream
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+        voice_format = inline_format(file.filename, size)
+        if voice_format is not None and (engine is not None or speech_accepts_bytes()):
+            with buffer_view(file) as view:
+                return transcribe_audio_bytes(view, voice_format, engine)
+
+        upload_folder = 'static/uploads/audio'
+        os.makedirs(upload_folder, exist_ok=True)
+        fd, filepath = tempfile.mkstemp(dir=upload_folder, prefix='stt_', suffix=os.path.splitext(file.filename)[1])
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(stream, f, 1024 * 1024)
+        try:
+            return get_speech_recognition_service().transcribe(filepath)
+        finally:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+
+    def collect_with_timeouts(futures, started, timeout, busy_message, label):
+        """等待批量任务完成，超时从任务提交（即调用本函数）时起算，排队时间计入超时
+
+        futures 为 {Future: 序号}，started 记录各项实际开始执行的时间。到期仍未开始的任务直接取消，
+        已在执行的任务不再等待。返回 {序号: 结果}，结果中附带 elapsed_ms（执行耗时，未开始为 None）。
+        """
+        finished = {}
+        for future, index in futures.items():
+            future.add_done_callback(lambda _, index=index: finished.setdefault(index, time.monotonic()))
+        done, not_done = wait(futures, timeout=timeout)
+
+        outcomes = {}
+        for future in done:
+            index = futures[future]
+            try:
+                # 结果可能是合并请求的共享对象，复制后再附加本请求的字段
+                outcomes[index] = dict(future.result())
+            except RateLimitTimeout:
+                outcomes[index] = {'success': False, 'message': busy_message}
+            except Exception as e:
+                logger.error(f"{label}单项异常: {e}", exc_info=True)
+                outcomes[index] = {'success': False, 'message': f'识别失败: {e}'}
+        for future in not_done:
+            future.cancel()
+            outcomes[futures[future]] = {'success': False, 'message': f'识别超时（超过{timeout}秒）', 'timed_out': True}
+
+        for index, outcome in outcomes.items():
+            if index in started:
+                outcome['elapsed_ms'] = round((finished.get(index, time.monotonic()) - started[index]) * 1000)
+            else:
+                outcome['elapsed_ms'] = None
+        return outcomes
+
+    def sse_event(event, data):
+        """格式化一条 Server-Sent Events 消息"""
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
     def get_time_ago(timestamp):
         """获取相对时间描述"""
         if not timestamp:
@@ -398,17 +818,35 @@ def create_app():
             user_id = session['user_id']
             username = session.get('username', '用户')
 
-            # 保存上传的图片
-            upload_result = save_uploaded_file(file)
-
-            # 从保存的文件路径识别
-            ocr_service = get_ocr_service()
-            ocr_result = ocr_service.recognize_from_path(upload_result['filepath'])
+            # OCR服务支持直接提交数据时图片在内存中识别，仅在用户要求保留时才保存；
+            # PDF逐页栅格化需要文件路径，服务只接受文件路径时同样先保存
+            keep_image = str(request.form.get('keep_image', '')).lower() in ('1', 'true', 'on', 'yes')
+            upload_result = None
+            if is_pdf(file.filename):
+                upload_result = save_uploaded_file(file)
+                ocr_result = recognize_pdf(upload_result['filepath'], user_id)
+            elif not ocr_accepts_bytes():
+                upload_result = save_uploaded_file(file)
+                ocr_result = recognize_image(upload_result['filepath'], user_id)
+            else:
+                with buffer_view(file) as data:
+                    ocr_result = recognize_image_bytes(data, user_id)
+                if keep_image and ocr_result['success']:
+                    upload_result = save_uploaded_file(file)
+
+            if ocr_result['success'] and upload_result:
+                # 单张识别不写历史记录：要求保留的图片固定下来，避免返回的地址被回收；
+                # 其余只为识别而保存的文件（PDF、只接受路径的OCR服务）识别完即丢弃，不返回地址
+                if keep_image:
+                    upload_store.pin(upload_result)
+                else:
+                    upload_store.discard(upload_result)
+                    upload_result = None
 
             if ocr_result['success']:
                 # 将识别结果保存到session（不再保存到数据库）
                 session['last_ocr_text'] = ocr_result['text']
-                session['last_ocr_image'] = upload_result['filename']
+                session['last_ocr_image'] = upload_result['filename'] if upload_result else None
 
                 logger.info(f"OCR识别成功: 用户={username}, 字符数={len(ocr_result['text'])}")
 
@@ -418,10 +856,13 @@ def create_app():
                     'text': ocr_result['text'],
                     'detections': ocr_result.get('detections', []),
                     'confidence': ocr_result.get('confidence', 0),
+                    'language': detect_language(ocr_result['text'], 'auto'),
+                    'cached': ocr_result.get('cached', False),
+                    'pages': ocr_result.get('pages'),
                     'image_info': {
                         'filename': upload_result['filename'],
                         'url': upload_result['url']
-                    },
+                    } if upload_result else None,
                     'user_info': {
                         'username': username,
                         'user_id': user_id
@@ -429,9 +870,9 @@ def create_app():
                     'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 })
             else:
-                # 如果识别失败，删除已上传的图片
-                if os.path.exists(upload_result['filepath']):
-                    os.remove(upload_result['filepath'])
+                # 如果识别失败，删除已上传的文件（其他上传或历史记录共用的文件除外）
+                if upload_result:
+                    upload_store.discard(upload_result)
 
                 logger.warning(f"OCR识别失败: {ocr_result['message']}")
 
@@ -441,6 +882,9 @@ def create_app():
                     'code': 500
                 }), 500
 
+        except RateLimitTimeout as e:
+            logger.warning(f"OCR请求排队超时: {e}")
+            return jsonify({'success': False, 'message': 'OCR服务繁忙，请稍后重试', 'code': 503}), 503
         except Exception as e:
             logger.error(f"OCR处理异常: {str(e)}", exc_info=True)
             return jsonify({
@@ -451,46 +895,168 @@ def create_app():
 
     @app.route('/api/ocr/recognize/batch', methods=['POST'])
     def ocr_recognize_batch():
-        """批量OCR识别，多文件上传返回列表结果"""
+        """批量OCR识别，多文件上传返回列表结果
+
+        先校验并保存全部文件，再在有界线程池中并发识别，结果保持上传顺序；
+        提交识别 OCR_BATCH_ITEM_TIMEOUT 秒后仍未完成的文件记为超时，不再等待。
+        """
         try:
             if 'user_id' not in session:
                 return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
             files = request.files.getlist('images')
             if not files:
                 return jsonify({'success': False, 'message': '请上传图片文件', 'code': 400}), 400
+            if len(files) > config.OCR_BATCH_MAX_FILES:
+                return jsonify({
+                    'success': False,
+                    'message': f'单次最多识别{config.OCR_BATCH_MAX_FILES}个文件',
+                    'code': 400
+                }), 400
+
+            user_id = session['user_id']
+            batch_started = time.monotonic()
             results = []
-            ocr_service = get_ocr_service()
+            uploads = []
             for file in files:
                 if not allowed_file(file.filename):
                     results.append({'filename': file.filename, 'success': False, 'message': '不支持的文件类型'})
+                    uploads.append(None)
                     continue
-                upload = save_uploaded_file(file)
-                ocr_result = ocr_service.recognize_from_path(upload['filepath'])
-                if ocr_result['success']:
-                    history = TranslationHistory(
-                        user_id=session['user_id'],
-                        original_text=ocr_result['text'],
-                        translated_text=ocr_result['text'],
-                        source_lang='auto',
-                        target_lang='auto',
-                        operation_type='ocr',
-                        image_path=upload['filepath'],
-                        confidence=ocr_result.get('confidence'),
-                    )
-                    db.session.add(history)
-                    db.session.commit()
-                results.append({
-                    'filename': file.filename,
-                    'success': ocr_result.get('success', False),
-                    'text': ocr_result.get('text', ''),
-                    'message': ocr_result.get('message', ''),
+                results.append(None)
+                uploads.append(save_uploaded_file(file))
+
+            started = {}
+
+            def recognize(index, filepath):
+                started[index] = time.monotonic()
+                return recognize_pdf(filepath, user_id) if is_pdf(filepath) else recognize_image(filepath, user_id)
+
+            executor = get_executor('ocr', config.OCR_BATCH_WORKERS)
+            futures = {
+                executor.submit(recognize, index, upload['filepath']): index
+                for index, upload in enumerate(uploads) if upload is not None
+            }
+
+            outcomes = collect_with_timeouts(
+                futures, started, config.OCR_BATCH_ITEM_TIMEOUT, 'OCR服务繁忙，请稍后重试', '批量OCR'
+            )
+
+            histories = []
+            for index, outcome in outcomes.items():
+                upload = uploads[index]
+                if outcome.get('success'):
+                    # 识别结果未经翻译，源语言与目标语言相同
+                    language = detect_language(outcome['text'], 'auto')
+                    histories.append({
+                        'user_id': user_id,
+                        'original_text': outcome['text'],
+                        'translated_text': outcome['text'],
+                        'source_lang': language,
+                        'target_lang': language,
+                        'operation_type': 'ocr',
+                        'image_path': upload['filepath'],
+                        'confidence': outcome.get('confidence'),
+                    })
+                results[index] = {
+                    'filename': files[index].filename,
+                    'success': outcome.get('success', False),
+                    'text': outcome.get('text', ''),
+                    'message': outcome.get('message', ''),
                     'image_url': upload['url'],
-                })
-            return jsonify({'success': True, 'results': results})
+                    'cached': outcome.get('cached', False),
+                    'timed_out': outcome.get('timed_out', False),
+                    'elapsed_ms': outcome.get('elapsed_ms'),
+                }
+
+            # 所有历史记录在同一事务中写入
+            history_writer.submit(histories)
+
+            success_count = sum(1 for entry in results if entry['success'])
+            elapsed_ms = round((time.monotonic() - batch_started) * 1000)
+            logger.info(
+                f"批量OCR完成: 用户={session.get('username')}, 文件数={len(files)}, "
+                f"成功={success_count}, 耗时={elapsed_ms}ms"
+            )
+            return jsonify({
+                'success': True,
+                'count': len(results),
+                'success_count': success_count,
+                'elapsed_ms': elapsed_ms,
+                'results': results
+            })
         except Exception as e:
             logger.error(f"批量OCR处理异常: {e}", exc_info=True)
             return jsonify({'success': False, 'message': f'处理失败: {e}', 'code': 500}), 500
 
+    @app.route('/api/ocr/recognize/pdf', methods=['POST'])
+    def ocr_recognize_pdf():
+        """PDF逐页识别接口（SSE）：每页识别完成后立即推送，有文字层的页面直接提取文本"""
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+
+        file = request.files.get('file') or request.files.get('image')
+        if file is None or not file.filename or not is_pdf(file.filename):
+            return jsonify({'success': False, 'message': '请上传PDF文件', 'code': 400}), 400
+
+        user_id = session['user_id']
+        username = session.get('username', '用户')
+        upload = save_uploaded_file(file)
+        try:
+            page_count = count_pages(upload['filepath'])
+        except Exception as e:
+            upload_store.discard(upload)
+            logger.warning(f"PDF文件无法解析: {e}")
+            return jsonify({'success': False, 'message': f'PDF文件无法解析: {e}', 'code': 400}), 400
+
+        def generate():
+            texts = []
+            ocr_pages = 0
+            yield sse_event('start', {
+                'pages': min(page_count, config.PDF_MAX_PAGES),
+                'total_pages': page_count,
+                'file_url': upload['url']
+            })
+            try:
+                for page in iter_pdf_pages(upload['filepath'], page_recognizer(user_id)):
+                    if page['success'] and page['text']:
+                        texts.append(page['text'])
+                    if page['source'] == 'ocr':
+                        ocr_pages += 1
+                    yield sse_event('page', page)
+
+                text = '\n\n'.join(texts)
+                language = detect_language(text, 'auto')
+                history_token = None
+                if text:
+                    history_token = history_writer.submit_one(
+                        user_id=user_id,
+                        original_text=text,
+                        translated_text=text,
+                        source_lang=language,
+                        target_lang=language,
+                        operation_type='ocr',
+                        image_path=upload['filepath']
+                    )
+
+                logger.info(f"PDF识别完成: 用户={username}, 页数={page_count}, OCR页数={ocr_pages}")
+                yield sse_event('done', {
+                    'success': True,
+                    'history_token': history_token,
+                    'text': text,
+                    'language': language,
+                    'ocr_pages': ocr_pages,
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+            except Exception as e:
+                logger.error(f"PDF识别异常: {e}", exc_info=True)
+                yield sse_event('error', {'success': False, 'message': f'识别失败: {e}'})
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
     @app.route('/api/ocr/test', methods=['GET'])
     def ocr_test():
         """测试OCR服务是否正常"""
@@ -560,13 +1126,13 @@ def create_app():
             user_id = session['user_id']
             username = session.get('username', '用户')
 
-            # 调用翻译服务
-            translation_service = get_translation_service()
-            translation_result = translation_service.translate(text, source_lang, target_lang)
+            # 调用翻译服务（优先命中缓存）
+            translation_result = translate_with_cache(text, source_lang, target_lang, user_id)
+            source_lang = translation_result.get('source_lang', source_lang)
 
             if translation_result['success']:
-                # 保存到翻译历史记录
-                history = TranslationHistory(
+                # 保存到翻译历史记录（异步写入，立即返回记录标识 history_token）
+                history_token = history_writer.submit_one(
                     user_id=user_id,
                     original_text=text,
                     source_lang=source_lang,
@@ -574,8 +1140,6 @@ def create_app():
                     translated_text=translation_result['translated'],
                     operation_type='translate'
                 )
-                db.session.add(history)
-                db.session.commit()
 
                 # 将翻译结果保存到session
                 session['last_translation'] = {
@@ -584,7 +1148,7 @@ def create_app():
                     'source_lang': source_lang,
                     'target_lang': target_lang,
                     'timestamp': datetime.now().isoformat(),
-                    'history_id': history.id
+                    'history_token': history_token
                 }
 
                 logger.info(f"翻译成功: 用户={username}, {source_lang}→{target_lang}, 字符数={len(text)}")
@@ -596,7 +1160,8 @@ def create_app():
                     'translated': translation_result['translated'],
                     'source_lang': source_lang,
                     'target_lang': target_lang,
-                    'history_id': history.id,
+                    'history_token': history_token,
+                    'cached': translation_result.get('cached', False),
                     'user_info': {
                         'username': username,
                         'user_id': user_id
@@ -612,6 +1177,9 @@ def create_app():
                     'code': 500
                 }), 500
 
+        except RateLimitTimeout as e:
+            logger.warning(f"翻译请求排队超时: {e}")
+            return jsonify({'success': False, 'message': '翻译服务繁忙，请稍后重试', 'code': 503}), 503
         except Exception as e:
             db.session.rollback()
             logger.error(f"翻译处理异常: {str(e)}", exc_info=True)
@@ -621,9 +1189,229 @@ def create_app():
                 'code': 500
             }), 500
 
+    @app.route('/api/translate/batch', methods=['POST'])
+    def translate_batch():
+        """批量翻译接口：相同文本只翻译一次，并发调用翻译服务，历史记录一次性提交"""
+        try:
+            if 'user_id' not in session:
+                return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+
+            data = request.get_json(silent=True) or {}
+            items = data.get('items', data.get('texts'))
+            if not isinstance(items, list) or not items:
+                return jsonify({'success': False, 'message': '请提供要翻译的文本列表', 'code': 400}), 400
+            if len(items) > config.TRANSLATE_BATCH_MAX_ITEMS:
+                return jsonify({
+                    'success': False,
+                    'message': f'单次最多翻译{config.TRANSLATE_BATCH_MAX_ITEMS}条文本',
+                    'code': 400
+                }), 400
+
+            # 每项可以是字符串，也可以是带独立语言对的 {text, source_lang, target_lang}
+            default_source = data.get('source_lang', 'zh')
+            default_target = data.get('target_lang', 'en')
+            batch = []
+            for item in items:
+                if isinstance(item, dict):
+                    batch.append((
+                        str(item.get('text') or '').strip(),
+                        item.get('source_lang', default_source),
+                        item.get('target_lang', default_target)
+                    ))
+                else:
+                    batch.append((str(item or '').strip(), default_source, default_target))
+
+            # 去重后并发翻译
+            user_id = session['user_id']
+            unique = list(dict.fromkeys(key for key in batch if key[0]))
+            executor = get_executor('translate', config.TRANSLATE_BATCH_WORKERS)
+            futures = {key: executor.submit(translate_with_cache, *key, user_id) for key in unique}
+            outcomes = {}
+            for key, future in futures.items():
+                try:
+                    outcomes[key] = future.result()
+                except Exception as e:
+                    logger.error(f"批量翻译单项异常: {e}", exc_info=True)
+                    outcomes[key] = {'success': False, 'message': f'翻译失败: {e}'}
+
+            results = []
+            histories = []
+            for index, (text, source_lang, target_lang) in enumerate(batch):
+                if not text:
+                    results.append({'index': index, 'success': False, 'message': '文本为空'})
+                    continue
+                outcome = outcomes[(text, source_lang, target_lang)]
+                source_lang = outcome.get('source_lang', source_lang)
+                entry = {
+                    'index': index,
+                    'success': bool(outcome.get('success')),
+                    'original': text,
+                    'translated': outcome.get('translated', ''),
+                    'source_lang': source_lang,
+                    'target_lang': target_lang,
+                    'cached': outcome.get('cached', False),
+                    'message': outcome.get('message', '')
+                }
+                if entry['success']:
+                    histories.append((entry, {
+                        'user_id': user_id,
+                        'original_text': text,
+                        'source_lang': source_lang,
+                        'target_lang': target_lang,
+                        'translated_text': outcome['translated'],
+                        'operation_type': 'translate'
+                    }))
+                results.append(entry)
+
+            # 所有历史记录在同一事务中写入
+            history_tokens = history_writer.submit([record for _, record in histories])
+            for (entry, _), history_token in zip(histories, history_tokens):
+                entry['history_token'] = history_token
+
+            success_count = sum(1 for entry in results if entry['success'])
+            logger.info(
+                f"批量翻译完成: 用户={session.get('username')}, 条数={len(batch)}, "
+                f"去重后={len(unique)}, 成功={success_count}"
+            )
+
+            return jsonify({
+                'success': True,
+                'count': len(results),
+                'unique_count': len(unique),
+                'success_count': success_count,
+                'results': results,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"批量翻译处理异常: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': f'批量翻译失败: {e}', 'code': 500}), 500
+
+    @app.route('/api/translate/stream', methods=['POST'])
+    def translate_stream():
+        """流式翻译接口（SSE）：按段落/句子分块翻译，每块译完立即推送"""
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+
+        data = request.get_json(silent=True) or request.form
+        text = (data.get('text') or '').strip()
+        source_lang = data.get('source_lang', 'zh')
+        target_lang = data.get('target_lang', 'en')
+        if not text:
+            return jsonify({'success': False, 'message': '请输入要翻译的文本', 'code': 400}), 400
+
+        user_id = session['user_id']
+        username = session.get('username', '用户')
+        # 整篇文本统一识别一次源语言，避免各块识别结果不一致
+        source_lang = resolve_source_lang(text, source_lang)
+        chunks = group_sentences(split_sentences(text), config.TRANSLATE_STREAM_CHUNK_CHARS)
+
+        def generate():
+            executor = get_executor('translate', config.TRANSLATE_BATCH_WORKERS)
+            pending = deque()
+            translated_parts = []
+            yield sse_event('start', {'chunks': len(chunks), 'source_lang': source_lang, 'target_lang': target_lang})
+
+            def emit(index, separator, future):
+                result = future.result()
+                if not result.get('success'):
+                    raise RuntimeError(result.get('message', '翻译失败'))
+                joined_separator = join_separator(separator, target_lang) if index < len(chunks) - 1 else ''
+                translated_parts.append(result['translated'] + joined_separator)
+                return sse_event('chunk', {
+                    'index': index,
+                    'translated': result['translated'],
+                    'separator': joined_separator,
+                    'cached': result.get('cached', False)
+                })
+
+            try:
+                # 流水线：最多同时翻译 TRANSLATE_STREAM_WINDOW 块，按原顺序输出
+                for index, (chunk, separator) in enumerate(chunks):
+                    pending.append((index, separator, executor.submit(translate_with_cache, chunk, source_lang, target_lang, user_id)))
+                    if len(pending) >= config.TRANSLATE_STREAM_WINDOW:
+                        yield emit(*pending.popleft())
+                while pending:
+                    yield emit(*pending.popleft())
+
+                translated = ''.join(translated_parts)
+                history_token = history_writer.submit_one(
+                    user_id=user_id,
+                    original_text=text,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    translated_text=translated,
+                    operation_type='translate'
+                )
+
+                logger.info(f"流式翻译成功: 用户={username}, {source_lang}→{target_lang}, 字符数={len(text)}, 分块={len(chunks)}")
+                yield sse_event('done', {
+                    'success': True,
+                    'history_token': history_token,
+                    'translated': translated,
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+            except Exception as e:
+                for _, _, future in pending:
+                    future.cancel()
+                logger.error(f"流式翻译异常: {e}", exc_info=True)
+                yield sse_event('error', {'success': False, 'message': f'翻译失败: {e}'})
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    @app.route('/api/translate/cache/stats', methods=['GET'])
+    def translation_cache_stats():
+        """获取翻译缓存命中统计"""
+        try:
+            if 'user_id' not in session:
+                return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+            return jsonify({
+                'success': True,
+                'enabled': config.TRANSLATION_CACHE_ENABLED,
+                'stats': get_translation_cache().stats(),
+                'memory_enabled': config.TRANSLATION_MEMORY_ENABLED,
+                'memory_stats': get_translation_memory().stats()
+            })
+        except Exception as e:
+            logger.error(f"获取翻译缓存统计失败: {e}")
+            return jsonify({'success': False, 'message': f'获取缓存统计失败: {e}', 'code': 500}), 500
+
+    def can_manage_translation_cache():
+        """翻译缓存为全体用户共享，仅允许配置中的管理员清除"""
+        return session.get('username') in config.TRANSLATION_CACHE_ADMINS
+
+    @app.route('/api/translate/cache', methods=['DELETE'])
+    def invalidate_translation_cache():
+        """使翻译缓存失效，可指定 text / source_lang / target_lang，缺省清空全部"""
+        try:
+            if 'user_id' not in session:
+                return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+            if not can_manage_translation_cache():
+                return jsonify({'success': False, 'message': '无权清除翻译缓存', 'code': 403}), 403
+            data = request.get_json(silent=True) or {}
+            deleted = get_translation_cache().invalidate(
+                text=data.get('text'),
+                source_lang=data.get('source_lang'),
+                target_lang=data.get('target_lang')
+            )
+            return jsonify({'success': True, 'message': f'已清除{deleted}条翻译缓存', 'deleted_count': deleted})
+        except Exception as e:
+            logger.error(f"清除翻译缓存失败: {e}")
+            return jsonify({'success': False, 'message': f'清除缓存失败: {e}', 'code': 500}), 500
+
     @app.route('/api/translate/history', methods=['GET'])
     def get_translation_history():
-        """获取翻译历史记录"""
+        """获取翻译历史记录
+
+        按 (created_at, id) 键集分页：首页不传 cursor，下一页传上次返回的 next_cursor，
+        每页都沿索引直接定位，耗时与历史记录总量和翻页深度无关。with_total=1 时返回总条数
+        （读取触发器维护的计数）。仍兼容 page 参数的页码分页。
+        """
         try:
             # 检查用户是否登录
             if 'user_id' not in session:
@@ -633,22 +1421,42 @@ def create_app():
                     'code': 401
                 }), 401
 
+            # 先写入队列中尚未落盘的历史记录
+            history_writer.flush()
+
             user_id = session['user_id']
 
             # 获取请求参数
-            limit = request.args.get('limit', 20, type=int)
-            page = request.args.get('page', 1, type=int)
+            limit = max(1, min(request.args.get('limit', 20, type=int), config.HISTORY_PAGE_MAX_LIMIT))
+            page = request.args.get('page', type=int)
+            cursor = request.args.get('cursor')
             operation_type = request.args.get('type', 'translate')
-
-            # 查询用户的翻译历史记录
-            histories = TranslationHistory.query.filter_by(
-                user_id=user_id,
-                operation_type=operation_type
-            ).order_by(TranslationHistory.created_at.desc()) \
-                .paginate(page=page, per_page=limit, error_out=False)
+            with_total = str(request.args.get('with_total', '')).lower() in ('1', 'true', 'on', 'yes')
+
+            # 查询用户的翻译历史记录；created_at 按数据库中的原始字符串比较和编码游标
+            created_raw = db.type_coerce(TranslationHistory.created_at, db.String)
+            query = db.session.query(TranslationHistory, created_raw).filter(
+                TranslationHistory.user_id == user_id,
+                TranslationHistory.operation_type == operation_type
+            )
+            if cursor:
+                try:
+                    after_created, after_id = decode_cursor(cursor)
+                except ValueError as e:
+                    return jsonify({'success': False, 'message': str(e), 'code': 400}), 400
+                query = query.filter(db.tuple_(created_raw, TranslationHistory.id) < db.tuple_(after_created, after_id))
+            query = query.order_by(TranslationHistory.created_at.desc(), TranslationHistory.id.desc())
+            if page is not None and not cursor:
+                page = max(page, 1)
+                query = query.offset((page - 1) * limit)
+            # 多取一条判断是否还有下一页
+            rows = query.limit(limit + 1).all()
+            has_next = len(rows) > limit
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id) if has_next else None
 
             result = []
-            for history in histories.items:
+            for history, _ in rows:
                 # 获取预览文本
                 original_preview = history.original_text
                 if len(original_preview) > 100:
@@ -660,6 +1468,7 @@ def create_app():
 
                 result.append({
                     'id': history.id,
+                    'history_token': history.history_token,
                     'original_text': history.original_text,
                     'translated_text': history.translated_text,
                     'original_preview': original_preview,
@@ -671,17 +1480,25 @@ def create_app():
                     'time_ago': get_time_ago(history.created_at) if history.created_at else None
                 })
 
-            return jsonify({
+            response = {
                 'success': True,
                 'count': len(result),
-                'total': histories.total,
-                'page': histories.page,
-                'pages': histories.pages,
-                'has_next': histories.has_next,
-                'has_prev': histories.has_prev,
+                'has_next': has_next,
+                'next_cursor': next_cursor,
                 'histories': result,
-                'message': f'找到{histories.total}条翻译历史记录'
-            })
+                'message': f'找到{len(result)}条翻译历史记录'
+            }
+            if page is not None and not cursor:
+                total = history_counter.count(user_id, operation_type)
+                response.update({
+                    'total': total,
+                    'page': page,
+                    'pages': (total + limit - 1) // limit,
+                    'has_prev': page > 1,
+                })
+            elif with_total:
+                response['total'] = history_counter.count(user_id, operation_type)
+            return jsonify(response)
 
         except Exception as e:
             logger.error(f"获取翻译历史失败: {str(e)}")
@@ -691,8 +1508,13 @@ def create_app():
                 'code': 500
             }), 500
 
+    def history_lookup(history_id, history_token):
+        """按记录ID或写入时返回的 history_token 定位历史记录"""
+        return {'id': history_id} if history_token is None else {'history_token': history_token}
+
     @app.route('/api/translate/history/<int:history_id>', methods=['GET'])
-    def get_translation_history_detail(history_id):
+    @app.route('/api/translate/history/token/<history_token>', methods=['GET'])
+    def get_translation_history_detail(history_id=None, history_token=None):
         """获取单条翻译历史记录详情"""
         try:
             # 检查用户是否登录
@@ -703,11 +1525,14 @@ def create_app():
                     'code': 401
                 }), 401
 
+            # 先写入队列中尚未落盘的历史记录
+            history_writer.flush()
+
             user_id = session['user_id']
 
             # 查找记录
             history = TranslationHistory.query.filter_by(
-                id=history_id,
+                **history_lookup(history_id, history_token),
                 user_id=user_id,
                 operation_type='translate'
             ).first()
@@ -734,7 +1559,8 @@ def create_app():
             }), 500
 
     @app.route('/api/translate/history/<int:history_id>', methods=['DELETE'])
-    def delete_translation_history(history_id):
+    @app.route('/api/translate/history/token/<history_token>', methods=['DELETE'])
+    def delete_translation_history(history_id=None, history_token=None):
         """删除翻译历史记录"""
         try:
             # 检查用户是否登录
@@ -745,11 +1571,14 @@ def create_app():
                     'code': 401
                 }), 401
 
+            # 先写入队列中尚未落盘的历史记录
+            history_writer.flush()
+
             user_id = session['user_id']
 
             # 查找记录
             history = TranslationHistory.query.filter_by(
-                id=history_id,
+                **history_lookup(history_id, history_token),
                 user_id=user_id,
                 operation_type='translate'
             ).first()
@@ -762,13 +1591,14 @@ def create_app():
                 }), 404
 
             # 删除数据库记录
+            deleted_id = history.id
             db.session.delete(history)
             db.session.commit()
 
             return jsonify({
                 'success': True,
                 'message': '删除成功',
-                'deleted_id': history_id
+                'deleted_id': deleted_id
             })
 
         except Exception as e:
@@ -792,6 +1622,9 @@ def create_app():
                     'code': 401
                 }), 401
 
+            # 先写入队列中尚未落盘的历史记录
+            history_writer.flush()
+
             user_id = session['user_id']
 
             # 删除用户的所有翻译历史记录
@@ -817,6 +1650,369 @@ def create_app():
                 'code': 500
             }), 500
 
+    # ==================== 术语表路由 ====================
+
+    def can_edit_global_glossary():
+        """全局术语仅允许配置中的管理员维护"""
+        return session.get('username') in config.GLOSSARY_ADMINS
+
+    @app.route('/api/glossary', methods=['GET'])
+    def list_glossary():
+        """获取术语表：当前用户的个人术语及全局术语"""
+        try:
+            if 'user_id' not in session:
+                return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+
+            query = GlossaryEntry.query.filter(
+                (GlossaryEntry.user_id == session['user_id']) | (GlossaryEntry.user_id.is_(None))
+            )
+            source_lang = request.args.get('source_lang')
+            target_lang = request.args.get('target_lang')
+            if source_lang:
+                query = query.filter_by(source_lang=source_lang)
+            if target_lang:
+                query = query.filter_by(target_lang=target_lang)
+            entries = query.order_by(GlossaryEntry.term).all()
+
+            return jsonify({
+                'success': True,
+                'count': len(entries),
+                'entries': [entry.to_dict() for entry in entries]
+            })
+        except Exception as e:
+            logger.error(f"获取术语表失败: {e}")
+            return jsonify({'success': False, 'message': f'获取术语表失败: {e}', 'code': 500}), 500
+
+    @app.route('/api/glossary', methods=['POST'])
+    def save_glossary_entries():
+        """新增或更新术语，支持单条或 entries 列表批量导入"""
+        try:
+            if 'user_id' not in session:
+                return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+
+            data = request.get_json(silent=True) or {}
+            items = data.get('entries') if isinstance(data.get('entries'), list) else [data]
+            if data.get('scope') == 'global' and not can_edit_global_glossary():
+                return jsonify({'success': False, 'message': '无权维护全局术语', 'code': 403}), 403
+            owner_id = None if data.get('scope') == 'global' else session['user_id']
+
+            default_source = data.get('source_lang', 'zh')
+            default_target = data.get('target_lang', 'en')
+            cleaned = {}
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                term = str(item.get('term') or '').strip()
+                translation = str(item.get('translation') or '').strip()
+                if not term or not translation:
+                    continue
+                if len(term) > 200 or len(translation) > 200:
+                    return jsonify({'success': False, 'message': '术语及译法长度不能超过200个字符', 'code': 400}), 400
+                key = (item.get('source_lang', default_source), item.get('target_lang', default_target), term)
+                cleaned[key] = translation
+            if not cleaned:
+                return jsonify({'success': False, 'message': '请提供术语及其译法', 'code': 400}), 400
+
+            # 一次查出已有词条，存在则更新译法
+            existing = {}
+            for source_lang, target_lang in {(s, t) for s, t, _ in cleaned}:
+                for entry in GlossaryEntry.query.filter_by(
+                    user_id=owner_id, source_lang=source_lang, target_lang=target_lang
+                ).all():
+                    existing[(source_lang, target_lang, entry.term)] = entry
+
+            created = updated = 0
+            for (source_lang, target_lang, term), translation in cleaned.items():
+                entry = existing.get((source_lang, target_lang, term))
+                if entry is None:
+                    db.session.add(GlossaryEntry(source_lang, target_lang, term, translation, user_id=owner_id))
+                    created += 1
+                elif entry.translation != translation:
+                    entry.translation = translation
+                    updated += 1
+            db.session.commit()
+
+            for (source_lang, target_lang, term), translation in cleaned.items():
+                glossary.entry_added(owner_id, source_lang, target_lang, term, translation)
+
+            return jsonify({
+                'success': True,
+                'message': f'新增{created}条，更新{updated}条术语',
+                'created_count': created,
+                'updated_count': updated
+            })
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"保存术语失败: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': f'保存术语失败: {e}', 'code': 500}), 500
+
+    @app.route('/api/glossary/<int:entry_id>', methods=['DELETE'])
+    def delete_glossary_entry(entry_id):
+        """删除术语"""
+        try:
+            if 'user_id' not in session:
+                return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+
+            entry = GlossaryEntry.query.get(entry_id)
+            allowed = entry is not None and (
+                entry.user_id == session['user_id'] or (entry.user_id is None and can_edit_global_glossary())
+            )
+            if not allowed:
+                return jsonify({'success': False, 'message': '术语不存在或无权删除', 'code': 404}), 404
+
+            db.session.delete(entry)
+            db.session.commit()
+            glossary.entry_removed(entry.user_id, entry.source_lang, entry.target_lang, entry.term)
+
+            return jsonify({'success': True, 'message': '删除成功', 'deleted_id': entry_id})
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"删除术语失败: {e}")
+            return jsonify({'success': False, 'message': f'删除失败: {e}', 'code': 500}), 500
+
+    # ==================== 组合流水线路由 ====================
+
+    PIPELINE_SOURCE_STEPS = {'ocr': 'image', 'asr': 'audio'}
+
+    def parse_pipeline_steps(raw, upload_field):
+        """解析并校验流水线步骤：识别步骤（ocr/asr）在前，其后依次可选 translate、tts"""
+        if isinstance(raw, str):
+            raw = raw.strip()
+            steps = json.loads(raw) if raw.startswith('[') else [s.strip() for s in raw.split(',') if s.strip()]
+        else:
+            steps = list(raw or [])
+        if not steps:
+            steps = ['ocr' if upload_field == 'image' else 'asr', 'translate', 'tts']
+        steps = [str(step).lower() for step in steps]
+        if steps[0] not in PIPELINE_SOURCE_STEPS or PIPELINE_SOURCE_STEPS[steps[0]] != upload_field:
+            raise ValueError('第一步须为 ocr（上传 image）或 asr（上传 audio）')
+        rest = steps[1:]
+        if rest not in ([], ['translate'], ['tts'], ['translate', 'tts']):
+            raise ValueError('识别之后只能依次执行 translate、tts')
+        return steps
+
+    def pipeline_source_text(steps, file, upload, user_id, asr_lang=None):
+        """执行识别步骤，逐段产出识别出的文本；PDF每识别完一页即产出该页"""
+        if steps[0] == 'asr':
+            result = transcribe_upload(file, lang=asr_lang)
+            if not result.get('success'):
+                raise RuntimeError(result.get('message', '语音识别失败'))
+            yield result.get('text', ''), None
+        elif upload is not None and is_pdf(upload['filename']):
+            for page in iter_pdf_pages(upload['filepath'], page_recognizer(user_id)):
+                if page['success'] and page['text']:
+                    yield page['text'], page.get('confidence')
+        else:
+            if upload is not None:
+                result = recognize_image(upload['filepath'], user_id)
+            else:
+                with buffer_view(file) as data:
+                    result = recognize_image_bytes(data, user_id)
+            if not result.get('success'):
+                raise RuntimeError(result.get('message', '文字识别失败'))
+            yield result.get('text', ''), result.get('confidence')
+
+    def run_pipeline(steps, file, upload, source_lang, target_lang, gender, speed, user_id):
+        """执行流水线，产出 (事件名, 数据)
+
+        识别出的文本按句分块，每块依次翻译、合成语音；各块在线程池中并发执行（最多
+        TRANSLATE_STREAM_WINDOW 块在途），按原顺序输出。PDF逐页识别时，前几页的翻译与合成
+        和后续页面的识别同时进行。
+        """
+        do_translate = 'translate' in steps
+        do_tts = 'tts' in steps
+        executor = get_executor('pipeline', config.TRANSLATE_STREAM_WINDOW * 2)
+        pending = deque()
+        originals, translations, audio = [], [], []
+        confidences = []
+        resolved = {'source_lang': source_lang}
+
+        def process(chunk):
+            segment = {'original': chunk}
+            text, lang = chunk, resolved['source_lang']
+            if do_translate:
+                result = translate_with_cache(chunk, resolved['source_lang'], target_lang, user_id)
+                if not result.get('success'):
+                    raise RuntimeError(result.get('message', '翻译失败'))
+                text, lang = result['translated'], target_lang
+                segment.update({'translated': text, 'cached': result.get('cached', False)})
+            if do_tts:
+                result = synthesize_speech(text, lang, gender, speed)
+                if not result.get('success'):
+                    raise RuntimeError(result.get('message', '语音合成失败'))
+                segment.update({'audio_url': result['audio_url'], 'duration': result.get('duration')})
+            return segment
+
+        def emit():
+            index, separator, future = pending.popleft()
+            segment = future.result()
+            segment.update({'index': index, 'separator': separator})
+            originals.append(segment['original'] + separator)
+            if do_translate:
+                translations.append(segment['translated'] + (join_separator(separator, target_lang) if separator else ''))
+            if do_tts:
+                audio.append({'index': index, 'audio_url': segment['audio_url'], 'duration': segment['duration']})
+            return 'segment', segment
+
+        index = 0
+        try:
+            for text, confidence in pipeline_source_text(steps, file, upload, user_id, source_lang):
+                if confidence is not None:
+                    confidences.append(confidence)
+                if not text.strip():
+                    continue
+                if resolved['source_lang'] == 'auto':
+                    # 以第一段识别结果确定源语言，后续各块保持一致
+                    resolved['source_lang'] = resolve_source_lang(text, 'auto')
+                    if resolved['source_lang'] == 'auto':
+                        resolved['source_lang'] = detect_language(text, 'zh')
+                yield 'recognized', {'text': text, 'confidence': confidence, 'source_lang': resolved['source_lang']}
+                for chunk, separator in group_sentences(split_sentences(text), config.TRANSLATE_STREAM_CHUNK_CHARS):
+                    if not chunk.strip():
+                        continue
+                    pending.append((index, separator or '\n', executor.submit(process, chunk)))
+                    index += 1
+                    if len(pending) >= config.TRANSLATE_STREAM_WINDOW:
+                        yield emit()
+            while pending:
+                yield emit()
+        except Exception:
+            for _, _, future in pending:
+                future.cancel()
+            raise
+
+        original_text = ''.join(originals).strip()
+        translated_text = ''.join(translations).strip() if do_translate else original_text
+        history_token = None
+        if original_text:
+            history_token = history_writer.submit_one(
+                user_id=user_id,
+                original_text=original_text,
+                translated_text=translated_text,
+                source_lang=resolved['source_lang'],
+                target_lang=target_lang if do_translate else resolved['source_lang'],
+                operation_type='+'.join(steps),
+                image_path=upload['filepath'] if upload else None,
+                confidence=sum(confidences) / len(confidences) if confidences else None
+            )
+        yield 'done', {
+            'success': True,
+            'steps': steps,
+            'history_token': history_token,
+            'source_lang': resolved['source_lang'],
+            'target_lang': target_lang if do_translate else None,
+            'text': original_text,
+            'translated': translated_text if do_translate else None,
+            'audio': audio,
+            'duration': sum(item['duration'] or 0 for item in audio) if do_tts else None,
+            'image_url': upload['url'] if upload else None,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    @app.route('/api/pipeline', methods=['POST'])
+    def run_pipeline_endpoint():
+        """组合流水线接口：一次请求完成 识别（OCR/语音识别）→ 翻译 → 语音合成
+
+        表单字段：image 或 audio 文件；steps 如 "ocr,translate,tts"（缺省为全部步骤）；
+        source_lang、target_lang、gender、speed；keep_image 保留上传的图片；
+        stream=1 时以 SSE 逐块推送（recognized / segment / done / error），否则返回完整JSON。
+        """
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+
+        upload_field = 'image' if request.files.get('image') else 'audio'
+        file = request.files.get(upload_field)
+        if file is None or not file.filename:
+            return jsonify({'success': False, 'message': '请上传图片或音频文件', 'code': 400}), 400
+        if upload_field == 'image' and not allowed_file(file.filename):
+            return jsonify({
+                'success': False,
+                'message': '不支持的文件类型，仅支持 PNG, JPG, JPEG, BMP, PDF',
+                'code': 400
+            }), 400
+        try:
+            steps = parse_pipeline_steps(request.form.get('steps', ''), upload_field)
+            speed = float(request.form.get('speed', 1.0))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'参数错误: {e}', 'code': 400}), 400
+        if 'tts' in steps and not get_tts_service().is_available():
+            return jsonify({'success': False, 'message': '语音合成服务不可用，请检查腾讯云配置', 'code': 503}), 503
+
+        source_lang = request.form.get('source_lang', 'auto')
+        target_lang = request.form.get('target_lang', 'en')
+        gender = request.form.get('gender', 'female')
+        user_id = session['user_id']
+        username = session.get('username', '用户')
+
+        # PDF或只接受文件路径的OCR服务需要先保存文件，否则图片仅在要求保留时保存
+        keep_image = str(request.form.get('keep_image', '')).lower() in ('1', 'true', 'on', 'yes')
+        upload = None
+        if upload_field == 'image' and (keep_image or is_pdf(file.filename) or not ocr_accepts_bytes()):
+            upload = save_uploaded_file(file)
+
+        events = run_pipeline(steps, file, upload, source_lang, target_lang, gender, speed, user_id)
+        started = time.monotonic()
+
+        def log_done(data):
+            logger.info(
+                f"流水线完成: 用户={username}, 步骤={'+'.join(steps)}, 分块={len(data.get('audio') or []) or '-'}, "
+                f"耗时={(time.monotonic() - started) * 1000:.0f}ms"
+            )
+
+        if str(request.form.get('stream', '')).lower() in ('1', 'true', 'on', 'yes'):
+            def generate():
+                yield sse_event('start', {'steps': steps})
+                try:
+                    for event, data in events:
+                        if event == 'done':
+                            log_done(data)
+                        yield sse_event(event, data)
+                except Exception as e:
+                    logger.error(f"流水线执行异常: {e}", exc_info=True)
+                    yield sse_event('error', {'success': False, 'message': f'处理失败: {e}'})
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        try:
+            segments = []
+            for event, data in events:
+                if event == 'segment':
+                    segments.append(data)
+                elif event == 'done':
+                    log_done(data)
+                    data['segments'] = segments
+                    return jsonify(data)
+        except RateLimitTimeout as e:
+            logger.warning(f"流水线请求排队超时: {e}")
+            return jsonify({'success': False, 'message': '服务繁忙，请稍后重试', 'code': 503}), 503
+        except Exception as e:
+            logger.error(f"流水线执行异常: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': f'处理失败: {e}', 'code': 500}), 500
+
+    # ==================== 系统状态路由 ====================
+
+    @app.route('/api/system/stats', methods=['GET'])
+    def system_stats():
+        """获取服务调用合并等运行统计"""
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+        return jsonify({
+            'success': True,
+            'single_flight': single_flight_stats(),
+            'history_writer': history_writer.stats(),
+            'rate_limits': rate_limit_stats(),
+            'client_pools': client_pool_stats(),
+            'ocr_cache': get_ocr_cache().stats() if config.OCR_CACHE_ENABLED else None,
+            'tts_cache': get_audio_cache().stats() if config.TTS_CACHE_ENABLED else None,
+            'transcript_cache': get_transcript_cache().stats() if config.ASR_CACHE_ENABLED else None,
+            'upload_store': upload_store.stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+
     # ==================== 错误处理 ====================
 
     @app.errorhandler(404)
@@ -836,9 +2032,50 @@ def create_app():
 
     # ==================== 语音合成API路由 ====================
 
+    def stream_speech(text, chunks, lang, gender, speed, username):
+        """以SSE按顺序推送各块音频，最后推送拼接后的完整音频"""
+        yield sse_event('start', {'chunks': len(chunks), 'language': lang, 'gender': gender, 'speed': speed})
+        results = []
+        try:
+            for index, result in iter_speech_chunks(chunks, lang, gender, speed):
+                results.append(result)
+                yield sse_event('chunk', {
+                    'index': index,
+                    'text': chunks[index][0],
+                    'audio_url': result['audio_url'],
+                    'duration': result.get('duration'),
+                    'cached': result.get('cached', False),
+                })
+        except Exception as e:
+            logger.error(f"流式语音合成异常: {e}", exc_info=True)
+            yield sse_event('error', {'success': False, 'message': f'语音合成失败: {e}'})
+            return
+
+        try:
+            merged = merge_speech(text, lang, gender, speed, results)
+        except Exception as e:
+            logger.warning(f"语音拼接失败: {e}")
+            merged = {'audio_url': None, 'duration': sum(result.get('duration') or 0 for result in results)}
+        logger.info(f"流式语音合成: 用户={username}, 语言={lang}, 字符数={len(text)}, 分块={len(chunks)}")
+        yield sse_event('done', {
+            'success': True,
+            'audio_url': merged['audio_url'],
+            'duration': merged['duration'],
+            'format': results[0].get('format', 'mp3'),
+            'playlist': [
+                {'index': index, 'audio_url': result['audio_url'], 'duration': result.get('duration')}
+                for index, result in enumerate(results)
+            ],
+            'timestamp': datetime.now().isoformat()
+        })
+
     @app.route('/api/voice/synthesize', methods=['POST'])
     def voice_synthesize():
-        """语音合成API接口"""
+        """语音合成API接口
+
+        超过 TTS_CHUNK_CHARS 的文本按句切块并发合成：返回各块音频组成的 playlist 与拼接后的完整音频；
+        stream=true 时以 SSE 按顺序推送每块音频（start / chunk / done / error），第一块合成完即可开始播放。
+        """
         try:
             # 检查用户是否登录
             if 'user_id' not in session:
@@ -864,15 +2101,15 @@ def create_app():
                 }), 400
 
             # 限制文本长度
-            if len(text) > 1500:
+            if len(text) > config.TTS_MAX_TEXT_LENGTH:
                 return jsonify({
                     'success': False,
-                    'message': '文本过长，请限制在1500字符以内',
+                    'message': f'文本过长，请限制在{config.TTS_MAX_TEXT_LENGTH}字符以内',
                     'code': 400
                 }), 400
 
             # 获取语音服务
-            voice_service = get_voice_service()
+            voice_service = get_tts_service()
 
             if not voice_service.is_available():
                 return jsonify({
@@ -881,12 +2118,46 @@ def create_app():
                     'code': 503
                 }), 503
 
+            # 长文本按句切块；全文已有缓存时直接返回
+            chunks = [(text, '')]
+            if len(text) > config.TTS_CHUNK_CHARS:
+                cached = get_audio_cache().lookup(tts_cache_key(text, lang, gender, speed)) if config.TTS_CACHE_ENABLED else None
+                if cached is None:
+                    chunks = group_sentences(split_sentences(text), config.TTS_CHUNK_CHARS)
+
+            if str(data.get('stream', '')).lower() in ('1', 'true', 'on', 'yes'):
+                return Response(
+                    stream_with_context(stream_speech(text, chunks, lang, gender, speed, session.get('username'))),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+                )
+
             # 调用语音合成服务
-            result = voice_service.text_to_speech(text, lang, gender, speed)
+            playlist = []
+            if len(chunks) == 1:
+                result = synthesize_speech(text, lang, gender, speed)
+            else:
+                results = [chunk_result for _, chunk_result in iter_speech_chunks(chunks, lang, gender, speed)]
+                playlist = [
+                    {'index': index, 'audio_url': chunk_result['audio_url'], 'duration': chunk_result.get('duration')}
+                    for index, chunk_result in enumerate(results)
+                ]
+                try:
+                    result = merge_speech(text, lang, gender, speed, results)
+                except Exception as e:
+                    # 拼接失败时仍可按 playlist 顺序播放
+                    logger.warning(f"语音拼接失败: {e}")
+                    result = {
+                        'success': True,
+                        'message': '语音合成成功，完整音频拼接失败，请按分块顺序播放',
+                        'audio_url': None,
+                        'duration': sum(item['duration'] or 0 for item in playlist),
+                        'format': results[0].get('format', 'mp3'),
+                    }
 
             if result['success']:
                 # 记录使用日志
-                logger.info(f"语音合成: 用户={session.get('username')}, 语言={lang}, 字符数={len(text)}")
+                logger.info(f"语音合成: 用户={session.get('username')}, 语言={lang}, 字符数={len(text)}, 分块={len(chunks)}")
 
                 return jsonify({
                     'success': True,
@@ -894,6 +2165,8 @@ def create_app():
                     'audio_url': result['audio_url'],
                     'duration': result['duration'],
                     'format': result.get('format', 'mp3'),
+                    'cached': result.get('cached', False),
+                    'playlist': playlist,
                     'language': lang,
                     'gender': gender,
                     'speed': speed,
@@ -910,6 +2183,12 @@ def create_app():
                     'code': 500
                 }), 500
 
+        except RateLimitTimeout as e:
+            logger.warning(f"语音合成请求排队超时: {e}")
+            return jsonify({'success': False, 'message': '语音合成服务繁忙，请稍后重试', 'code': 503}), 503
+        except RuntimeError as e:
+            logger.error(f"分块语音合成失败: {e}")
+            return jsonify({'success': False, 'message': str(e), 'code': 500}), 500
         except Exception as e:
             logger.error(f"语音合成API异常: {str(e)}", exc_info=True)
             return jsonify({
@@ -922,7 +2201,7 @@ def create_app():
     def get_voice_languages():
         """获取支持的语音语言列表"""
         try:
-            voice_service = get_voice_service()
+            voice_service = get_tts_service()
             languages = voice_service.get_supported_languages()
 
             # 转换为前端需要的格式
@@ -954,7 +2233,7 @@ def create_app():
                 'robot': {'name': '机器人', 'description': '电子音色'}
             }
 
-            voice_service = get_voice_service()
+            voice_service = get_tts_service()
 
             return jsonify({
                 'success': True,
@@ -973,7 +2252,7 @@ def create_app():
     def test_voice_service():
         """测试语音合成服务状态"""
         try:
-            voice_service = get_voice_service()
+            voice_service = get_tts_service()
 
             if not voice_service.is_available():
                 return jsonify({
@@ -984,13 +2263,13 @@ def create_app():
                     'timestamp': datetime.now().isoformat()
                 }), 503
 
-            # 尝试合成一个测试文本
+            # 尝试合成一个测试文本（启用缓存时命中已有音频，不重复调用合成接口）
             test_text = "这是一个语音合成测试。"
-            test_result = voice_service.text_to_speech(test_text, lang='zh', gender='female', speed=1.0)
+            test_result = synthesize_speech(test_text, 'zh', 'female', 1.0)
 
             if test_result['success']:
-                # 删除测试文件
-                if os.path.exists(test_result['filepath']):
+                if not config.TTS_CACHE_ENABLED and os.path.exists(test_result['filepath']):
+                    # 未启用缓存时删除测试文件
                     os.remove(test_result['filepath'])
 
                 return jsonify({
@@ -998,6 +2277,7 @@ def create_app():
                     'service': '腾讯云TTS',
                     'status': '服务正常',
                     'message': '语音合成测试成功',
+                    'cached': test_result.get('cached', False),
                     'timestamp': datetime.now().isoformat()
                 })
             else:
@@ -1033,60 +2313,182 @@ def create_app():
             if audio_file.filename == '':
                 return jsonify({'success': False, 'message': '请选择有效的音频文件'}), 400
 
-            # 保存上传文件
-            upload_folder = 'static/uploads/audio'
-            os.makedirs(upload_folder, exist_ok=True)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"stt_{timestamp}_{audio_file.filename}"
-            filepath = os.path.join(upload_folder, filename)
-            audio_file.save(filepath)
-
-            # 调用语音识别
-            speech_service = get_speech_recognition_service()
-            result = speech_service.transcribe(filepath)
-
-            # 清理原始文件
             try:
-                os.remove(filepath)
-            except OSError:
-                pass
+                options = request_asr_options()
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e), 'code': 400}), 400
+
+            # 调用语音识别（能直接提交的音频不落盘；cache=0 时跳过结果缓存）
+            result = transcribe_upload(audio_file, request_allows_cache(), **options)
 
             status_code = 200 if result.get('success') else 500
             return jsonify(result), status_code
+        except RateLimitTimeout as e:
+            logger.warning(f"语音识别请求排队超时: {e}")
+            return jsonify({'success': False, 'message': '语音识别服务繁忙，请稍后重试', 'code': 503}), 503
         except Exception as e:
             logger.error(f"语音转文本失败: {e}", exc_info=True)
             return jsonify({'success': False, 'message': '语音转文本失败'}), 500
 
     @app.route('/api/speech-to-text/batch', methods=['POST'])
     def speech_to_text_batch():
-        """批量语音转文本，支持多文件"""
+        """批量语音转文本，支持多文件
+
+        各文件在有界线程池中并发识别（调用仍经过语音识别限流闸门），结果保持上传顺序并附带
+        排队与识别耗时；提交识别 ASR_BATCH_ITEM_TIMEOUT 秒后仍未完成的文件记为超时。
+        """
         try:
             if 'user_id' not in session:
                 return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
             files = request.files.getlist('audios')
             if not files:
                 return jsonify({'success': False, 'message': '请上传音频文件'}), 400
+            if len(files) > config.ASR_BATCH_MAX_FILES:
+                return jsonify({
+                    'success': False,
+                    'message': f'单次最多识别{config.ASR_BATCH_MAX_FILES}个文件',
+                    'code': 400
+                }), 400
+
+            try:
+                options = request_asr_options()
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e), 'code': 400}), 400
+
+            batch_started = time.monotonic()
+            use_cache = request_allows_cache()
+            started = {}
+
+            def transcribe(index, file):
+                started[index] = time.monotonic()
+                return transcribe_upload(file, use_cache, **options)
+
+            executor = get_executor('asr', config.ASR_BATCH_WORKERS)
+            futures = {
+                executor.submit(transcribe, index, file): index
+                for index, file in enumerate(files) if file.filename
+            }
+            outcomes = collect_with_timeouts(
+                futures, started, config.ASR_BATCH_ITEM_TIMEOUT, '语音识别服务繁忙，请稍后重试', '批量语音识别'
+            )
+
             results = []
-            speech_service = get_speech_recognition_service()
-            upload_folder = 'static/uploads/audio'
-            os.makedirs(upload_folder, exist_ok=True)
-            for file in files:
-                if not file.filename:
+            for index, file in enumerate(files):
+                if index not in outcomes:
                     results.append({'filename': '', 'success': False, 'message': '文件名无效'})
                     continue
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filepath = os.path.join(upload_folder, f"stt_{timestamp}_{file.filename}")
-                file.save(filepath)
-                result = speech_service.transcribe(filepath)
+                outcome = outcomes[index]
+                results.append({
+                    'filename': file.filename,
+                    **outcome,
+                    'timed_out': outcome.get('timed_out', False),
+                    'queued_ms': round((started[index] - batch_started) * 1000) if index in started else None,
+                })
+
+            success_count = sum(1 for entry in results if entry['success'])
+            elapsed_ms = round((time.monotonic() - batch_started) * 1000)
+            logger.info(
+                f"批量语音识别完成: 用户={session.get('username')}, 文件数={len(files)}, "
+                f"成功={success_count}, 耗时={elapsed_ms}ms"
+            )
+            return jsonify({
+                'success': True,
+                'count': len(results),
+                'success_count': success_count,
+                'elapsed_ms': elapsed_ms,
+                'results': results
+            })
+        except Exception as e:
+            logger.error(f"批量语音转文本失败: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': '批量语音转文本失败'}), 500
+
+    @app.route('/api/speech-to-text/long', methods=['POST'])
+    def speech_to_text_long():
+        """长音频转文本：按静音切分为不超过 ASR_LONG_SEGMENT_SECONDS 秒的片段并发识别
+
+        返回完整文本与各片段的起止时间；stream=1 时以 SSE 按时间顺序推送各片段
+        （plan / segment / done / error），segment 事件附带截至当前的部分文本。
+        """
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+        audio_file = request.files.get('audio')
+        if audio_file is None or not audio_file.filename:
+            return jsonify({'success': False, 'message': '请上传音频文件', 'code': 400}), 400
+
+        try:
+            options = request_asr_options()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e), 'code': 400}), 400
+        # 各片段均为16kHz单声道WAV
+        engine = resolve_engine(options['engine'], options['lang'], SEGMENT_SAMPLE_RATE)
+
+        def transcribe(data, voice_format):
+            return transcribe_audio_bytes(data, voice_format, engine)
+
+        username = session.get('username', '用户')
+        # 解码需要ffmpeg读取文件，长音频先写入临时文件
+        upload_folder = 'static/uploads/audio'
+        os.makedirs(upload_folder, exist_ok=True)
+        fd, filepath = tempfile.mkstemp(dir=upload_folder, prefix='stt_long_', suffix=os.path.splitext(audio_file.filename)[1])
+        with os.fdopen(fd, 'wb') as f:
+            audio_file.stream.seek(0)
+            shutil.copyfileobj(audio_file.stream, f, 1024 * 1024)
+
+        def events():
+            started = time.monotonic()
+            parts, segments = [], []
+            try:
+                for event, data in iter_long_audio(filepath, transcribe):
+                    if event == 'segment':
+                        parts.append(data['text'])
+                        segments.append(data)
+                        data = dict(data, partial=join_fragments(parts))
+                    yield event, data
+            finally:
                 try:
                     os.remove(filepath)
                 except OSError:
                     pass
-                results.append({'filename': file.filename, **result})
-            return jsonify({'success': True, 'results': results})
+            failed = sum(1 for segment in segments if not segment['success'])
+            elapsed_ms = round((time.monotonic() - started) * 1000)
+            logger.info(f"长音频识别完成: 用户={username}, 片段={len(segments)}, 失败={failed}, 耗时={elapsed_ms}ms")
+            yield 'done', {
+                'success': bool(segments) and failed < len(segments),
+                'message': '识别成功' if not failed else f'识别完成，{failed}个片段失败',
+                'text': join_fragments(parts),
+                'segments': segments,
+                'failed_segments': failed,
+                'elapsed_ms': elapsed_ms,
+            }
+
+        if str(request.form.get('stream', '')).lower() in ('1', 'true', 'on', 'yes'):
+            def generate():
+                try:
+                    for event, data in events():
+                        yield sse_event(event, data)
+                except Exception as e:
+                    logger.error(f"长音频识别异常: {e}", exc_info=True)
+                    yield sse_event('error', {'success': False, 'message': f'语音识别失败: {e}'})
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        try:
+            result = None
+            for event, data in events():
+                if event == 'plan':
+                    duration = data['duration']
+                elif event == 'done':
+                    result = dict(data, duration=duration)
+            return jsonify(result), 200 if result['success'] else 500
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e), 'code': 400}), 400
         except Exception as e:
-            logger.error(f"批量语音转文本失败: {e}", exc_info=True)
-            return jsonify({'success': False, 'message': '批量语音转文本失败'}), 500
+            logger.error(f"长音频识别异常: {e}", exc_info=True)
+            return jsonify({'success': False, 'message': f'语音识别失败: {e}', 'code': 500}), 500
 
     # ==================== 翻译历史记录批量删除路由 ====================
 
@@ -1096,6 +2498,7 @@ def create_app():
         try:
             if 'user_id' not in session:
                 return jsonify({'success': False, 'message': '请先登录', 'code': 401}), 401
+            history_writer.flush()
             data = request.get_json(silent=True) or {}
             ids = data.get('ids', [])
             if not isinstance(ids, list) or not ids:
@@ -1111,6 +2514,18 @@ def create_app():
             logger.error(f"批量删除历史失败: {e}", exc_info=True)
             return jsonify({'success': False, 'message': f'删除失败: {e}', 'code': 500}), 500
 
+    # 后台预热各云服务，避免首个请求承担SDK导入、客户端创建与TLS握手的开销；
+    # 客户端池只在语音识别服务未提供字节数据接口、由本应用直接调用SDK时才会用到，仅此时预建客户端
+    if config.CLIENT_POOL_WARMUP:
+        start_warm_up({
+            'ocr': get_ocr_service,
+            'translate': get_translation_service,
+            'tts': get_tts_service,
+            'asr': get_speech_recognition_service,
+        }, pooled={
+            'asr': lambda service: not accepts_audio_bytes(service),
+        })
+
     return app
 
 
@@ -1137,9 +2552,14 @@ if __name__ == '__main__':
     print("  📷 OCR相关:")
     print("    POST /api/ocr/recognize - 图片文字识别")
     print("    POST /api/ocr/recognize/batch - 批量图片文字识别")
+    print("    POST /api/ocr/recognize/pdf - PDF逐页识别（SSE）")
     print("    GET  /api/ocr/test      - OCR服务测试")
     print("  🌐 翻译相关:")
     print("    POST /api/translate      - 文本翻译")
+    print("    POST /api/translate/batch - 批量文本翻译")
+    print("    POST /api/translate/stream - 流式翻译(SSE)")
+    print("    GET  /api/translate/cache/stats - 翻译缓存统计")
+    print("    DELETE /api/translate/cache - 清除翻译缓存")
     print("    GET  /api/translate/history - 翻译历史")
     print("    GET  /api/translate/history/<id> - 历史详情")
     print("    DELETE /api/translate/history/<id> - 删除历史")
@@ -1153,6 +2573,15 @@ if __name__ == '__main__':
     print("  🎤 语音识别相关:")
     print("    POST /api/speech-to-text   - 语音转文本")
     print("    POST /api/speech-to-text/batch - 批量语音转文本")
+    print("    POST /api/speech-to-text/long - 长音频转文本（支持SSE）")
+    print("  📖 术语表:")
+    print("    GET  /api/glossary         - 获取术语表")
+    print("    POST /api/glossary         - 新增/导入术语")
+    print("    DELETE /api/glossary/<id>  - 删除术语")
+    print("  🔗 组合流水线:")
+    print("    POST /api/pipeline         - 识别→翻译→语音合成（可选SSE）")
+    print("  📊 系统状态:")
+    print("    GET  /api/system/stats     - 运行统计")
     print("  🌐 页面路由:")
     print("    GET  /                 - 首页(重定向到登录)")
     print("    GET  /register         - 注册页面")
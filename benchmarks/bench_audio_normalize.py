@@ -0,0 +1,116 @@
+# benchmarks/bench_audio_normalize.py
+"""音频规范化基准：对比浏览器原始录音与规范化后（16kHz单声道、裁静音、统一响度）的上传字节数与识别耗时
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_audio_normalize.py                 # 模拟识别耗时
+    python benchmarks/bench_audio_normalize.py --format mp3    # 规范化输出为mp3（需要ffmpeg）
+    python benchmarks/bench_audio_normalize.py --asr           # 调用语音识别服务实测（需要腾讯云凭证）
+
+测试音频由固定随机种子生成：48kHz立体声WAV，语音段用调制的正弦波与噪声模拟，首尾带有静音，
+响度各不相同。模拟模式下识别耗时按 --latency-ms + base64上传字节数/带宽 + 音频时长×--rtf 估算。
+"""
+import argparse
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from pydub import AudioSegment  # noqa: E402
+from pydub.generators import Sine, WhiteNoise  # noqa: E402
+
+from config import config  # noqa: E402
+from services.audio_normalize import normalize_audio  # noqa: E402
+
+
+def make_clip(rng, speech_seconds, lead_ms, tail_ms, gain_db):
+    """生成一段模拟录音：若干“音节”（正弦波+噪声）之间夹短停顿，首尾为低电平底噪"""
+    speech = AudioSegment.silent(0, frame_rate=48000)
+    while len(speech) < speech_seconds * 1000:
+        syllable = rng.randint(120, 320)
+        tone = Sine(rng.randint(140, 320), sample_rate=48000).to_audio_segment(syllable, volume=-12)
+        noise = WhiteNoise(sample_rate=48000).to_audio_segment(syllable, volume=-30)
+        speech += tone.overlay(noise).fade_in(20).fade_out(40)
+        speech += AudioSegment.silent(rng.choice((40, 60, 80, 250)), frame_rate=48000)
+    floor = WhiteNoise(sample_rate=48000).to_audio_segment(1000, volume=-65)
+    clip = (floor * (lead_ms // 1000 + 1))[:lead_ms] + speech + (floor * (tail_ms // 1000 + 1))[:tail_ms]
+    return clip.apply_gain(gain_db).set_channels(2).set_frame_rate(48000)
+
+
+def make_corpus(seed=11):
+    rng = random.Random(seed)
+    cases = [
+        ('短语音指令', 3, 1500, 2000, -8),
+        ('语音便签', 12, 2500, 3000, -18),
+        ('轻声录音', 20, 800, 1200, -28),
+        ('长段口述', 45, 3000, 4000, 0),
+    ]
+    corpus = []
+    for name, seconds, lead, tail, gain in cases:
+        buffer = io.BytesIO()
+        make_clip(rng, seconds, lead, tail, gain).export(buffer, format='wav')
+        corpus.append((name, buffer.getvalue()))
+    return corpus
+
+
+def modeled_ms(size, duration, args):
+    return args.latency_ms + size * 4 / 3 / (args.uplink_mbps * 1e6 / 8) * 1000 + duration * args.rtf * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--format', choices=('wav', 'mp3'), default=config.ASR_NORMALIZE_FORMAT)
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='模拟单次识别调用的固定耗时')
+    parser.add_argument('--uplink-mbps', type=float, default=10.0)
+    parser.add_argument('--rtf', type=float, default=0.05, help='模拟识别的实时率（处理耗时/音频时长）')
+    parser.add_argument('--asr', action='store_true', help='调用语音识别服务实测')
+    args = parser.parse_args()
+    config.ASR_NORMALIZE_FORMAT = args.format
+
+    if args.asr:
+        from services.asr_bytes import transcribe_from_bytes
+
+    print("=" * 100)
+    print(f"规范化输出: {args.format}  目标响度 {config.ASR_NORMALIZE_TARGET_DBFS} dBFS")
+    print(f"{'音频':<12}{'原始字节':>12}{'原始时长':>9}{'规范化字节':>12}{'压缩比':>8}"
+          f"{'裁掉静音':>10}{'增益':>8}{'转码CPU':>10}{'识别(前)':>11}{'识别(后)':>11}")
+    print("-" * 100)
+    totals = [0, 0, 0.0, 0.0]
+    for name, data in make_corpus():
+        original = AudioSegment.from_wav(io.BytesIO(data))
+        started = time.perf_counter()
+        normalized = normalize_audio(data, 'clip.wav')
+        cpu_ms = (time.perf_counter() - started) * 1000
+
+        if args.asr:
+            started = time.perf_counter()
+            transcribe_from_bytes(data, 'wav')
+            before_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            transcribe_from_bytes(normalized['data'], normalized['format'])
+            after_ms = (time.perf_counter() - started) * 1000 + cpu_ms
+        else:
+            before_ms = modeled_ms(len(data), len(original) / 1000, args)
+            after_ms = modeled_ms(normalized['bytes'], normalized['duration'], args) + cpu_ms
+
+        totals[0] += len(data)
+        totals[1] += normalized['bytes']
+        totals[2] += before_ms
+        totals[3] += after_ms
+        print(f"{name:<10}{len(data):>14,}{len(original) / 1000:>9.1f}s{normalized['bytes']:>12,}"
+              f"{len(data) / normalized['bytes']:>7.1f}x{normalized['trimmed_ms']:>8}ms{normalized['gain_db']:>+7.1f}dB"
+              f"{cpu_ms:>8.0f}ms{before_ms:>9.0f}ms{after_ms:>9.0f}ms")
+    print("-" * 100)
+    print(f"{'合计':<10}{totals[0]:>14,}{'':>10}{totals[1]:>12,}{totals[0] / totals[1]:>7.1f}x"
+          f"{'':>36}{totals[2]:>9.0f}ms{totals[3]:>9.0f}ms")
+    mode = '语音识别服务实测' if args.asr else (
+        f'模拟识别，单次 {args.latency_ms:g}ms + {args.uplink_mbps:g} Mbps 上传 + 时长×{args.rtf:g}')
+    print(f"识别耗时: {mode}；规范化后的耗时包含转码CPU时间")
+    print("=" * 100)
+
+
+if __name__ == '__main__':
+    main()
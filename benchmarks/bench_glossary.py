@@ -0,0 +1,121 @@
+# benchmarks/bench_glossary.py
+"""术语匹配基准：校验增量维护的自动机与全量构建一致，并统计大词表下的匹配耗时
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_glossary.py [--entries 20000]
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from services.glossary import AhoCorasick, select_matches  # noqa: E402
+
+# 增量新增的词条是已有词条的前缀或中缀，不产生新节点（曾因此未重算输出链接而漏匹配）
+INCREMENTAL_CASES = [
+    (
+        [('cloud storage', '云存储'), ('tencent cloud service', '腾讯云服务')],
+        [('cloud', '云')],
+        ['Tencent Cloud is fast', 'cloud storage and tencent cloud service'],
+    ),
+    (
+        [('machine learning platform', '机器学习平台')],
+        [('learning', '学习'), ('machine', '机器')],
+        ['Machine learning is everywhere', 'a learning machine'],
+    ),
+    (
+        [('对象存储服务', 'Object Storage Service')],
+        [('存储', 'Storage'), ('对象存储', 'Object Storage')],
+        ['使用对象存储上传文件', '存储桶'],
+    ),
+]
+
+
+def build(entries):
+    automaton = AhoCorasick()
+    for term, translation in entries:
+        automaton.add(term, translation)
+    return automaton
+
+
+def check_incremental():
+    """先构建并匹配（完成链接），再增量加入、删除后重新加入词条，结果须与全量构建一致"""
+    failures = 0
+    for initial, added, texts in INCREMENTAL_CASES:
+        incremental = build(initial)
+        incremental.iter_matches(texts[0])
+        for term, translation in added:
+            incremental.add(term, translation)
+        for text in texts:
+            incremental.iter_matches(text)
+        term, translation = added[0]
+        incremental.remove(term)
+        incremental.iter_matches(texts[0])
+        incremental.add(term, translation)
+
+        fresh = build(initial + added)
+        for text in texts:
+            expected = sorted(fresh.iter_matches(text))
+            actual = sorted(incremental.iter_matches(text))
+            status = 'OK ' if actual == expected else 'ERR'
+            if actual != expected:
+                failures += 1
+            print(f"  {status} {text!r}: {select_matches(text, actual)}")
+            if actual != expected:
+                print(f"      期望: {select_matches(text, expected)}")
+    return failures
+
+
+def random_term(rng):
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+             for _ in range(rng.randint(1, 3))]
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=20000, help='大词表的词条数')
+    parser.add_argument('--rounds', type=int, default=200, help='每种文本的匹配次数')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("增量维护一致性")
+    print("-" * 60)
+    failures = check_incremental()
+
+    rng = random.Random(42)
+    entries = [(random_term(rng), f'T{i}') for i in range(args.entries)]
+    started = time.perf_counter()
+    automaton = build(entries)
+    automaton.iter_matches('')
+    build_ms = (time.perf_counter() - started) * 1000
+
+    print("-" * 60)
+    print(f"词条数: {automaton.size:,}，构建 {build_ms:.0f}ms")
+    for length in (200, 2000, 20000):
+        words = [rng.choice(entries)[0] if rng.random() < 0.05 else random_term(rng) for _ in range(length // 8)]
+        text = ' '.join(words)[:length]
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            matches = automaton.iter_matches(text)
+        elapsed = (time.perf_counter() - started) / args.rounds
+        print(f"  文本 {len(text):>6} 字符: {elapsed * 1e6:9.1f} µs/次，匹配 {len(matches)} 处")
+
+    started = time.perf_counter()
+    for i in range(10):
+        automaton.add(f'incremental term {i}', f'I{i}')
+        automaton.iter_matches('incremental')
+    print(f"  增量新增词条并重新链接: {(time.perf_counter() - started) * 100:.1f} ms/条")
+    print("=" * 60)
+    if failures:
+        print(f"增量维护与全量构建不一致: {failures} 处")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
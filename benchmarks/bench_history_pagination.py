@@ -0,0 +1,150 @@
+# benchmarks/bench_history_pagination.py
+"""历史记录分页基准：在百万级合成历史上对比 OFFSET 页码分页与 (created_at, id) 键集游标分页
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_history_pagination.py                  # 100万条
+    python benchmarks/bench_history_pagination.py --rows 200000 --limit 50
+
+在临时SQLite文件中按 models.py 建表，写入合成记录（固定随机种子），再安装计数触发器与索引。
+页码分页 = Flask-SQLAlchemy paginate 的 OFFSET 查询 + COUNT(*)；
+键集分页 = 从上一页最后一条记录的游标继续查询 + 读取触发器维护的计数。两者查询语句与接口一致。
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from models import db  # noqa: E402
+from services.history_pages import HistoryCounter, decode_cursor, encode_cursor  # noqa: E402
+
+USER_ID = 1
+OPERATION_TYPE = 'translate'
+COLUMNS = ('id, user_id, original_text, source_lang, target_lang, translated_text, '
+           'operation_type, image_path, confidence, created_at')
+
+OFFSET_SQL = (f"SELECT {COLUMNS} FROM translation_history WHERE user_id = ? AND operation_type = ? "
+              "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?")
+COUNT_SQL = "SELECT COUNT(*) FROM translation_history WHERE user_id = ? AND operation_type = ?"
+KEYSET_SQL = (f"SELECT {COLUMNS} FROM translation_history WHERE user_id = ? AND operation_type = ? "
+              "AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?")
+
+
+def populate(path, rows, seed=3):
+    """写入合成历史：90% 属于被测用户，类型按 80% translate / 15% ocr / 5% tts 分布，时间单调递增"""
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, username, qq_email, password) VALUES (1, 'bench', 'b@x', 'x'), "
+                 "(2, 'other', 'o@x', 'x')")
+    now = datetime(2023, 1, 1)
+    batch = []
+    for history_id in range(1, rows + 1):
+        now += timedelta(seconds=rng.choice((0, 0, 1, 2, 5, 30)))  # 同一秒内多条，检验 id 作为次序键
+        user_id = USER_ID if rng.random() < 0.9 else 2
+        operation_type = rng.choices(('translate', 'ocr', 'tts'), (80, 15, 5))[0]
+        text = f'synthetic history {history_id}'
+        batch.append((history_id, user_id, text, 'zh', 'en', text.upper(), operation_type,
+                      now.strftime('%Y-%m-%d %H:%M:%S')))
+        if len(batch) >= 50000:
+            conn.executemany("INSERT INTO translation_history (id, user_id, original_text, source_lang, target_lang, "
+                             "translated_text, operation_type, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO translation_history (id, user_id, original_text, source_lang, target_lang, "
+                         "translated_text, operation_type, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_history_')
+    path = os.path.join(directory, 'history.db')
+    try:
+        started = time.perf_counter()
+        populate(path, args.rows)
+        populate_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        counter = HistoryCounter(db_path=path)
+        install_s = time.perf_counter() - started
+
+        conn = sqlite3.connect(path)
+        total = conn.execute(COUNT_SQL, (USER_ID, OPERATION_TYPE)).fetchone()[0]
+        assert counter.count(USER_ID, OPERATION_TYPE) == total
+
+        plan = conn.execute("EXPLAIN QUERY PLAN " + KEYSET_SQL, (USER_ID, OPERATION_TYPE, '', 0, args.limit + 1))
+        print("=" * 84)
+        print(f"合成记录 {args.rows:,} 条（写入 {populate_s:.1f}s），被测用户 {OPERATION_TYPE} 记录 {total:,} 条")
+        print(f"安装计数触发器、索引并重建计数: {install_s * 1000:.0f}ms")
+        print("键集查询计划: " + '; '.join(row[-1] for row in plan))
+        print(f"{'翻页深度（条）':<14}{'OFFSET':>12}{'COUNT(*)':>12}{'页码合计':>12}{'键集游标':>12}{'计数表':>10}{'键集合计':>12}")
+        print("-" * 84)
+
+        depths = sorted({0, 1_000, 10_000, 100_000, total // 2, max(total - args.limit, 0)})
+        for depth in depths:
+            if depth >= total:
+                continue
+            # 游标取自上一页最后一条记录，与接口返回的 next_cursor 相同
+            cursor = None
+            if depth:
+                anchor = conn.execute(OFFSET_SQL, (USER_ID, OPERATION_TYPE, 1, depth - 1)).fetchone()
+                cursor = encode_cursor(anchor[-1], anchor[0])
+
+            offset_ms = timed(lambda: conn.execute(OFFSET_SQL, (USER_ID, OPERATION_TYPE, args.limit + 1, depth)).fetchall(),
+                              args.repeat)
+            count_ms = timed(lambda: conn.execute(COUNT_SQL, (USER_ID, OPERATION_TYPE)).fetchone(), args.repeat)
+
+            def keyset():
+                if cursor is None:
+                    return conn.execute(OFFSET_SQL, (USER_ID, OPERATION_TYPE, args.limit + 1, 0)).fetchall()
+                created_at, after_id = decode_cursor(cursor)
+                return conn.execute(KEYSET_SQL, (USER_ID, OPERATION_TYPE, created_at, after_id, args.limit + 1)).fetchall()
+
+            keyset_ms = timed(keyset, args.repeat)
+            counter_ms = timed(lambda: counter.count(USER_ID, OPERATION_TYPE), args.repeat)
+            assert [row[0] for row in keyset()] == [
+                row[0] for row in conn.execute(OFFSET_SQL, (USER_ID, OPERATION_TYPE, args.limit + 1, depth))
+            ]
+            print(f"{depth:<18,}{offset_ms:>10.2f}ms{count_ms:>10.2f}ms{offset_ms + count_ms:>10.2f}ms"
+                  f"{keyset_ms:>10.2f}ms{counter_ms:>8.3f}ms{keyset_ms + counter_ms:>10.2f}ms")
+        print("-" * 84)
+        print(f"每页 {args.limit} 条，取 {args.repeat} 次中位数；键集分页结果与同一位置的 OFFSET 结果逐条一致")
+        print("=" * 84)
+        conn.close()
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_image_preprocess.py
+"""OCR图片预处理基准：对比预处理前后的上传字节数与端到端识别耗时
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_image_preprocess.py                 # 使用生成的示例图片
+    python benchmarks/bench_image_preprocess.py a.jpg b.png     # 使用指定图片
+    python benchmarks/bench_image_preprocess.py --ocr a.jpg     # 同时调用OCR服务测量端到端耗时
+
+未加 --ocr 时按 --uplink-mbps 估算上传耗时（OCR接口以base64提交，数据量约为文件的4/3）。
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from services.image_preprocess import discard_preprocessed, preprocess_image  # noqa: E402
+
+SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog 0123456789 智能文本翻译助手"
+
+
+def make_samples(directory):
+    """生成两张示例图片：带EXIF方向的手机照片与屏幕截图"""
+    rng = random.Random(0)
+
+    photo = Image.new('RGB', (4032, 3024), (214, 200, 170))
+    draw = ImageDraw.Draw(photo)
+    for y in range(0, 3024, 6):
+        shade = rng.randint(-25, 25)
+        draw.line([(0, y), (4032, y)], fill=(214 + shade, 200 + shade, 170 + shade), width=6)
+    for row in range(40):
+        draw.text((200, 200 + row * 64), SAMPLE_TEXT, fill=(30, 30, 40))
+    photo_path = os.path.join(directory, 'phone_photo.jpg')
+    exif = Image.Exif()
+    exif[0x0112] = 6  # 手机竖拍：需顺时针旋转90度
+    photo.save(photo_path, 'JPEG', quality=95, exif=exif)
+
+    screenshot = Image.new('RGB', (2880, 1800), (255, 255, 255))
+    draw = ImageDraw.Draw(screenshot)
+    for row in range(80):
+        draw.text((40, 20 + row * 22), SAMPLE_TEXT * 3, fill=(0, 0, 0))
+    screenshot_path = os.path.join(directory, 'screenshot.png')
+    screenshot.save(screenshot_path, 'PNG')
+
+    return [photo_path, screenshot_path]
+
+
+def measure_ocr(path, rounds):
+    from services.ocr_service import get_ocr_service
+
+    service = get_ocr_service()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        service.recognize_from_path(path)
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', nargs='*', help='待测试的图片，缺省时生成示例图片')
+    parser.add_argument('--ocr', action='store_true', help='调用OCR服务测量端到端耗时')
+    parser.add_argument('--rounds', type=int, default=3, help='每张图片重复次数')
+    parser.add_argument('--uplink-mbps', type=float, default=10.0, help='估算上传耗时使用的上行带宽')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        images = args.images or make_samples(directory)
+
+        print("=" * 78)
+        print(f"{'图片':<22}{'原始字节':>12}{'处理后':>12}{'压缩比':>8}{'预处理':>10}{'处理前':>10}{'处理后':>10}")
+        print("-" * 78)
+        for path in images:
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                prepared = preprocess_image(path)
+                if _ < args.rounds - 1:
+                    discard_preprocessed(prepared)
+            preprocess_ms = (time.perf_counter() - started) / args.rounds * 1000
+
+            if args.ocr:
+                before_ms = measure_ocr(path, args.rounds) * 1000
+                after_ms = measure_ocr(prepared['path'], args.rounds) * 1000 + preprocess_ms
+            else:
+                bytes_per_ms = args.uplink_mbps * 1e6 / 8 / 1000
+                before_ms = prepared['original_bytes'] * 4 / 3 / bytes_per_ms
+                after_ms = prepared['bytes'] * 4 / 3 / bytes_per_ms + preprocess_ms
+
+            ratio = prepared['original_bytes'] / max(prepared['bytes'], 1)
+            print(
+                f"{Path(path).name:<24}{prepared['original_bytes']:>12,}{prepared['bytes']:>12,}{ratio:>9.1f}x"
+                f"{preprocess_ms:>10.0f}ms{before_ms:>8.0f}ms{after_ms:>8.0f}ms"
+            )
+            discard_preprocessed(prepared)
+
+        print("-" * 78)
+        mode = 'OCR服务实测' if args.ocr else f'按 {args.uplink_mbps:g} Mbps 上行估算上传耗时'
+        print(f"端到端耗时: {mode}，处理后耗时包含预处理")
+        print("=" * 78)
+
+
+if __name__ == '__main__':
+    main()
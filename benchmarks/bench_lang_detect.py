@@ -0,0 +1,67 @@
+# benchmarks/bench_lang_detect.py
+"""本地语言识别基准：在自带语料上统计准确率与吞吐量
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_lang_detect.py
+"""
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from services.lang_detect import detect_language  # noqa: E402
+
+CORPUS_PATH = Path(__file__).resolve().parent / 'lang_detect_corpus.tsv'
+
+
+def load_corpus():
+    samples = []
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line:
+                lang, text = line.split('\t', 1)
+                samples.append((lang, text))
+    return samples
+
+
+def main(rounds=200):
+    samples = load_corpus()
+
+    totals = Counter()
+    correct = Counter()
+    confusions = defaultdict(Counter)
+    for lang, text in samples:
+        predicted = detect_language(text)
+        totals[lang] += 1
+        if predicted == lang:
+            correct[lang] += 1
+        else:
+            confusions[lang][predicted] += 1
+
+    print("=" * 60)
+    print(f"语料: {CORPUS_PATH.name}，共 {len(samples)} 条")
+    print("-" * 60)
+    for lang in sorted(totals):
+        wrong = ', '.join(f"{k}×{v}" for k, v in confusions[lang].items()) or '-'
+        print(f"  {lang}: {correct[lang]:>3}/{totals[lang]:<3} 准确率 {correct[lang] / totals[lang]:6.1%}  误判: {wrong}")
+    overall = sum(correct.values()) / len(samples)
+    print(f"  总体准确率: {overall:.1%}")
+
+    texts = [text for _, text in samples]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            detect_language(text)
+    elapsed = time.perf_counter() - started
+    calls = rounds * len(texts)
+    print("-" * 60)
+    print(f"吞吐量: {calls / elapsed:,.0f} 次/秒，平均 {elapsed / calls * 1e6:.1f} µs/次")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# benchmarks/bench_ocr_tiling.py
+"""分块OCR基准：在生成的长截图与大幅海报上对比整图识别与分块识别
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_ocr_tiling.py                          # 模拟识别，调节分块参数
+    python benchmarks/bench_ocr_tiling.py --tile-size 1200 --overlap 120
+    python benchmarks/bench_ocr_tiling.py --ocr                    # 调用OCR服务实测
+
+测试图片由固定随机种子生成（长截图、双栏海报），每行文字的位置与内容已知。
+模拟模式下，识别器只能读出缩放后行高不低于 --min-readable 像素且完整落在图块内的文字行，
+横向被图块截断的行只读出完整落在图块内的字符；耗时按 --latency-ms + 上传字节数/带宽 估算，
+图块按 --workers 并发。
+"""
+import argparse
+import io
+import math
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from PIL import Image, ImageDraw, ImageFont  # noqa: E402
+
+from config import config  # noqa: E402
+from services.ocr_tiler import _encode_tile, merge_detections, plan_tiles  # noqa: E402
+
+
+def random_line(rng, words):
+    return ' '.join(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(words))
+
+
+def make_corpus(seed=7):
+    """生成测试图片的版面：[(名称, 宽, 高, [(x, y, w, h, 文字), ...])]"""
+    rng = random.Random(seed)
+    corpus = []
+    for name, width, height in (('scroll_1080x12000', 1080, 12000), ('scroll_1440x20000', 1440, 20000)):
+        lines, y = [], 40
+        while y < height - 60:
+            words = rng.randint(3, 8)
+            text = random_line(rng, words)
+            lines.append((40, y, min(width - 80, len(text) * 15), 28, text))
+            y += rng.choice((44, 44, 44, 96))  # 段落间距
+        corpus.append((name, width, height, lines))
+
+    width, height = 7000, 9000
+    lines = []
+    for x in (200, 3600):
+        for row in range(100):
+            text = random_line(rng, rng.randint(4, 10))
+            lines.append((x, 300 + row * 84, min(3200, len(text) * 32), 60, text))
+    corpus.append(('poster_7000x9000', width, height, lines))
+    return corpus
+
+
+def render(width, height, lines):
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype('DejaVuSans.ttf', 24)
+    except OSError:
+        font = ImageFont.load_default()
+    for x, y, w, h, text in lines:
+        draw.text((x, y), text, fill=0, font=font)
+    return image
+
+
+def simulate_tile(lines, tile, scale, min_readable):
+    """模拟识别一个区域：返回图块内坐标的检测结果"""
+    tx, ty, tw, th = tile
+    detections = []
+    for x, y, w, h, text in lines:
+        if h * scale < min_readable or y < ty or y + h > ty + th:
+            continue
+        left, right = max(x, tx), min(x + w, tx + tw)
+        if right <= left:
+            continue
+        # 只读出完整落在图块内的字符
+        visible = text[math.ceil(len(text) * (left - x) / w):math.floor(len(text) * (right - x) / w)]
+        if not visible.strip():
+            continue
+        detections.append({'text': visible, 'confidence': 99, 'box': [left - tx, y - ty, right - left, h]})
+    return detections
+
+
+def score(lines, texts):
+    """返回 (召回率, 重复数, 顺序正确率)"""
+    truth = {text: index for index, (_, _, _, _, text) in enumerate(lines)}
+    matched = [truth[t] for t in texts if t in truth]
+    recall = len(set(matched)) / len(lines)
+    duplicates = len(matched) - len(set(matched))
+    in_order = sum(1 for a, b in zip(matched, matched[1:]) if a < b)
+    order = in_order / max(len(matched) - 1, 1)
+    return recall, duplicates, order
+
+
+def upload_ms(size, args):
+    return args.latency_ms + size * 4 / 3 / (args.uplink_mbps * 1e6 / 8) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tile-size', type=int, default=config.OCR_TILE_SIZE)
+    parser.add_argument('--overlap', type=int, default=config.OCR_TILE_OVERLAP)
+    parser.add_argument('--workers', type=int, default=config.OCR_TILE_WORKERS)
+    parser.add_argument('--min-readable', type=float, default=12.0, help='模拟识别可读的最小行高（像素）')
+    parser.add_argument('--latency-ms', type=float, default=400.0, help='模拟单次OCR调用的固定耗时')
+    parser.add_argument('--uplink-mbps', type=float, default=10.0)
+    parser.add_argument('--ocr', action='store_true', help='调用OCR服务实测（需要腾讯云凭证）')
+    args = parser.parse_args()
+
+    print("=" * 96)
+    print(f"分块参数: tile={args.tile_size}px overlap={args.overlap}px workers={args.workers}")
+    print(f"{'图片':<20}{'方式':<8}{'图块':>5}{'召回率':>9}{'重复':>6}{'顺序':>8}{'上传字节':>12}{'CPU':>9}{'耗时':>10}")
+    print("-" * 96)
+    for name, width, height, lines in make_corpus():
+        image = render(width, height, lines)
+
+        # 整图：按 OCR_IMAGE_MAX_EDGE 缩放后一次识别
+        started = time.perf_counter()
+        scale = min(1.0, config.OCR_IMAGE_MAX_EDGE / max(width, height))
+        single = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.LANCZOS)
+        single_bytes = _encode_tile(single, config.OCR_IMAGE_MAX_BYTES)
+        single_cpu = (time.perf_counter() - started) * 1000
+
+        # 分块：按图块裁剪编码，合并检测结果
+        tiles = plan_tiles(width, height, args.tile_size, args.overlap)
+        started = time.perf_counter()
+        tile_bytes = [len(_encode_tile(image.crop((x, y, x + w, y + h)), config.OCR_IMAGE_MAX_BYTES)) for x, y, w, h in tiles]
+        encode_cpu = (time.perf_counter() - started) * 1000
+
+        if args.ocr:
+            from services.ocr_bytes import recognize_bytes
+            from services.ocr_service import get_ocr_service
+            from services.ocr_tiler import recognize_tiled
+
+            ocr_service = get_ocr_service()
+
+            def recognize_from_bytes(data):
+                return recognize_bytes(ocr_service, data)
+
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG')
+            started = time.perf_counter()
+            single_result = recognize_from_bytes(single_bytes)
+            single_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            tiled_result = recognize_tiled(io.BytesIO(buffer.getvalue()), recognize_from_bytes,
+                                           args.tile_size, args.overlap, args.workers)
+            tiled_ms = (time.perf_counter() - started) * 1000
+            single_texts = [d['text'] for d in single_result.get('detections', [])]
+            tiled_texts = [d['text'] for d in tiled_result.get('detections', [])]
+            merge_cpu = 0.0
+        else:
+            single_texts = [d['text'] for d in simulate_tile(lines, (0, 0, width, height), scale, args.min_readable)]
+            tile_results = [(tile, simulate_tile(lines, tile, 1.0, args.min_readable)) for tile in tiles]
+            started = time.perf_counter()
+            merged = merge_detections(tile_results)
+            merge_cpu = (time.perf_counter() - started) * 1000
+            tiled_texts = [d['text'] for d in merged]
+            single_ms = single_cpu + upload_ms(len(single_bytes), args)
+            rounds = math.ceil(len(tiles) / args.workers)
+            slowest = max(upload_ms(size, args) for size in tile_bytes)
+            tiled_ms = encode_cpu + merge_cpu + rounds * slowest
+
+        for label, count, texts, payload, cpu, elapsed in (
+            ('整图', 1, single_texts, len(single_bytes), single_cpu, single_ms),
+            ('分块', len(tiles), tiled_texts, sum(tile_bytes), encode_cpu + merge_cpu, tiled_ms),
+        ):
+            recall, duplicates, order = score(lines, texts)
+            print(f"{name if label == '整图' else '':<22}{label:<8}{count:>5}{recall:>10.1%}{duplicates:>6}"
+                  f"{order:>9.1%}{payload:>12,}{cpu:>8.0f}ms{elapsed:>8.0f}ms")
+    print("-" * 96)
+    mode = 'OCR服务实测' if args.ocr else f'模拟识别，单次 {args.latency_ms:g}ms + {args.uplink_mbps:g} Mbps 上传'
+    print(f"耗时: {mode}")
+    print("=" * 96)
+
+
+if __name__ == '__main__':
+    main()
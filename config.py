@@ -27,5 +27,143 @@ class Config:
     MAX_EMAIL_LENGTH = 100
     MIN_PASSWORD_LENGTH = 6
 
+    # 翻译结果缓存
+    TRANSLATION_CACHE_ENABLED = True
+    TRANSLATION_CACHE_SIZE = 2048  # 内存LRU最大条目数
+    TRANSLATION_CACHE_TTL = 7 * 24 * 3600  # 缓存有效期（秒）
+    TRANSLATION_MEMORY_ENABLED = True  # 句级翻译记忆，长文本只翻译新句子
+    TRANSLATION_MEMORY_MAX_BYTES = 128 * 1024 * 1024  # 翻译记忆的总字节预算（原句+译文）
+    TRANSLATION_MEMORY_TTL = 90 * 24 * 3600  # 超过该秒数未被使用的句子过期
+    # 允许清除翻译缓存的用户名（缓存为全体用户共享）
+    TRANSLATION_CACHE_ADMINS = {
+        name.strip() for name in os.environ.get('TRANSLATION_CACHE_ADMINS', '').split(',') if name.strip()
+    }
+
+    # 批量翻译
+    TRANSLATE_BATCH_MAX_ITEMS = 100  # 单次批量翻译最大条数
+    TRANSLATE_BATCH_WORKERS = 4  # 并发调用翻译服务的线程数
+
+    # 流式翻译（SSE）
+    TRANSLATE_STREAM_CHUNK_CHARS = 800  # 每块最大字符数
+    TRANSLATE_STREAM_WINDOW = 3  # 同时在途的翻译块数
+
+    # 历史记录异步批量写入
+    HISTORY_WRITE_BEHIND = True
+    HISTORY_FLUSH_INTERVAL_MS = 200  # 最长攒批时间（毫秒）
+    HISTORY_BATCH_SIZE = 200  # 单个事务最多写入的记录数
+    HISTORY_QUEUE_SIZE = 5000  # 写入队列容量，满时对请求线程施加背压
+
+    # 腾讯云接口限流（qps: 令牌桶速率，concurrency: 并发上限，被限流时自动下调）
+    PROVIDER_RATE_LIMITS = {
+        'ocr': {'qps': 10, 'concurrency': 5},
+        'translate': {'qps': 5, 'concurrency': 5},
+        'tts': {'qps': 20, 'concurrency': 10},
+        'asr': {'qps': 20, 'concurrency': 10},
+    }
+    PROVIDER_QUEUE_TIMEOUT = 15  # 排队等待许可的最长时间（秒）
+
+    # 腾讯云SDK客户端池
+    TENCENTCLOUD_REGION = os.environ.get('TENCENTCLOUD_REGION') or 'ap-guangzhou'
+    CLIENT_POOL_WARMUP = True  # 应用启动时后台预热服务与客户端
+    CLIENT_POOL_SIZE = 4  # 每个接口最多保持的客户端数
+    CLIENT_POOL_WARM_SIZE = 1  # 启动时预先创建的客户端数
+    CLIENT_POOL_IDLE_TIMEOUT = 300  # 客户端空闲超过该秒数后关闭连接
+
+    # 本地语言识别（source_lang 为 auto 时使用）
+    LANG_DETECT_ENABLED = True
+    LANG_DETECT_MIN_CONFIDENCE = 0.3  # 低于该置信度时仍交给翻译服务自动识别
+
+    # 术语表
+    GLOSSARY_ENABLED = True
+    GLOSSARY_ADMINS = {name.strip() for name in os.environ.get('GLOSSARY_ADMINS', '').split(',') if name.strip()}
+
+    # OCR图片预处理
+    IMAGE_PREPROCESS_ENABLED = True
+    IMAGE_PREPROCESS_WORKERS = 2  # 图片解码与编码的线程数
+    OCR_IMAGE_MAX_EDGE = 2048  # 最长边上限（像素）
+    OCR_IMAGE_MIN_EDGE = 800  # 为满足体积上限缩小尺寸时的最长边下限
+    OCR_IMAGE_MAX_BYTES = 2 * 1024 * 1024  # 上传给OCR服务的文件体积上限
+    OCR_IMAGE_GRAYSCALE = True  # 近似灰度的图片转为单通道
+    OCR_IMAGE_GRAYSCALE_SATURATION = 24  # 平均饱和度（0-255）低于该值时视为近似灰度
+
+    # OCR识别结果缓存（内容哈希精确命中；近似命中需显式开启，且只在同一用户的图片之间）
+    OCR_CACHE_ENABLED = True
+    OCR_CACHE_MAX_ENTRIES = 20000
+    OCR_CACHE_MAX_DISTANCE = 0  # 64位dHash汉明距离阈值，0表示只做精确匹配（大于0启用近似命中，如4）
+    OCR_CACHE_DETAIL_DISTANCE = 24  # 256位细粒度dHash的复核阈值
+    OCR_CACHE_PIXEL_TOLERANCE = 32  # 近似命中时256x256灰度缩略图的逐像素差值上限
+
+    # 批量OCR
+    OCR_BATCH_MAX_FILES = 50  # 单次批量识别最大文件数
+    OCR_BATCH_WORKERS = 5  # 并发识别的线程数（实际并发仍受OCR接口限流约束）
+    OCR_BATCH_ITEM_TIMEOUT = 30  # 文件识别超时（秒），从提交识别起算，含排队时间
+
+    # PDF逐页识别
+    PDF_MAX_PAGES = 500  # 单个PDF最多识别的页数
+    PDF_RENDER_DPI = 200  # 扫描页栅格化分辨率
+    PDF_OCR_WORKERS = 4  # 同时栅格化并识别的页数上限
+    PDF_TEXT_LAYER_MIN_CHARS = 20  # 文字层不少于该字符数的页面直接提取文本
+
+    # 上传文件存储（内容寻址，超出容量时回收未被历史记录引用的文件）
+    UPLOAD_STORE_DIR = os.path.join('static', 'uploads', 'objects')
+    UPLOAD_STORE_URL = '/static/uploads/objects'
+    UPLOAD_STORE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 总容量预算
+    UPLOAD_STORE_GRACE_PERIOD = 3600  # 最近该秒数内使用过的文件不回收
+    UPLOAD_GC_INTERVAL = 300  # 后台回收检查间隔（秒）
+    # 单张图片OCR上传文件在内存中缓冲（超过上限后写入临时文件），其余接口沿用werkzeug默认（500KB以上落盘）
+    UPLOAD_SPOOL_ENDPOINTS = ('ocr_recognize',)
+    UPLOAD_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+    # 超大图片分块OCR
+    OCR_TILING_ENABLED = True
+    OCR_TILE_SIZE = 1600  # 图块边长（像素），不超过 OCR_IMAGE_MAX_EDGE
+    OCR_TILE_OVERLAP = 160  # 相邻图块重叠像素，应大于一行文字的高度
+    OCR_TILE_WORKERS = 4  # 并发识别的图块数（实际并发仍受OCR接口限流约束）
+    OCR_TILE_TRIGGER_EDGE = 6000  # 最长边超过该值时分块
+    OCR_TILE_TRIGGER_ASPECT = 2.5  # 最长边超过 OCR_IMAGE_MAX_EDGE 且宽高比不低于该值（长截图）时分块
+
+    # 语音合成音频缓存
+    TTS_CACHE_ENABLED = True
+    TTS_CACHE_DIR = os.path.join('static', 'audio', 'cache')
+    TTS_CACHE_URL = '/static/audio/cache'
+    TTS_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 总容量预算
+    TTS_CACHE_GRACE_PERIOD = 600  # 最近该秒数内返回过的音频不淘汰
+    TTS_CACHE_GC_INTERVAL = 300  # 后台淘汰检查间隔（秒）
+
+    # 长文本分块语音合成
+    TTS_MAX_TEXT_LENGTH = 50000  # 单次合成的最大字符数
+    TTS_CHUNK_CHARS = 300  # 超过该长度的文本按句切块合成
+    TTS_CHUNK_WORKERS = 3  # 同时在途的合成块数（实际并发仍受语音合成接口限流约束）
+
+    # 语音识别
+    ASR_INLINE_MAX_BYTES = 3 * 1024 * 1024  # 不超过该大小的音频直接从内存提交（一句话识别接口上限3MB）
+    ASR_BATCH_MAX_FILES = 20  # 单次批量识别最大文件数
+    ASR_BATCH_WORKERS = 4  # 并发识别的线程数（实际并发仍受语音识别接口限流约束）
+    ASR_BATCH_ITEM_TIMEOUT = 60  # 文件识别超时（秒），从提交识别起算，含排队时间
+
+    # 语音识别前的音频规范化
+    ASR_NORMALIZE_ENABLED = True
+    ASR_NORMALIZE_WORKERS = 2  # 音频转码线程数
+    ASR_NORMALIZE_MAX_BYTES = 20 * 1024 * 1024  # 超过该大小的上传不解码规范化，按原始音频识别
+    ASR_NORMALIZE_MAX_SECONDS = 60  # 超过该时长的音频不规范化（一句话识别接口上限60秒）
+    ASR_NORMALIZE_FORMAT = 'wav'  # 输出格式：wav（16kHz单声道PCM）或 mp3（需要ffmpeg）
+    ASR_NORMALIZE_BITRATE = '32k'  # 输出为mp3时的码率
+    ASR_NORMALIZE_TARGET_DBFS = -20.0  # 目标平均响度
+    ASR_NORMALIZE_SILENCE_DB = 20  # 首尾低于平均响度该分贝数视为静音
+
+    # 语音识别结果缓存（以规范化后的PCM哈希为键，需启用 ASR_NORMALIZE_ENABLED）
+    ASR_CACHE_ENABLED = True
+    ASR_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 缓存结果的总字节预算
+
+    # 历史记录分页
+    HISTORY_PAGE_MAX_LIMIT = 100  # 每页最多返回的条数
+
+    # 长音频识别
+    ASR_LONG_SEGMENT_SECONDS = 50  # 片段最长秒数（一句话识别接口上限60秒）
+    ASR_LONG_MIN_SILENCE_MS = 400  # 至少持续该毫秒数的静音才作为切分点
+    ASR_LONG_SILENCE_DB = 16  # 低于整体平均响度该分贝数视为静音
+    ASR_LONG_WORKERS = 4  # 并发识别的片段数（实际并发仍受语音识别接口限流约束）
+    ASR_LONG_MAX_SECONDS = 3 * 3600  # 单个音频最长时长
+
 
 config = Config()
\ No newline at end of file
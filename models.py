@@ -108,6 +108,9 @@ class TranslationHistory(db.Model):
     image_path = db.Column(db.String(255))
     confidence = db.Column(db.Float)
 
+    # 写入前即返回给客户端的记录标识（记录ID在异步写入时才由数据库分配）
+    history_token = db.Column(db.String(32))
+
     # 时间戳
     created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
@@ -115,6 +118,7 @@ class TranslationHistory(db.Model):
     __table_args__ = (
         db.Index('idx_user_created', 'user_id', 'created_at'),
         db.Index('idx_operation_type', 'operation_type'),
+        db.Index('idx_history_token', 'history_token', unique=True),
     )
 
     def __init__(self, user_id, original_text, **kwargs):
@@ -138,6 +142,7 @@ class TranslationHistory(db.Model):
             'operation_type': self.operation_type,
             'image_path': self.image_path,
             'confidence': self.confidence,
+            'history_token': self.history_token,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -158,4 +163,49 @@ class TranslationHistory(db.Model):
         return query.order_by(cls.created_at.desc()).limit(limit).all()
 
     def __repr__(self):
-        return f'<TranslationHistory {self.id} - {self.operation_type}>'
\ No newline at end of file
+        return f'<TranslationHistory {self.id} - {self.operation_type}>'
+
+
+class GlossaryEntry(db.Model):
+    """术语表词条模型（user_id 为空表示全局术语）"""
+    __tablename__ = 'glossary_entries'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
+
+    source_lang = db.Column(db.String(10), nullable=False)
+    target_lang = db.Column(db.String(10), nullable=False)
+    term = db.Column(db.String(200), nullable=False)
+    translation = db.Column(db.String(200), nullable=False)
+
+    created_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
+    updated_at = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp(),
+                           onupdate=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'source_lang', 'target_lang', 'term', name='uq_glossary_term'),
+        db.Index('idx_glossary_scope', 'user_id', 'source_lang', 'target_lang'),
+    )
+
+    def __init__(self, source_lang, target_lang, term, translation, user_id=None):
+        self.user_id = user_id
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.term = term
+        self.translation = translation
+
+    def to_dict(self):
+        """转换为字典（用于JSON响应）"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'scope': 'global' if self.user_id is None else 'user',
+            'source_lang': self.source_lang,
+            'target_lang': self.target_lang,
+            'term': self.term,
+            'translation': self.translation,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<GlossaryEntry {self.term} -> {self.translation}>'
\ No newline at end of file
@@ -0,0 +1,107 @@
+# services/asr_bytes.py
+"""直接提交内存中的音频数据进行识别
+
+语音识别服务提供 transcribe_from_bytes 时交给服务（由其选择识别引擎）；否则按请求给出的引擎或语言
+直接调用腾讯云一句话识别（Data/base64方式）。两者都不具备时由调用方写入临时文件交给服务识别。
+"""
+import logging
+import os
+import tempfile
+
+from config import config
+from services.client_pool import get_client_pool
+from services.upload_buffer import encode_base64
+
+logger = logging.getLogger(__name__)
+
+# 一句话识别接口支持直接上传的音频格式（扩展名 -> VoiceFormat）
+INLINE_FORMATS = {
+    'wav': 'wav', 'pcm': 'pcm', 'mp3': 'mp3', 'm4a': 'm4a', 'aac': 'aac',
+    'amr': 'amr', 'ogg': 'ogg-opus', 'opus': 'ogg-opus', 'speex': 'speex', 'silk': 'silk',
+}
+
+# 一句话识别引擎（EngSerViceType）
+ENGINE_TYPES = {
+    '16k_zh', '16k_zh_dialect', '16k_en', '16k_yue', '16k_ja', '16k_ko',
+    '8k_zh', '8k_en',
+}
+
+# 请求语言 -> 引擎语言部分
+LANGUAGE_ENGINES = {
+    'zh': 'zh', 'zh-cn': 'zh', 'zh_cn': 'zh', 'en': 'en', 'yue': 'yue', 'ja': 'ja', 'jp': 'ja', 'ko': 'ko', 'kr': 'ko',
+}
+
+
+def accepts_audio_bytes(speech_service):
+    """语音识别服务是否支持直接提交音频数据"""
+    return hasattr(speech_service, 'transcribe_from_bytes')
+
+
+def resolve_engine(engine=None, lang=None, sample_rate=None):
+    """确定直接提交时使用的识别引擎
+
+    engine 须为 ENGINE_TYPES 之一（否则抛出 ValueError）；给出 sample_rate（提交的音频已重采样）时
+    换用该采样率下同一语言的引擎。未指定 engine 时按语言与采样率选择，语言未知（含 auto）
+    或该采样率没有对应引擎时返回 None。
+    """
+    if engine:
+        engine = str(engine).lower()
+        if engine not in ENGINE_TYPES:
+            raise ValueError(f'不支持的识别引擎: {engine}')
+        if not sample_rate:
+            return engine
+        language = engine.split('_', 1)[1]
+    else:
+        language = LANGUAGE_ENGINES.get(str(lang or '').lower())
+        if language is None or not sample_rate:
+            return None
+    candidate = f"{'16k' if sample_rate >= 16000 else '8k'}_{language}"
+    return candidate if candidate in ENGINE_TYPES else engine
+
+
+def inline_format(filename, size):
+    """可直接从内存提交时返回 VoiceFormat，否则（格式需转码或文件过大）返回 None"""
+    ext = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if size > config.ASR_INLINE_MAX_BYTES:
+        return None
+    return INLINE_FORMATS.get(ext)
+
+
+def transcribe_via_file(speech_service, data, voice_format):
+    """写入临时文件后交给语音识别服务按路径识别（由服务选择识别引擎）"""
+    fd, path = tempfile.mkstemp(prefix='stt_', suffix='.' + voice_format.split('-')[0])
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return speech_service.transcribe(path)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def transcribe_from_bytes(data, voice_format, engine):
+    """用指定引擎识别音频字节数据（bytes 或 memoryview），不经过磁盘"""
+    from tencentcloud.asr.v20190614 import models
+    from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+
+    request = models.SentenceRecognitionRequest()
+    request.EngSerViceType = engine
+    request.SourceType = 1
+    request.VoiceFormat = voice_format
+    request.Data = encode_base64(data)
+    request.DataLen = len(data)
+    try:
+        with get_client_pool('asr').client() as client:
+            response = client.SentenceRecognition(request)
+    except TencentCloudSDKException as e:
+        logger.warning(f"语音识别失败: {e}")
+        return {'success': False, 'message': f'语音识别失败: {e.get_code()} {e.get_message()}'}
+    text = response.Result or ''
+    return {
+        'success': True,
+        'message': '识别成功' if text else '未识别到语音内容',
+        'text': text,
+        'duration': (response.AudioDuration or 0) / 1000,
+    }
@@ -0,0 +1,258 @@
+# services/audio_cache.py
+"""语音合成结果的磁盘缓存：音频按内容哈希存放，索引在SQLite中，后台按总容量LRU淘汰"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+from config import config
+from services.cache import SQLiteStore
+from services.single_flight import make_request_key
+from services.translation_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def tts_cache_key(text, lang, gender, speed):
+    """(规范化文本, 语言, 音色, 语速) 的缓存键；空白差异不影响合成结果"""
+    text = _WHITESPACE.sub(' ', normalize_text(text))
+    return make_request_key(text, (lang or '').lower(), (gender or '').lower(), round(float(speed), 2))
+
+
+class AudioCache(SQLiteStore):
+    """语音合成音频缓存
+
+    音频文件保存在 root/<哈希前2位>/<哈希><扩展名>，内容相同的音频只保存一份；
+    表 tts_audio_cache 记录缓存键到文件的映射、大小与最近使用时间。
+    后台线程在总字节数超过 max_bytes 时按最近使用时间淘汰，直到降到 max_bytes 的 90%；
+    最近 grace_period 秒内返回过的音频不淘汰，避免前端尚未下载就被删除。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS tts_audio_cache (
+            cache_key TEXT PRIMARY KEY,
+            digest TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            duration REAL,
+            format TEXT,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tts_audio_cache_lru ON tts_audio_cache (last_access)",
+        "CREATE INDEX IF NOT EXISTS idx_tts_audio_cache_digest ON tts_audio_cache (digest)",
+    )
+
+    def __init__(self, root, url_prefix, max_bytes, grace_period=600, gc_interval=300, db_path=None):
+        super().__init__(db_path)
+        self.root = root
+        self.url_prefix = url_prefix.rstrip('/')
+        self.max_bytes = max_bytes
+        self.grace_period = grace_period
+        self.gc_interval = gc_interval
+        self._lock = threading.Lock()  # 串行化“登记/复用”与“淘汰删除”
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'evicted_bytes': 0, 'gc_runs': 0}
+
+    def _url(self, path):
+        relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+        return f"{self.url_prefix}/{relative}"
+
+    def _result(self, row, cached):
+        return {
+            'success': True,
+            'message': '语音合成成功',
+            'audio_url': self._url(row['path']),
+            'filepath': row['path'],
+            'duration': row['duration'],
+            'format': row['format'],
+            'cached': cached,
+        }
+
+    def lookup(self, key):
+        """查询缓存，命中时刷新使用时间并返回合成结果，未命中返回 None"""
+        try:
+            conn = self.connect()
+            with self._lock:
+                with conn:
+                    cursor = conn.execute(
+                        "UPDATE tts_audio_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?",
+                        (time.time(), key)
+                    )
+                    row = None
+                    if cursor.rowcount:
+                        row = conn.execute(
+                            "SELECT path, duration, format FROM tts_audio_cache WHERE cache_key = ?", (key,)
+                        ).fetchone()
+                    if row is not None and not os.path.exists(row['path']):
+                        # 文件被外部删除，索引作废
+                        conn.execute("DELETE FROM tts_audio_cache WHERE cache_key = ?", (key,))
+                        row = None
+        except Exception as e:
+            logger.warning(f"读取语音缓存失败: {e}")
+            row = None
+
+        if row is None:
+            self._stats['misses'] += 1
+            return None
+        self._stats['hits'] += 1
+        return self._result(row, True)
+
+    def store(self, key, result):
+        """把语音合成服务生成的音频文件移入缓存目录并登记，返回指向缓存文件的结果
+
+        失败时原样返回 result，不影响本次合成。
+        """
+        source = result.get('filepath')
+        if not source or not os.path.exists(source):
+            return result
+        try:
+            digest = hashlib.sha256()
+            with open(source, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            digest = digest.hexdigest()
+            fmt = result.get('format') or os.path.splitext(source)[1].lstrip('.') or 'mp3'
+            path = os.path.join(self.root, digest[:2], digest + '.' + fmt)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            conn = self.connect()
+            now = time.time()
+            with self._lock:
+                if os.path.exists(path):
+                    os.remove(source)
+                else:
+                    os.replace(source, path)
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO tts_audio_cache "
+                        "(cache_key, digest, path, size, duration, format, created_at, last_access, hits) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                        (key, digest, path, os.path.getsize(path), result.get('duration'), fmt, now, now)
+                    )
+        except Exception as e:
+            logger.warning(f"写入语音缓存失败: {e}")
+            return result
+
+        self._stats['stored'] += 1
+        self._wakeup.set()
+        cached = dict(result)
+        cached.update({'audio_url': self._url(path), 'filepath': path, 'format': fmt, 'cached': False})
+        return cached
+
+    # ---------- 淘汰 ----------
+
+    def total_bytes(self):
+        """缓存文件占用的字节数（多个键共享的文件只计一次）"""
+        return self.connect().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM tts_audio_cache GROUP BY digest)"
+        ).fetchone()[0]
+
+    def collect(self):
+        """总容量超出预算时按LRU淘汰，返回释放的字节数"""
+        self._stats['gc_runs'] += 1
+        conn = self.connect()
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        target = self.max_bytes * 0.9
+        cutoff = time.time() - self.grace_period
+        candidates = conn.execute(
+            "SELECT cache_key, digest, path, size FROM tts_audio_cache WHERE last_access < ? ORDER BY last_access",
+            (cutoff,)
+        ).fetchall()
+
+        freed = 0
+        for row in candidates:
+            if total - freed <= target:
+                break
+            with self._lock:
+                with conn:
+                    # 条件删除：期间再次命中的条目不会被淘汰
+                    cursor = conn.execute(
+                        "DELETE FROM tts_audio_cache WHERE cache_key = ? AND last_access < ?",
+                        (row['cache_key'], cutoff)
+                    )
+                    if not cursor.rowcount:
+                        continue
+                    shared = conn.execute(
+                        "SELECT 1 FROM tts_audio_cache WHERE digest = ? LIMIT 1", (row['digest'],)
+                    ).fetchone()
+                if shared is not None:
+                    continue
+                try:
+                    os.remove(row['path'])
+                except OSError:
+                    pass
+            freed += row['size']
+            self._stats['evicted'] += 1
+            self._stats['evicted_bytes'] += row['size']
+
+        if freed:
+            logger.info(f"语音缓存淘汰完成: 释放 {freed} 字节")
+        return freed
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.gc_interval)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            try:
+                self.collect()
+            except Exception as e:
+                logger.error(f"语音缓存淘汰失败: {e}")
+
+    def start(self):
+        """启动后台淘汰线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='tts-cache-gc', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+
+    def stats(self):
+        conn = self.connect()
+        entries = conn.execute("SELECT COUNT(*) FROM tts_audio_cache").fetchone()[0]
+        stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'bytes': self.total_bytes(),
+            'max_bytes': self.max_bytes,
+            'hit_rate': stats['hits'] / lookups if lookups else 0,
+        })
+        return stats
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """获取语音合成缓存单例（首次调用时启动后台淘汰线程）"""
+    global _audio_cache
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache(
+                    root=config.TTS_CACHE_DIR,
+                    url_prefix=config.TTS_CACHE_URL,
+                    max_bytes=config.TTS_CACHE_MAX_BYTES,
+                    grace_period=config.TTS_CACHE_GRACE_PERIOD,
+                    gc_interval=config.TTS_CACHE_GC_INTERVAL
+                )
+                _audio_cache.start()
+    return _audio_cache
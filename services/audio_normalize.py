@@ -0,0 +1,105 @@
+# services/audio_normalize.py
+"""语音识别前的音频规范化：转为16kHz单声道、裁掉首尾静音、统一响度"""
+import hashlib
+import io
+import logging
+import os
+
+from config import config
+from services.audio_tools import configure_ffmpeg, decode_pcm, wav_duration
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SILENCE_CHUNK_MS = 10
+TRIM_PADDING_MS = 150  # 裁剪后首尾保留的静音
+PEAK_CEILING_DBFS = -1.0  # 增益后峰值不超过该值，避免削波
+
+
+def _is_wav(filename):
+    return os.path.splitext(filename or '')[1].lower() == '.wav'
+
+
+def exceeds_limits(data, filename):
+    """不解码即可判断超出规范化上限：大小超过 ASR_NORMALIZE_MAX_BYTES，或WAV文件头时长超过 ASR_NORMALIZE_MAX_SECONDS"""
+    if len(data) > config.ASR_NORMALIZE_MAX_BYTES:
+        return True
+    duration = wav_duration(data) if _is_wav(filename) else None
+    return duration is not None and duration > config.ASR_NORMALIZE_MAX_SECONDS
+
+
+def decode_audio(data, filename, max_seconds=None):
+    """解码音频字节数据（bytes 或 memoryview）为16kHz单声道，最多解码 max_seconds 秒
+
+    有ffmpeg时经标准输入交给ffmpeg解码并重采样（WAV同样如此，数据不复制）；没有ffmpeg时只能解析WAV。
+    """
+    from pydub import AudioSegment
+
+    if configure_ffmpeg():
+        pcm = decode_pcm(data, SAMPLE_RATE, max_seconds)
+        return AudioSegment(data=pcm, sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+    if not _is_wav(filename):
+        raise RuntimeError('未找到ffmpeg，无法解码该格式的音频')
+    audio = AudioSegment.from_wav(io.BytesIO(data))
+    return audio[:max_seconds * 1000] if max_seconds else audio
+
+
+def trim_silence(audio, silence_db):
+    """裁掉首尾低于平均响度 silence_db 分贝的静音，返回 (音频, 裁掉的毫秒数)"""
+    from pydub.silence import detect_leading_silence
+
+    if audio.dBFS == float('-inf'):
+        return audio, 0
+    threshold = audio.dBFS - silence_db
+    lead = detect_leading_silence(audio, silence_threshold=threshold, chunk_size=SILENCE_CHUNK_MS)
+    if lead >= len(audio):
+        return audio, 0
+    tail = detect_leading_silence(audio.reverse(), silence_threshold=threshold, chunk_size=SILENCE_CHUNK_MS)
+    start = max(0, lead - TRIM_PADDING_MS)
+    end = min(len(audio), len(audio) - tail + TRIM_PADDING_MS)
+    return audio[start:end], len(audio) - (end - start)
+
+
+def normalize_loudness(audio, target_dbfs):
+    """把平均响度调整到 target_dbfs，峰值受 PEAK_CEILING_DBFS 限制，返回 (音频, 增益分贝)"""
+    if audio.dBFS == float('-inf'):
+        return audio, 0.0
+    gain = min(target_dbfs - audio.dBFS, PEAK_CEILING_DBFS - audio.max_dBFS)
+    return audio.apply_gain(gain), gain
+
+
+def normalize_audio(data, filename):
+    """规范化上传的音频，返回 {data, format, duration, original_bytes, bytes, trimmed_ms, gain_db, pcm_hash}
+
+    输出格式由 ASR_NORMALIZE_FORMAT 决定：wav 为16位PCM（无损），mp3 按 ASR_NORMALIZE_BITRATE 压缩。
+    pcm_hash 为规范化后PCM采样的SHA-256，与上传时的容器、采样率、声道数和首尾静音无关。
+    """
+    if exceeds_limits(data, filename):
+        raise ValueError('音频超过规范化的大小或时长上限')
+    # 时长未知时解码至多超出上限1秒，据此判断
+    audio = decode_audio(data, filename, config.ASR_NORMALIZE_MAX_SECONDS + 1)
+    if len(audio) > config.ASR_NORMALIZE_MAX_SECONDS * 1000:
+        raise ValueError('音频超过规范化的时长上限')
+    audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+    audio, trimmed_ms = trim_silence(audio, config.ASR_NORMALIZE_SILENCE_DB)
+    audio, gain = normalize_loudness(audio, config.ASR_NORMALIZE_TARGET_DBFS)
+
+    fmt = config.ASR_NORMALIZE_FORMAT
+    buffer = io.BytesIO()
+    if fmt == 'mp3':
+        configure_ffmpeg()
+        audio.export(buffer, format='mp3', bitrate=config.ASR_NORMALIZE_BITRATE)
+    else:
+        fmt = 'wav'
+        audio.export(buffer, format='wav')
+    output = buffer.getvalue()
+    return {
+        'data': output,
+        'format': fmt,
+        'duration': len(audio) / 1000,
+        'original_bytes': len(data),
+        'bytes': len(output),
+        'trimmed_ms': trimmed_ms,
+        'gain_db': round(gain, 1),
+        'pcm_hash': hashlib.sha256(audio.raw_data).hexdigest(),
+    }
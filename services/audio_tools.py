@@ -0,0 +1,148 @@
+# services/audio_tools.py
+"""音频处理工具：定位ffmpeg、探测时长、拼接音频片段"""
+import io
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import wave
+
+logger = logging.getLogger(__name__)
+
+WAV_HEADER_PROBE_BYTES = 64 * 1024  # 读取WAV文件头时最多查看的字节数
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def _binary(env_name, program):
+    binary = os.environ.get(env_name)
+    if binary and os.path.exists(binary):
+        return binary
+    return shutil.which(program)
+
+
+def ffmpeg_path():
+    """ffmpeg 可执行文件路径（FFMPEG_BIN 优先），找不到时返回 None"""
+    return _binary('FFMPEG_BIN', 'ffmpeg')
+
+
+def ffprobe_path():
+    """ffprobe 可执行文件路径（FFPROBE_BIN 优先），找不到时返回 None"""
+    return _binary('FFPROBE_BIN', 'ffprobe')
+
+
+def configure_ffmpeg():
+    """让 pydub 使用 FFMPEG_BIN / FFPROBE_BIN 指定的程序（启动器打包的ffmpeg），返回是否可用
+
+    只设置 pydub 的转换程序与探测程序，不修改进程的 PATH。
+    """
+    global _configured
+    with _configure_lock:
+        if not _configured:
+            from pydub import AudioSegment, utils
+
+            ffmpeg = ffmpeg_path()
+            if ffmpeg:
+                AudioSegment.converter = ffmpeg
+            ffprobe = ffprobe_path()
+            if ffprobe:
+                # pydub 每次探测都调用 utils.get_prober_name 按 PATH 查找 ffprobe
+                utils.get_prober_name = lambda: ffprobe
+            _configured = True
+    return ffmpeg_available()
+
+
+def ffmpeg_available():
+    return ffmpeg_path() is not None
+
+
+def wav_duration(data):
+    """从WAV字节数据（bytes 或 memoryview）的文件头读取时长（秒），非PCM编码或文件头不完整时返回 None"""
+    try:
+        with wave.open(io.BytesIO(data[:WAV_HEADER_PROBE_BYTES]), 'rb') as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return None
+
+
+def probe_duration(filepath):
+    """不解码音频取得时长（秒）：WAV读取文件头，其他格式用ffprobe读取容器信息，无法确定时返回 None"""
+    if filepath.lower().endswith('.wav'):
+        try:
+            with wave.open(filepath, 'rb') as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError, ZeroDivisionError):
+            pass  # 非PCM编码（如浮点、WAVE_FORMAT_EXTENSIBLE）交给ffprobe
+    ffprobe = ffprobe_path()
+    if not ffprobe:
+        return None
+    try:
+        output = subprocess.run(
+            [ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', filepath],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=30, check=True
+        ).stdout
+        return float(output.decode('utf-8', 'ignore').strip())
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        logger.warning(f"探测音频时长失败: {e}")
+        return None
+
+
+def decode_pcm(source, sample_rate, max_seconds=None):
+    """用ffmpeg把音频解码为指定采样率的单声道16位PCM（s16le），最多解码 max_seconds 秒
+
+    source 为文件路径，或音频字节数据（bytes 或 memoryview，经标准输入交给ffmpeg，不复制）。
+    未找到ffmpeg或解码失败时抛出 RuntimeError。
+    """
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        raise RuntimeError('未找到ffmpeg，无法解码音频')
+    from_path = isinstance(source, str)
+    command = [ffmpeg, '-v', 'error']
+    command += ['-nostdin', '-i', source] if from_path else ['-i', 'pipe:0']
+    command += ['-vn', '-ac', '1', '-ar', str(sample_rate), '-acodec', 'pcm_s16le', '-f', 's16le']
+    if max_seconds:
+        command += ['-t', str(max_seconds)]
+    command.append('pipe:1')
+    process = subprocess.run(command, input=None if from_path else source,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise RuntimeError(f"音频解码失败: {process.stderr.decode('utf-8', 'ignore').strip()[-200:]}")
+    return process.stdout
+
+
+def _mp3_frames(data, keep_header=False):
+    """去掉ID3v1尾（以及 keep_header 为假时的ID3v2头），只保留MP3帧数据"""
+    if not keep_header and data[:3] == b'ID3' and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        data = data[10 + size:]
+    if data[-128:-125] == b'TAG':
+        data = data[:-128]
+    return data
+
+
+def concat_audio(paths, output_path, fmt='mp3'):
+    """按顺序无缝拼接音频文件（不做交叉淡入淡出），写入 output_path
+
+    有ffmpeg时用 pydub 解码后拼接再编码；没有ffmpeg且为MP3时直接按帧拼接
+    （同一合成服务输出的MP3参数一致，按帧拼接即可连续播放）。
+    """
+    if configure_ffmpeg():
+        from pydub import AudioSegment
+
+        combined = AudioSegment.empty()
+        for path in paths:
+            combined += AudioSegment.from_file(path, format=fmt)
+        combined.export(output_path, format=fmt)
+        return output_path
+
+    if fmt != 'mp3':
+        raise RuntimeError(f'未找到ffmpeg，无法拼接 {fmt} 音频')
+    logger.debug("未找到ffmpeg，按MP3帧直接拼接")
+    with open(output_path, 'wb') as out:
+        for index, path in enumerate(paths):
+            with open(path, 'rb') as f:
+                data = f.read()
+            out.write(_mp3_frames(data, keep_header=index == 0))
+    return output_path
@@ -0,0 +1,82 @@
+# services/cache.py
+"""本地缓存基础组件：带TTL的内存LRU缓存与基于SQLite的持久化存储"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from database import DatabaseManager
+
+
+class LRUCache:
+    """线程安全的内存LRU缓存，按容量与存活时间(TTL)淘汰"""
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            return count
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteStore:
+    """直接使用sqlite3访问应用数据库的存储基类
+
+    不依赖Flask应用上下文，可在后台线程和线程池中使用；每个线程持有独立连接。
+    子类通过 SCHEMA 声明需要创建的表和索引。
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DatabaseManager._get_db_path()
+        self._local = threading.local()
+        with self.connect() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def connect(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
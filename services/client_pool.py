@@ -0,0 +1,231 @@
+# services/client_pool.py
+"""腾讯云SDK客户端池：应用启动时后台预热，工作线程间共享长连接"""
+import importlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 接口名 -> (客户端模块, 客户端类, 接入域名)
+TENCENT_CLIENTS = {
+    'ocr': ('tencentcloud.ocr.v20181119.ocr_client', 'OcrClient', 'ocr.tencentcloudapi.com'),
+    'translate': ('tencentcloud.tmt.v20180321.tmt_client', 'TmtClient', 'tmt.tencentcloudapi.com'),
+    'tts': ('tencentcloud.tts.v20190823.tts_client', 'TtsClient', 'tts.tencentcloudapi.com'),
+    'asr': ('tencentcloud.asr.v20190614.asr_client', 'AsrClient', 'asr.tencentcloudapi.com'),
+}
+
+
+def _http_session(client):
+    """取得SDK客户端内部的 requests.Session（SDK版本不同时可能不存在）"""
+    conn = getattr(getattr(client, 'request', None), 'conn', None)
+    return getattr(conn, '_session', None)
+
+
+def build_tencent_client(name, region=None):
+    """创建开启 keep-alive 的腾讯云SDK客户端"""
+    from tencentcloud.common import credential
+    from tencentcloud.common.profile.client_profile import ClientProfile
+    from tencentcloud.common.profile.http_profile import HttpProfile
+
+    module_name, class_name, endpoint = TENCENT_CLIENTS[name]
+    client_cls = getattr(importlib.import_module(module_name), class_name)
+    cred = credential.Credential(
+        os.environ.get('TENCENTCLOUD_SECRET_ID', ''),
+        os.environ.get('TENCENTCLOUD_SECRET_KEY', '')
+    )
+    http_profile = HttpProfile(endpoint=endpoint, keepAlive=True)
+    return client_cls(cred, region or config.TENCENTCLOUD_REGION, ClientProfile(httpProfile=http_profile))
+
+
+def preconnect(client, endpoint):
+    """预先建立到接入域名的TLS连接，后续请求复用该 keep-alive 连接"""
+    session = _http_session(client)
+    if session is None:
+        return False
+    try:
+        session.head(f"https://{endpoint}", timeout=5)
+        return True
+    except Exception as e:
+        logger.debug(f"预连接 {endpoint} 失败: {e}")
+        return False
+
+
+class ClientPool:
+    """线程安全的客户端对象池
+
+    最多创建 size 个客户端，借出时优先复用空闲客户端，池满时等待归还；
+    空闲超过 idle_timeout 秒的客户端会被关闭，下次需要时重新创建。
+    """
+
+    def __init__(self, name, factory, size=4, idle_timeout=300, on_create=None):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.on_create = on_create
+        self._idle = []  # [(client, 归还时间)]
+        self._created = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def _close(self, client):
+        session = _http_session(client)
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def _evict_idle(self, now):
+        expired = [c for c, returned_at in self._idle if now - returned_at > self.idle_timeout]
+        if expired:
+            self._idle = [(c, t) for c, t in self._idle if now - t <= self.idle_timeout]
+            self._created -= len(expired)
+        return expired
+
+    def _create(self):
+        client = self.factory()
+        if self.on_create is not None:
+            self.on_create(client)
+        return client
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            expired = self._evict_idle(time.monotonic())
+            while True:
+                if self._idle:
+                    client, _ = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    self._in_use += 1
+                    client = None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"{self.name} 客户端池已耗尽")
+                self._cond.wait(remaining)
+
+        for old in expired:
+            self._close(old)
+        if client is None:
+            try:
+                client = self._create()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return client
+
+    def release(self, client):
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((client, time.monotonic()))
+            self._cond.notify()
+
+    def _put_idle(self, client):
+        with self._cond:
+            self._idle.append((client, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def client(self, timeout=None):
+        """借出一个客户端：with pool.client() as client: ..."""
+        client = self.acquire(timeout)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def warm(self, count=None):
+        """预先创建客户端放入空闲队列"""
+        count = self.size if count is None else min(count, self.size)
+        created = 0
+        while True:
+            with self._cond:
+                if self._created >= count:
+                    break
+                self._created += 1
+            try:
+                client = self._create()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                raise
+            self._put_idle(client)
+            created += 1
+        return created
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'idle_timeout': self.idle_timeout,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_client_pool(name):
+    """获取指定接口（ocr / translate / tts / asr）的腾讯云客户端池
+
+    服务模块通过 with get_client_pool('ocr').client() as client: 使用共享客户端。
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            endpoint = TENCENT_CLIENTS[name][2]
+            pool = _pools[name] = ClientPool(
+                name,
+                factory=lambda: build_tencent_client(name),
+                size=config.CLIENT_POOL_SIZE,
+                idle_timeout=config.CLIENT_POOL_IDLE_TIMEOUT,
+                on_create=lambda client: preconnect(client, endpoint)
+            )
+        return pool
+
+
+def client_pool_stats():
+    """返回全部客户端池的状态"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def start_warm_up(service_factories, pooled=None):
+    """在后台线程中预热服务与客户端池
+
+    service_factories 为 {接口名: 获取服务实例的函数}，调用一次即可完成SDK导入与服务初始化。
+    pooled 为 {接口名: 判断函数}，判断函数接收服务实例，返回 True 时该接口的请求会经过客户端池，
+    才预先创建客户端并建立连接；未列出的接口不创建客户端。
+    """
+    pooled = pooled or {}
+
+    def run():
+        for name, factory in service_factories.items():
+            started = time.perf_counter()
+            try:
+                service = factory()
+                if name in TENCENT_CLIENTS and name in pooled and pooled[name](service):
+                    get_client_pool(name).warm(config.CLIENT_POOL_WARM_SIZE)
+                logger.info(f"✅ {name} 服务预热完成，用时 {(time.perf_counter() - started) * 1000:.0f}ms")
+            except Exception as e:
+                logger.warning(f"⚠️  {name} 服务预热失败: {e}")
+
+    thread = threading.Thread(target=run, name='service-warm-up', daemon=True)
+    thread.start()
+    return thread
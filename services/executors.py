@@ -0,0 +1,32 @@
+# services/executors.py
+"""进程内共享的有界线程池，按用途命名复用"""
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name, max_workers):
+    """获取指定名称的线程池，首次调用时按 max_workers 创建"""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+                _executors[name] = executor
+    return executor
+
+
+def shutdown_executors(wait=True):
+    """关闭全部线程池"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+atexit.register(shutdown_executors, wait=False)
@@ -0,0 +1,249 @@
+# services/glossary.py
+"""术语表：Aho-Corasick 多模式匹配，翻译前用占位符保护术语，翻译后还原为指定译法"""
+import logging
+import re
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = '{{G{}}}'
+# 翻译服务可能在占位符内插入空格或转为全角括号
+PLACEHOLDER_PATTERN = re.compile(r'[{｛]\s*[Gg]\s*(\d+)\s*[}｝]')
+
+
+def _is_word_char(ch):
+    return ch.isascii() and (ch.isalnum() or ch == '_')
+
+
+class AhoCorasick:
+    """Aho-Corasick 自动机
+
+    支持增量维护：新增词条只插入字典树并重算失败指针与输出链接（与字典树规模线性相关，无需重新插入全部词条）；
+    删除词条只清除节点输出，不需要重建。匹配耗时与文本长度及匹配数线性相关。
+    """
+
+    def __init__(self, ignore_case=True):
+        self.ignore_case = ignore_case
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]  # 节点对应的词条: (词长, 值)
+        self._out_link = [0]  # 沿失败指针最近的带输出节点
+        self._depth = [0]
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def _key(self, text):
+        return text.lower() if self.ignore_case else text
+
+    def add(self, word, value):
+        key = self._key(word)
+        if not key:
+            return
+        with self._lock:
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._out_link.append(0)
+                    self._depth.append(self._depth[node] + 1)
+                    self._dirty = True
+                node = nxt
+            if self._output[node] is None:
+                # 词条落在已有节点上（是其他词条的前缀，或删除后重新加入）时不产生新节点，
+                # 但以该节点为失败目标的节点的输出链接仍须重算
+                self.size += 1
+                self._dirty = True
+            self._output[node] = (len(key), value)
+
+    def remove(self, word):
+        key = self._key(word)
+        with self._lock:
+            node = 0
+            for ch in key:
+                node = self._goto[node].get(ch)
+                if node is None:
+                    return False
+            if self._output[node] is None:
+                return False
+            self._output[node] = None
+            self.size -= 1
+            return True
+
+    def _link(self):
+        """按层次遍历重算失败指针与输出链接"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._out_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fail_node = self._fail[child]
+                self._out_link[child] = fail_node if self._output[fail_node] is not None else self._out_link[fail_node]
+                queue.append(child)
+        self._dirty = False
+
+    def iter_matches(self, text):
+        """返回全部匹配 (起始位置, 结束位置, 值)，可能互相重叠"""
+        key = self._key(text)
+        if len(key) != len(text):
+            # 极少数字符大小写转换后长度改变，此时退回区分大小写匹配
+            key = text
+        with self._lock:
+            if self._dirty:
+                self._link()
+            goto, fail, output, out_link = self._goto, self._fail, self._output, self._out_link
+            matches = []
+            node = 0
+            for index, ch in enumerate(key):
+                while node and ch not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(ch, 0)
+                hit = node if output[node] is not None else out_link[node]
+                while hit:
+                    if output[hit] is not None:
+                        length, value = output[hit]
+                        matches.append((index - length + 1, index + 1, value))
+                    hit = out_link[hit]
+        return matches
+
+
+def select_matches(text, matches):
+    """从重叠匹配中选出最左最长、互不重叠且不截断英文单词的匹配"""
+    n = len(text)
+    chosen = []
+    last_end = 0
+    for start, end, value in sorted(matches, key=lambda m: (m[0], -(m[1] - m[0]))):
+        if start < last_end:
+            continue
+        if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if _is_word_char(text[end - 1]) and end < n and _is_word_char(text[end]):
+            continue
+        chosen.append((start, end, value))
+        last_end = end
+    return chosen
+
+
+def protect_terms(text, matches):
+    """用占位符替换术语，返回 (替换后文本, [译法, ...])"""
+    if not matches:
+        return text, []
+    parts = []
+    translations = []
+    cursor = 0
+    for start, end, translation in matches:
+        parts.append(text[cursor:start])
+        parts.append(PLACEHOLDER.format(len(translations)))
+        translations.append(translation)
+        cursor = end
+    parts.append(text[cursor:])
+    return ''.join(parts), translations
+
+
+def restore_terms(text, translations):
+    """将译文中的占位符还原为术语译法"""
+    if not translations:
+        return text
+
+    def replace(match):
+        index = int(match.group(1))
+        return translations[index] if index < len(translations) else match.group(0)
+
+    restored = PLACEHOLDER_PATTERN.sub(replace, text)
+    if len(PLACEHOLDER_PATTERN.findall(text)) < len(translations):
+        logger.warning("部分术语占位符在翻译结果中丢失")
+    return restored
+
+
+class GlossaryManager:
+    """按 (用户, 源语言, 目标语言) 缓存编译好的自动机
+
+    全局术语（user_id 为空）与个人术语分别编译，个人术语优先。
+    词条增删时直接增量更新已缓存的自动机。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._automata = {}
+        self._lock = threading.Lock()
+
+    def _load(self, user_id, source_lang, target_lang):
+        from models import GlossaryEntry
+
+        automaton = AhoCorasick()
+        with self.app.app_context():
+            entries = GlossaryEntry.query.filter_by(
+                user_id=user_id, source_lang=source_lang, target_lang=target_lang
+            ).with_entities(GlossaryEntry.term, GlossaryEntry.translation).all()
+        for term, translation in entries:
+            automaton.add(term, translation)
+        automaton.iter_matches('')  # 预先计算失败指针
+        return automaton
+
+    def get_automaton(self, user_id, source_lang, target_lang):
+        key = (user_id, source_lang, target_lang)
+        automaton = self._automata.get(key)
+        if automaton is None:
+            with self._lock:
+                automaton = self._automata.get(key)
+                if automaton is None:
+                    automaton = self._automata[key] = self._load(*key)
+        return automaton
+
+    def entry_added(self, user_id, source_lang, target_lang, term, translation):
+        """词条新增或修改后增量更新"""
+        automaton = self._automata.get((user_id, source_lang, target_lang))
+        if automaton is not None:
+            automaton.add(term, translation)
+
+    def entry_removed(self, user_id, source_lang, target_lang, term):
+        """词条删除后增量更新"""
+        automaton = self._automata.get((user_id, source_lang, target_lang))
+        if automaton is not None:
+            automaton.remove(term)
+
+    def find_terms(self, text, user_id, source_lang, target_lang):
+        """查找文本中的术语，返回选中的 (起始, 结束, 译法) 列表"""
+        matches = []
+        if user_id is not None:
+            # 个人术语优先：同一位置同样长度时排在全局术语之前
+            matches.extend(self.get_automaton(user_id, source_lang, target_lang).iter_matches(text))
+        global_automaton = self.get_automaton(None, source_lang, target_lang)
+        if global_automaton.size:
+            matches.extend(global_automaton.iter_matches(text))
+        return select_matches(text, matches)
+
+    def protect(self, text, user_id, source_lang, target_lang):
+        """翻译前保护术语，返回 (替换后文本, [译法, ...])"""
+        return protect_terms(text, self.find_terms(text, user_id, source_lang, target_lang))
+
+
+_glossary_manager = None
+
+
+def init_glossary(app):
+    """创建术语表管理器"""
+    global _glossary_manager
+    _glossary_manager = GlossaryManager(app)
+    return _glossary_manager
+
+
+def get_glossary():
+    """获取术语表管理器"""
+    if _glossary_manager is None:
+        raise RuntimeError("术语表尚未初始化，请先调用 init_glossary(app)")
+    return _glossary_manager
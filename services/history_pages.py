@@ -0,0 +1,136 @@
+# services/history_pages.py
+"""翻译历史分页：(created_at, id) 键集游标的编解码，以及由触发器维护的按用户、类型计数"""
+import base64
+import json
+import threading
+
+from services.cache import SQLiteStore
+
+
+def encode_cursor(created_at, history_id):
+    """把最后一条记录的 (created_at 原始字符串, id) 编码为不透明游标"""
+    raw = json.dumps([created_at, history_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解码游标，返回 (created_at, id)；格式不正确时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, history_id = json.loads(raw)
+    except Exception:
+        raise ValueError('无效的分页游标')
+    if not isinstance(created_at, str) or not isinstance(history_id, int):
+        raise ValueError('无效的分页游标')
+    return created_at, history_id
+
+
+class HistoryCounter(SQLiteStore):
+    """按 (用户, 操作类型) 统计历史记录条数
+
+    计数保存在表 history_counts 中，由 translation_history 上的触发器在插入、删除和
+    改变用户/类型时同步更新，查询总数无需 COUNT(*) 扫描。首次安装触发器时在同一事务中按现有记录重建计数。
+    另建 (user_id, operation_type, created_at, id) 索引，按类型筛选的键集分页可直接沿索引定位。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS history_counts (
+            user_id INTEGER NOT NULL,
+            operation_type TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, operation_type)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_history_user_type_created "
+        "ON translation_history (user_id, operation_type, created_at, id)",
+    )
+
+    TRIGGERS = (
+        """
+        CREATE TRIGGER trg_history_count_insert AFTER INSERT ON translation_history
+        BEGIN
+            INSERT INTO history_counts (user_id, operation_type, count)
+            VALUES (NEW.user_id, IFNULL(NEW.operation_type, ''), 1)
+            ON CONFLICT (user_id, operation_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_history_count_delete AFTER DELETE ON translation_history
+        BEGIN
+            UPDATE history_counts SET count = count - 1
+            WHERE user_id = OLD.user_id AND operation_type = IFNULL(OLD.operation_type, '');
+        END
+        """,
+        """
+        CREATE TRIGGER trg_history_count_update AFTER UPDATE OF user_id, operation_type ON translation_history
+        WHEN OLD.user_id IS NOT NEW.user_id OR OLD.operation_type IS NOT NEW.operation_type
+        BEGIN
+            UPDATE history_counts SET count = count - 1
+            WHERE user_id = OLD.user_id AND operation_type = IFNULL(OLD.operation_type, '');
+            INSERT INTO history_counts (user_id, operation_type, count)
+            VALUES (NEW.user_id, IFNULL(NEW.operation_type, ''), 1)
+            ON CONFLICT (user_id, operation_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+    )
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path)
+        self._install_triggers()
+
+    def _install_triggers(self):
+        """触发器不存在时安装并重建计数；在同一个写事务中完成，期间的插入不会漏计或重复计数"""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            installed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_history_count_insert'"
+            ).fetchone()
+            if installed is None:
+                for statement in self.TRIGGERS:
+                    conn.execute(statement)
+                self._rebuild(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    @staticmethod
+    def _rebuild(conn):
+        conn.execute("DELETE FROM history_counts")
+        conn.execute(
+            "INSERT INTO history_counts (user_id, operation_type, count) "
+            "SELECT user_id, IFNULL(operation_type, ''), COUNT(*) FROM translation_history "
+            "GROUP BY user_id, IFNULL(operation_type, '')"
+        )
+
+    def rebuild(self):
+        """按现有记录重新计算全部计数"""
+        conn = self.connect()
+        with conn:
+            self._rebuild(conn)
+
+    def count(self, user_id, operation_type):
+        row = self.connect().execute(
+            "SELECT count FROM history_counts WHERE user_id = ? AND operation_type = ?",
+            (user_id, operation_type or '')
+        ).fetchone()
+        return row['count'] if row else 0
+
+
+_history_counter = None
+_history_counter_lock = threading.Lock()
+
+
+def get_history_counter():
+    """获取历史记录计数器单例
+
+    触发器依赖 translation_history，须在数据库表创建之后调用。
+    """
+    global _history_counter
+    if _history_counter is None:
+        with _history_counter_lock:
+            if _history_counter is None:
+                _history_counter = HistoryCounter()
+    return _history_counter
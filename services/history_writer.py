@@ -0,0 +1,249 @@
+# services/history_writer.py
+"""翻译历史记录的异步批量写入（write-behind）"""
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from models import db, TranslationHistory
+
+logger = logging.getLogger(__name__)
+
+_HISTORY_COLUMNS = (
+    'user_id', 'original_text', 'source_lang', 'target_lang', 'translated_text',
+    'operation_type', 'image_path', 'confidence',
+)
+_HISTORY_DEFAULTS = {
+    'source_lang': 'auto',
+    'target_lang': 'zh',
+    'translated_text': None,
+    'operation_type': 'translate',
+    'image_path': None,
+    'confidence': None,
+}
+
+
+class HistoryWriter:
+    """TranslationHistory 写入队列
+
+    请求线程只负责入队并立即拿到记录标识 history_token（UUID），后台线程每隔 flush_interval 秒
+    或攒够 batch_size 条时在一个事务中批量写入。队列有界：队列满时调用方最多等待
+    enqueue_timeout 秒，仍无空位则在调用方线程同步写入。
+
+    记录ID由SQLite在写入时分配，与其他进程或绕过本写入器的插入互不冲突。
+    """
+
+    def __init__(self, app, enabled=True, flush_interval=0.2, batch_size=200, max_queue=5000, enqueue_timeout=2.0):
+        self.app = app
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'submitted': 0, 'written': 0, 'batches': 0, 'sync_writes': 0, 'errors': 0}
+        self._ensure_token_column()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _ensure_token_column(self):
+        """为早期创建的 translation_history 表补充 history_token 列及其唯一索引"""
+        with self.app.app_context():
+            try:
+                columns = {column['name'] for column in db.inspect(db.engine).get_columns('translation_history')}
+                with db.engine.begin() as conn:
+                    if 'history_token' not in columns:
+                        conn.execute(db.text("ALTER TABLE translation_history ADD COLUMN history_token VARCHAR(32)"))
+                    conn.execute(db.text(
+                        "CREATE UNIQUE INDEX IF NOT EXISTS idx_history_token ON translation_history (history_token)"
+                    ))
+            except Exception as e:
+                logger.error(f"补充 history_token 列失败: {e}")
+
+    # ---------- 入队 ----------
+
+    def submit(self, records):
+        """提交多条历史记录（字段同 TranslationHistory），返回对应的 history_token 列表
+
+        同一次提交的记录保证在同一个事务中写入。
+        """
+        if not records:
+            return []
+        tokens = [uuid.uuid4().hex for _ in records]
+        rows = []
+        for token, record in zip(tokens, records):
+            row = dict(_HISTORY_DEFAULTS)
+            row.update({key: record[key] for key in _HISTORY_COLUMNS if key in record})
+            row['history_token'] = token
+            rows.append(row)
+
+        self._count('submitted', len(rows))
+        if not self.enabled or self._closed:
+            self._write_sync(rows)
+            return tokens
+
+        self._ensure_thread()
+        with self._pending_cond:
+            self._pending += len(rows)
+        try:
+            self._queue.put(rows, timeout=self.enqueue_timeout)
+        except queue.Full:
+            # 背压：队列持续满载时退回同步写入
+            logger.warning("历史记录写入队列已满，改为同步写入")
+            self._done(len(rows))
+            self._write_sync(rows)
+        return tokens
+
+    def submit_one(self, **record):
+        """提交单条历史记录，返回 history_token"""
+        return self.submit([record])[0]
+
+    # ---------- 写入 ----------
+
+    def _write(self, rows):
+        db.session.execute(TranslationHistory.__table__.insert(), rows)
+        db.session.commit()
+
+    def _write_sync(self, rows):
+        self._count('sync_writes')
+        with self.app.app_context():
+            try:
+                self._write(rows)
+                self._count('written', len(rows))
+            except Exception:
+                db.session.rollback()
+                self._count('errors')
+                raise
+            finally:
+                db.session.remove()
+
+    def _write_batch(self, rows):
+        with self.app.app_context():
+            try:
+                self._write(rows)
+                self._count('written', len(rows))
+                self._count('batches')
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"批量写入历史记录失败，改为逐条写入: {e}")
+                for row in rows:
+                    try:
+                        self._write([row])
+                        self._count('written')
+                    except Exception as row_error:
+                        db.session.rollback()
+                        self._count('errors')
+                        logger.error(f"写入历史记录失败: history_token={row['history_token']}, {row_error}")
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while True:
+            try:
+                rows = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            if rows is None:
+                return
+
+            batch = list(rows)
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    more = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
+                    break
+                batch.extend(more)
+
+            self._write_batch(batch)
+            self._done(len(batch))
+            if stop:
+                return
+
+    def _done(self, count):
+        with self._pending_cond:
+            self._pending -= count
+            if self._pending <= 0:
+                self._pending_cond.notify_all()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._thread.start()
+
+    # ---------- 同步与关闭 ----------
+
+    def flush(self, timeout=5.0):
+        """等待已入队的记录全部写入，返回是否在超时前完成"""
+        with self._pending_cond:
+            return self._pending_cond.wait_for(lambda: self._pending <= 0, timeout=timeout)
+
+    def close(self, timeout=10.0):
+        """停止后台线程，写入队列中剩余的记录"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        # 线程退出后仍留在队列中的记录同步写入
+        while True:
+            try:
+                rows = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if rows:
+                self._write_batch(rows)
+                self._done(len(rows))
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            'enabled': self.enabled,
+            'pending': self._pending,
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+        })
+        return stats
+
+
+_history_writer = None
+
+
+def init_history_writer(app, **kwargs):
+    """创建历史记录写入器并在进程退出时刷新队列"""
+    global _history_writer
+    if _history_writer is not None:
+        _history_writer.close()
+    _history_writer = HistoryWriter(app, **kwargs)
+    atexit.register(_history_writer.close)
+    return _history_writer
+
+
+def get_history_writer():
+    """获取历史记录写入器"""
+    if _history_writer is None:
+        raise RuntimeError("历史记录写入器尚未初始化，请先调用 init_history_writer(app)")
+    return _history_writer
@@ -0,0 +1,173 @@
+# services/image_preprocess.py
+"""OCR上传前的图片预处理：校正EXIF方向、限制最长边、按需转灰度并重新编码为体积受限的JPEG/PNG"""
+import io
+import logging
+import os
+import tempfile
+
+from PIL import Image, ImageOps, ImageStat
+
+from config import config
+from services.upload_buffer import BufferReader
+
+logger = logging.getLogger(__name__)
+
+# 逐级降低的JPEG质量，仍超出体积上限时再缩小尺寸
+JPEG_QUALITY_STEPS = (85, 75, 65, 50)
+DOWNSCALE_STEP = 0.75
+PREPROCESS_FORMATS = {'JPEG', 'PNG', 'BMP', 'MPO', 'WEBP', 'TIFF'}
+
+
+def is_near_grayscale(image, threshold=None):
+    """平均饱和度低于阈值时认为是近似灰度图（扫描件、截图、黑白文档），转灰度不损失文字对比度"""
+    threshold = config.OCR_IMAGE_GRAYSCALE_SATURATION if threshold is None else threshold
+    if image.mode in ('L', 'LA', '1'):
+        return True
+    thumb = image.convert('RGB')
+    thumb.thumbnail((64, 64))
+    saturation = ImageStat.Stat(thumb.convert('HSV')).mean[1]
+    return saturation < threshold
+
+
+def _flatten(image):
+    """去掉透明通道（铺白底），转为 JPEG/PNG 可直接编码的模式"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'L'):
+        return image.convert('RGB')
+    return image
+
+
+def _encode(image, fmt, quality=None):
+    buffer = io.BytesIO()
+    if fmt == 'PNG':
+        image.save(buffer, 'PNG', compress_level=6)
+    else:
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def encode_bounded(image, max_bytes, prefer_png=False):
+    """编码为不超过 max_bytes 的字节串，返回 (数据, 格式, 最终图片)
+
+    截图类图片同时尝试无损PNG与最高档JPEG，取较小且不超限的一个；
+    否则按质量阶梯编码JPEG，仍超限则缩小尺寸重试。
+    """
+    if prefer_png:
+        png = _encode(image, 'PNG')
+        jpeg = _encode(image, 'JPEG', JPEG_QUALITY_STEPS[0])
+        if len(png) <= min(len(jpeg), max_bytes):
+            return png, 'PNG', image
+        if len(jpeg) <= max_bytes:
+            return jpeg, 'JPEG', image
+
+    while True:
+        for quality in JPEG_QUALITY_STEPS:
+            data = _encode(image, 'JPEG', quality)
+            if len(data) <= max_bytes:
+                return data, 'JPEG', image
+        width, height = image.size
+        if max(width, height) * DOWNSCALE_STEP < config.OCR_IMAGE_MIN_EDGE:
+            # 再缩小会影响识别，保留当前最小结果
+            return data, 'JPEG', image
+        image = image.resize((int(width * DOWNSCALE_STEP), int(height * DOWNSCALE_STEP)), Image.LANCZOS)
+
+
+def _prepare(source, original_bytes, max_edge=None, max_bytes=None, grayscale=None):
+    """执行预处理，返回处理信息；data 为重新编码后的字节串，无需处理或无法处理时为 None"""
+    max_edge = max_edge or config.OCR_IMAGE_MAX_EDGE
+    max_bytes = max_bytes or config.OCR_IMAGE_MAX_BYTES
+    grayscale = config.OCR_IMAGE_GRAYSCALE if grayscale is None else grayscale
+    unchanged = {'data': None, 'original_bytes': original_bytes, 'bytes': original_bytes}
+
+    try:
+        image = Image.open(source)
+    except Exception:
+        return unchanged
+
+    with image:
+        source_format = image.format
+        if source_format not in PREPROCESS_FORMATS:
+            return unchanged
+        original_size = image.size
+        orientation = image.getexif().get(0x0112, 1)
+        unchanged.update({'width': original_size[0], 'height': original_size[1], 'format': source_format})
+
+        # 已经足够小、方向正常且格式可直接识别的图片不重新编码，避免二次压缩
+        if (orientation == 1 and max(original_size) <= max_edge and original_bytes <= max_bytes
+                and source_format in ('JPEG', 'PNG')):
+            return unchanged
+
+        if source_format == 'JPEG':
+            # JPEG 在解码阶段按 2 的幂缩小，大图省去大部分解码与缩放开销
+            image.draft('RGB', (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        image = _flatten(image)
+        if max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if grayscale and image.mode != 'L' and is_near_grayscale(image):
+            image = image.convert('L')
+
+        data, fmt, image = encode_bounded(image, max_bytes, prefer_png=source_format in ('PNG', 'BMP'))
+
+    if (len(data) >= original_bytes and orientation == 1 and original_bytes <= max_bytes
+            and source_format in ('JPEG', 'PNG')):
+        # 缩放后反而更大（常见于大尺寸的简洁截图），原图本身已满足体积上限
+        return unchanged
+
+    logger.debug(
+        f"图片预处理: {original_size[0]}x{original_size[1]} {original_bytes}B -> "
+        f"{image.size[0]}x{image.size[1]} {len(data)}B ({fmt}, {image.mode})"
+    )
+    return {
+        'data': data,
+        'original_bytes': original_bytes,
+        'bytes': len(data),
+        'width': image.size[0],
+        'height': image.size[1],
+        'original_width': original_size[0],
+        'original_height': original_size[1],
+        'format': fmt,
+        'grayscale': image.mode == 'L',
+    }
+
+
+def preprocess_image(filepath, max_edge=None, max_bytes=None, grayscale=None):
+    """预处理待识别图片文件
+
+    返回 dict：path 为发送给OCR的文件路径（未处理时即原文件），temporary 表示该文件需由调用方删除，
+    另含处理前后的字节数与尺寸。无法用 Pillow 打开的文件（如PDF）原样返回。
+    """
+    result = _prepare(filepath, os.path.getsize(filepath), max_edge, max_bytes, grayscale)
+    data = result.pop('data')
+    if data is None:
+        result.update({'path': filepath, 'temporary': False})
+        return result
+
+    suffix = '.png' if result['format'] == 'PNG' else '.jpg'
+    fd, output_path = tempfile.mkstemp(prefix='ocr_', suffix=suffix)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    result.update({'path': output_path, 'temporary': True})
+    return result
+
+
+def preprocess_bytes(data, max_edge=None, max_bytes=None, grayscale=None):
+    """预处理内存中的图片，返回 dict：data 为发送给OCR的字节（未处理时即原数据），其余字段同 preprocess_image"""
+    with BufferReader(data) as source:
+        result = _prepare(source, len(data), max_edge, max_bytes, grayscale)
+    if result['data'] is None:
+        result['data'] = data
+    return result
+
+
+def discard_preprocessed(result):
+    """删除预处理生成的临时文件"""
+    if result.get('temporary'):
+        try:
+            os.remove(result['path'])
+        except OSError:
+            pass
@@ -0,0 +1,184 @@
+# services/lang_detect.py
+"""离线语言识别：按字符脚本与字符三元组判断 zh/en/ja/ko/fr/de/es/ru"""
+import math
+import unicodedata
+from collections import Counter
+
+SUPPORTED_LANGUAGES = ('zh', 'en', 'ja', 'ko', 'fr', 'de', 'es', 'ru')
+
+# 只检查前若干字符，保证长文本的识别耗时也是常数
+MAX_SAMPLE_CHARS = 400
+
+# 拉丁字母语言的三元组频率表（按频率降序，'_' 表示词边界），由 build_profile 从语料预先生成
+TRIGRAM_PROFILES = {
+    'en': (
+        '_th the he_ _an nd_ at_ tha and _to _re ed_ _of ing ng_ hat to_ of_ _yo you _we er_ '
+        '_wa _co _ha ve_ ld_ _wh or_ in_ st_ re_ ave ou_ _be ad_ _al se_ for oul uld _fo her '
+        'en_ _a_ _in thi _ch me_ ts_ is_ we_ on_ all ll_ ver eve nt_ _ne ay_ _wo _me es_ _is '
+        'was as_ so_ ead our ent _fi hin res com ost are _fr ly_ _he hav _pr pro an_ ain han '
+        'et_ _st ion om_ _on _ev ut_ est ant ear ge_ ch_ rs_ _lo _ma _sa ose _if if_ _it any '
+        'ter _sh sho rea _i_ ey_ _ar ive ved sta tio _so _de ke_ _ho ur_ had ny_ _wi ew_ _ri '
+        'out _li ar_ end _ex ell _pe ple ery ry_ way hel elp who ho_ los lea wor ork _ca can '
+        'it_ fro rom ett age cho hoo _la ext xt_ hou als lso lar ers sts chi ren day _do _ye '
+        'yea cou _le aga _ab omp how tra wou ow_ ere yth tim ime _ti eat col whe riv _at ati '
+        'eci ded _ta ake tea kin _ou rd_ bal wit ith th_ _vi ven eth own le_ ura _br rid men '
+        'whi hic ich lle _ve fri ien app lp_ isi hei eir ir_ _pl eas sur ure sav rk_ esp ond '
+        'din art rt_ mai _bu ang be_ _se _pa oos erf ce_ _te hem che ate ula bec eca cau aus '
+        'use new _im imp ove per nce _sc nti oun hil ild ldr dre vel bet tte par pec por ort '
+        'fir irs rst let wha abo bou mpa its ris sen _by by_ wel _mu muc uch ect ult owe str '
+        'ank rne ket _di cos nk_'
+    ),
+    'fr': (
+        'es_ _le nt_ _qu _de le_ que us_ ue_ ent re_ les ous de_ er_ et_ _la la_ _vo _et _po '
+        'our ur_ _pr _no pou ant _en it_ nou _av lle _pe se_ _pa _à_ est _co ons ns_ _un _l_ '
+        '_ch par des eur vou _ce il_ ait is_ _so rs_ _au tre _tr ouv res ont ez_ ion te_ _il '
+        'end un_ ois ava on_ ne_ ère ir_ uve _re _a_ ill qui ui_ urs ure _se tra ce_ rem ts_ '
+        '_dé _li _ma che _ét isi ave ièr cho eux ux_ si_ pro men _mo ssi ise pen _es st_ _an '
+        '_di ien en_ ais mes are ren mar éta tai me_ age vai ort ver _du du_ nse iss ell _pl '
+        'rt_ ens _ai _to tou per _ve str ail mer _ré ter aus uss eme nts sen sse nda dan ann '
+        'née rai ain in_ ris mme rri déc pre au_ ieu rch otr cha tro ème ge_ con sur oir rti '
+        'uel hos ose ang _d_ son plu art _vi jou heu rer vez tio _si _me fic ées ser sir nte '
+        'cou leu iez _mi vel ces erc lai ire voi nné _do oût onc _bi bie ste _fo _je je_ voy '
+        '_fa _fr roi and nd_ som omm arr riv és_ _al avo ndr dre _ta arc her pet eti tit _ba '
+        'vec ec_ une _su _ri soi elq lqu man nge ger ron ran rès ès_ pon sei eil len gen aim '
+        'ble _he aid ide der ite teu erd rdu veu ass enr nre reg egi gis ist tré ré_ out ut_ '
+        'vot rav van erm rme app ica cat ati ram _ne lus red rre pui uis pri inc al_ mai dif '
+        'ifi _on pas té_ hoi _in'
+    ),
+    'de': (
+        'en_ er_ ie_ _de der ten _di die _da _un nd_ ch_ ich che _si und _be das sch ein te_ '
+        'den es_ sie as_ ste _zu gen _wi bes _ei ir_ sen _ge _au ss_ nde sse in_ _st hen nen '
+        'ben ass eit _we nn_ _es _wa zu_ sta _ha ine _mi it_ ern ber _le wir men ind _re uch '
+        'her _ve ver hre wen cht st_ _er war _al um_ _ne tte lei mit abe aus was eic ist _in '
+        '_se rn_ len re_ rt_ vor ung enn _kö kön önn art lte les och _am am_ des ser ag_ auf '
+        'end nge ess est ebe zei _me eis ens fen ges arb rbe bei ert _sc ht_ ier rte rde ren '
+        'hle ers ese _vo ahr _ma auc nte al_ _ic rei ar_ _ka _gr rau als ls_ _an ank tel el_ '
+        'att _fu geh ehe uns itt hat ick _ab _hi _um _et etw twa res _br cke ns_ et_ ehr hr_ '
+        'fre ne_ erl hab _bi lle _ih ihr esp _pr pro nne _üb übe neu tar all ite ach he_ äch '
+        '_wä _so sol oll llt ege ig_ wis iss _ki kin tag _wo erg ter _is rst jah _sa sag ann '
+        'nnt _vi vie iel _fü für ür_ _ko _no noc mal mir gra _ba esc chl _ta zum neh ehm hme '
+        'fuß mme _im im_ ck_ _kl kle bal kon on_ _bl lic uf_ _gi us_ _fi sit itz tze ts_ ke_ '
+        'fah ahl isc usg sge chn hne mei nsc sin _fr _he lfe rne suc sic ufe bit ell sam _ar '
+        'spe pei ng_ lie amm _ni nic gie le_ eru run sei ins nst spr grö röß öße _fa bsc wäh '
+        'ähl ßer erd dem em_ _na'
+    ),
+    'es': (
+        'os_ _de el_ que ue_ _qu _el de_ _lo _la es_ los _es la_ est nte _y_ sta do_ en_ or_ '
+        'te_ as_ ar_ _co _re ent _ha ra_ res ant _po an_ to_ lo_ er_ por ado _pr ía_ aba mos '
+        '_a_ tra _pe _al del _se ien aci ció _un un_ _ta ta_ ño_ _vi men ría _me nto ba_ amo '
+        'ón_ _to _en _nu str com ura ran pue _ma _si _di tes per _su _an _le era _ci tab ión '
+        'imo nue hab _te cer con al_ _no _sa ali go_ mer _du _pu se_ ber tod rar ma_ cia nci '
+        'amb mbi tam año deb mej ejo jor ier lee dos _pa par ara cie _cu ndo lle eci _ca ues '
+        'ita ter erc ueñ eño on_ vis ist sal sca alg lgo ome nos end esc ele _mu _am ama le_ '
+        'emp mpr re_ tan _gu dad odo su_ _tr rab si_ pro gra esp arl des pri ero egi _in ema '
+        'bié ién én_ erí cio ion nes lar las uev _ve ren ños lta tad unc dur rim ime ros _añ '
+        'da_ man _au _em ió_ _fu fue omp via me_ río ío_ _gr and leg tac _as dec idi dim oma '
+        'mar has _ho cam ina ten peq equ _bu bus usc car _ce rca ca_ rec cad _ex len abl ble '
+        'sie pre _ay ayu yud uda sit han erd ido seg abe gua uar ard rda jo_ pli dej eja nde '
+        'der ued ici iar rlo inc ro_ ios no_ hay na_ rac erm gir ir_ ext olo ore ebe one reg '
+        'egu ula ari rid ida eva uel ora mie fic cos scu bie ert _ni niñ iño een esa _vo rio '
+        'io_ _má más ás_ mpl ene'
+    ),
+}
+
+
+def _build_weights(profiles):
+    """将排名表转换为 {三元组: {语言: 权重}}，排名越靠前权重越大"""
+    weights = {}
+    for lang, table in profiles.items():
+        grams = table.split()
+        size = len(grams)
+        for rank, gram in enumerate(grams):
+            weights.setdefault(gram, {})[lang] = math.log(size / (rank + 1)) + 1.0
+    return weights
+
+
+_TRIGRAM_WEIGHTS = _build_weights(TRIGRAM_PROFILES)
+
+
+def _words(text):
+    word = []
+    for ch in text:
+        if ch.isalpha():
+            word.append(ch)
+        elif word:
+            yield ''.join(word)
+            word = []
+    if word:
+        yield ''.join(word)
+
+
+def _trigrams(text):
+    for word in _words(unicodedata.normalize('NFC', text.lower())):
+        padded = f"_{word}_"
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3]
+
+
+def build_profile(texts, size=300):
+    """从语料生成三元组排名表（离线使用，结果写入 TRIGRAM_PROFILES）"""
+    counts = Counter()
+    for text in texts:
+        counts.update(_trigrams(text))
+    return ' '.join(gram for gram, _ in counts.most_common(size))
+
+
+def _script_counts(text):
+    han = kana = hangul = cyrillic = latin = 0
+    for ch in text:
+        code = ord(ch)
+        if code < 0x80:
+            if ch.isalpha():
+                latin += 1
+        elif 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+            han += 1
+        elif 0x3040 <= code <= 0x30FF or 0x31F0 <= code <= 0x31FF or 0xFF66 <= code <= 0xFF9F:
+            kana += 1
+        elif 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+            hangul += 1
+        elif 0x0400 <= code <= 0x04FF:
+            cyrillic += 1
+        elif ch.isalpha() and code <= 0x024F:
+            latin += 1
+    return han, kana, hangul, cyrillic, latin
+
+
+def _classify_latin(text):
+    scores = dict.fromkeys(TRIGRAM_PROFILES, 0.0)
+    for gram in _trigrams(text):
+        for lang, weight in _TRIGRAM_WEIGHTS.get(gram, {}).items():
+            scores[lang] += weight
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best, best_score = ranked[0]
+    second_score = ranked[1][1]
+    if best_score <= 0:
+        return 'en', 0.0
+    return best, (best_score - second_score) / best_score
+
+
+def detect_language_with_confidence(text):
+    """识别文本语言，返回 (语言代码, 置信度)；无法判断时返回 (None, 0.0)"""
+    sample = (text or '')[:MAX_SAMPLE_CHARS]
+    han, kana, hangul, cyrillic, latin = _script_counts(sample)
+    total = han + kana + hangul + cyrillic + latin
+    if total == 0:
+        return None, 0.0
+
+    # 含假名即为日文；韩文以谚文为主；其余汉字文本视为中文
+    if kana and kana * 10 >= han + kana:
+        return 'ja', (han + kana) / total
+    if hangul and hangul >= han and hangul >= latin:
+        return 'ko', hangul / total
+    if han and han >= latin and han >= cyrillic:
+        return 'zh', (han + kana) / total
+    if cyrillic and cyrillic >= latin:
+        return 'ru', cyrillic / total
+
+    lang, margin = _classify_latin(sample)
+    return lang, round(min(1.0, margin * 2) * latin / total, 4)
+
+
+def detect_language(text, default=None):
+    """识别文本语言，返回语言代码；无法判断时返回 default"""
+    lang, _ = detect_language_with_confidence(text)
+    return lang or default
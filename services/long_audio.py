@@ -0,0 +1,150 @@
+# services/long_audio.py
+"""长音频识别：按静音切分为有限长度的片段，并发识别后按时间顺序拼接"""
+import io
+import logging
+import wave
+from collections import deque
+
+from config import config
+from services.audio_tools import configure_ffmpeg, decode_pcm, probe_duration
+from services.executors import get_executor
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SILENCE_SEEK_STEP_MS = 10  # 静音检测步长，越小越精确、越慢
+SEGMENT_PADDING_MS = 200  # 片段两端保留的静音，避免切掉字头字尾
+WAV_BLOCK_SECONDS = 10  # 无ffmpeg时WAV按块重采样，每块的时长
+
+
+def _decode_wav_blocks(filepath, max_seconds):
+    from pydub import AudioSegment
+
+    pcm = bytearray()
+    with wave.open(filepath, 'rb') as f:
+        params = {'sample_width': f.getsampwidth(), 'frame_rate': f.getframerate(), 'channels': f.getnchannels()}
+        remaining = int(max_seconds * f.getframerate()) if max_seconds else f.getnframes()
+        while remaining > 0:
+            frames = f.readframes(min(remaining, WAV_BLOCK_SECONDS * f.getframerate()))
+            if not frames:
+                break
+            block = AudioSegment(data=frames, **params)
+            pcm += block.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2).raw_data
+            remaining -= int(block.frame_count())
+    return bytes(pcm)
+
+
+def load_audio(filepath, max_seconds=None):
+    """解码音频为16kHz单声道16位PCM，最多解码 max_seconds 秒
+
+    由ffmpeg解码时直接重采样（WAV同样如此），内存中只保留16kHz单声道数据；
+    没有ffmpeg时WAV按块读取并重采样，其他格式无法解码。
+    """
+    from pydub import AudioSegment
+
+    if configure_ffmpeg():
+        data = decode_pcm(filepath, SAMPLE_RATE, max_seconds)
+    elif filepath.lower().endswith('.wav'):
+        data = _decode_wav_blocks(filepath, max_seconds)
+    else:
+        raise RuntimeError('未找到ffmpeg，无法解码该格式的音频')
+    return AudioSegment(data=data, sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+
+
+def plan_segments(audio, max_ms, min_silence_ms, silence_db):
+    """按静音切分，返回 [(开始毫秒, 结束毫秒), ...]
+
+    相邻的有声区间合并到同一片段，直到片段长度将超过 max_ms；
+    超过 max_ms 且中间没有停顿的连续语音按 max_ms 强制切开。
+    """
+    from pydub.silence import detect_nonsilent
+
+    if len(audio) == 0:
+        return []
+    threshold = audio.dBFS - silence_db if audio.dBFS != float('-inf') else -60
+    ranges = detect_nonsilent(audio, min_silence_len=min_silence_ms, silence_thresh=threshold,
+                              seek_step=SILENCE_SEEK_STEP_MS)
+
+    segments = []
+    current = None
+    for start, end in ranges:
+        start, end = max(0, start - SEGMENT_PADDING_MS), min(len(audio), end + SEGMENT_PADDING_MS)
+        if current is not None and end - current[0] > max_ms:
+            segments.append(current)
+            current = None
+        while end - start > max_ms:
+            segments.append((start, start + max_ms))
+            start += max_ms
+        if current is None:
+            current = (max(start, segments[-1][1]) if segments else start, end)
+        else:
+            current = (current[0], end)
+    if current is not None:
+        segments.append(current)
+    return segments
+
+
+def _export_wav(segment):
+    buffer = io.BytesIO()
+    segment.export(buffer, format='wav')
+    return buffer.getvalue()
+
+
+def _recognize_segment(transcribe, audio, start, end):
+    data = _export_wav(audio[start:end])
+    return transcribe(data, 'wav')
+
+
+def iter_long_audio(filepath, transcribe, max_workers=None):
+    """识别长音频，按时间顺序逐段产出结果
+
+    transcribe(data, voice_format) 识别一段WAV字节。第一次产出 ('plan', {segments, duration})，
+    之后每段产出 ('segment', {index, start, end, success, text, message})，
+    片段在 'asr_long' 线程池中并发识别，最多 2*max_workers 段在途。
+    """
+    max_workers = max_workers or config.ASR_LONG_WORKERS
+    too_long = f'音频过长，请限制在{config.ASR_LONG_MAX_SECONDS // 60}分钟以内'
+    # 先按文件头/容器信息检查时长；无法探测时解码至多超出上限1秒，据此判断
+    duration = probe_duration(filepath)
+    if duration is not None and duration > config.ASR_LONG_MAX_SECONDS:
+        raise ValueError(too_long)
+    audio = load_audio(filepath, config.ASR_LONG_MAX_SECONDS + 1)
+    if len(audio) > config.ASR_LONG_MAX_SECONDS * 1000:
+        raise ValueError(too_long)
+    segments = plan_segments(
+        audio,
+        config.ASR_LONG_SEGMENT_SECONDS * 1000,
+        config.ASR_LONG_MIN_SILENCE_MS,
+        config.ASR_LONG_SILENCE_DB
+    )
+    yield 'plan', {'segments': len(segments), 'duration': len(audio) / 1000}
+
+    executor = get_executor('asr_long', max_workers)
+    pending = deque()
+
+    def emit():
+        index, start, end, future = pending.popleft()
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning(f"长音频片段识别失败: {e}")
+            result = {'success': False, 'message': str(e)}
+        return 'segment', {
+            'index': index,
+            'start': start / 1000,
+            'end': end / 1000,
+            'success': bool(result.get('success')),
+            'text': result.get('text', '') if result.get('success') else '',
+            'message': result.get('message', ''),
+        }
+
+    try:
+        for index, (start, end) in enumerate(segments):
+            pending.append((index, start, end, executor.submit(_recognize_segment, transcribe, audio, start, end)))
+            if len(pending) >= max_workers * 2:
+                yield emit()
+        while pending:
+            yield emit()
+    finally:
+        for _, _, _, future in pending:
+            future.cancel()
@@ -0,0 +1,41 @@
+# services/ocr_bytes.py
+"""把内存中的图片交给OCR服务：服务提供 recognize_from_bytes 时直接提交，否则写入临时文件后按路径识别"""
+import os
+import tempfile
+
+# 文件头 -> 扩展名，临时文件沿用图片的实际格式
+_SIGNATURES = (
+    (b'\x89PNG', '.png'),
+    (b'\xff\xd8', '.jpg'),
+    (b'BM', '.bmp'),
+)
+
+
+def accepts_bytes(ocr_service):
+    """OCR服务是否支持直接提交图片数据"""
+    return hasattr(ocr_service, 'recognize_from_bytes')
+
+
+def image_suffix(data):
+    head = bytes(data[:4])
+    for signature, suffix in _SIGNATURES:
+        if head.startswith(signature):
+            return suffix
+    return '.png'
+
+
+def recognize_bytes(ocr_service, data):
+    """识别图片字节数据（bytes 或 memoryview），结果格式与 recognize_from_path 相同"""
+    if accepts_bytes(ocr_service):
+        return ocr_service.recognize_from_bytes(data)
+
+    fd, path = tempfile.mkstemp(prefix='ocr_', suffix=image_suffix(data))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return ocr_service.recognize_from_path(path)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
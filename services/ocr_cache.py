@@ -0,0 +1,351 @@
+# services/ocr_cache.py
+"""OCR识别结果缓存：内容哈希精确命中 + 同一用户内的感知哈希（dHash）近似命中（默认关闭）"""
+import json
+import logging
+import threading
+import time
+import zlib
+
+from PIL import Image, ImageChops, ImageOps
+
+from config import config
+from services.cache import SQLiteStore
+from services.single_flight import bytes_digest, file_digest
+from services.upload_buffer import BufferReader
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+THUMBNAIL_SIZE = 256  # 近似命中复核用的灰度缩略图边长
+
+
+def dhash(image, hash_size=8):
+    """差值哈希：缩放为 (hash_size+1) x hash_size 灰度图，逐行比较相邻像素亮度"""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()
+    width = hash_size + 1
+    value = 0
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _to_signed(value):
+    """SQLite INTEGER 为有符号64位"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+class BKTree:
+    """BK树：按汉明距离组织的度量树，查询时利用三角不等式剪枝"""
+
+    def __init__(self):
+        self._root = None  # [哈希, {距离: 子节点}, 值列表]
+        self.size = 0
+
+    def add(self, key, value):
+        self.size += 1
+        if self._root is None:
+            self._root = [key, {}, [value]]
+            return
+        node = self._root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[2].append(value)
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [key, {}, [value]]
+                return
+            node = child
+
+    def search(self, key, max_distance):
+        """返回 [(距离, 哈希, 值), ...]，按距离升序"""
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node[0])
+            if distance <= max_distance:
+                results.extend((distance, node[0], value) for value in node[2])
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for d, child in node[1].items() if low <= d <= high)
+        results.sort(key=lambda item: item[0])
+        return results
+
+
+class OCRCache(SQLiteStore):
+    """OCR结果缓存
+
+    持久化在 SQLite 表 ocr_cache 中，主键为文件内容的SHA-256；感知哈希载入内存BK树做汉明距离检索。
+    max_distance 为 0（默认）时只按内容哈希精确命中。大于 0 时启用近似命中：只匹配同一用户（owner）
+    存入的结果，要求 64 位 dHash 距离不超过 max_distance、256 位细粒度 dHash 距离不超过 detail_distance、
+    宽高比相差不超过 10%，并且 256x256 灰度缩略图逐像素差值都不超过 pixel_tolerance——
+    版式相同而姓名、金额不同的单据哈希可能完全一致，只有逐像素复核才能区分。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS ocr_cache (
+            content_hash TEXT PRIMARY KEY,
+            phash INTEGER,
+            detail_hash TEXT,
+            width INTEGER,
+            height INTEGER,
+            owner INTEGER,
+            thumbnail BLOB,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_hit REAL,
+            hits INTEGER DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache (last_hit, created_at)",
+    )
+
+    def __init__(self, db_path=None, max_entries=20000, max_distance=0, detail_distance=24, pixel_tolerance=32):
+        super().__init__(db_path)
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.detail_distance = detail_distance
+        self.pixel_tolerance = pixel_tolerance
+        self._tree = BKTree()
+        self._tree_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'exact_hits': 0, 'near_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._lookup_ms = 0.0
+        self._ensure_owner_columns()
+        self._rebuild()
+
+    def _ensure_owner_columns(self):
+        """为早期创建的 ocr_cache 表补充 owner / thumbnail 列（旧记录没有缩略图，不参与近似命中）"""
+        conn = self.connect()
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(ocr_cache)")}
+        with conn:
+            if 'owner' not in columns:
+                conn.execute("ALTER TABLE ocr_cache ADD COLUMN owner INTEGER")
+            if 'thumbnail' not in columns:
+                conn.execute("ALTER TABLE ocr_cache ADD COLUMN thumbnail BLOB")
+
+    @property
+    def near_enabled(self):
+        return self.max_distance > 0
+
+    def _rebuild(self):
+        tree = BKTree()
+        rows = self.connect().execute(
+            "SELECT content_hash, phash FROM ocr_cache "
+            "WHERE phash IS NOT NULL AND owner IS NOT NULL AND thumbnail IS NOT NULL"
+        ).fetchall()
+        for row in rows:
+            tree.add(_to_unsigned(row['phash']), row['content_hash'])
+        with self._tree_lock:
+            self._tree = tree
+
+    def _count(self, name, elapsed_ms=None):
+        with self._stats_lock:
+            self._stats[name] += 1
+            if elapsed_ms is not None:
+                self._lookup_ms += elapsed_ms
+
+    @staticmethod
+    def fingerprint(filepath, perceptual=True):
+        """计算文件的内容哈希，perceptual 为真时再计算感知哈希与缩略图；无法用 Pillow 打开的文件（如PDF）只有内容哈希"""
+        content_hash = file_digest(filepath)
+        return OCRCache._image_fingerprint(content_hash, filepath) if perceptual else {'content_hash': content_hash}
+
+    @staticmethod
+    def fingerprint_bytes(data, perceptual=True):
+        """计算内存中图片的内容哈希，perceptual 为真时再计算感知哈希与缩略图"""
+        content_hash = bytes_digest(data)
+        if not perceptual:
+            return {'content_hash': content_hash}
+        with BufferReader(data) as source:
+            return OCRCache._image_fingerprint(content_hash, source)
+
+    @staticmethod
+    def _image_fingerprint(content_hash, source):
+        result = {'content_hash': content_hash, 'phash': None}
+        try:
+            with Image.open(source) as image:
+                if image.format == 'JPEG':
+                    # 解码尺寸不低于缩略图的2倍，否则与PNG等全尺寸解码的缩略图差异过大
+                    image.draft('L', (THUMBNAIL_SIZE * 2, THUMBNAIL_SIZE * 2))
+                image = ImageOps.exif_transpose(image).convert('L')
+                result.update({
+                    'phash': dhash(image),
+                    'detail_hash': format(dhash(image, 16), '064x'),
+                    'width': image.size[0],
+                    'height': image.size[1],
+                    'thumbnail': image.resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.BILINEAR).tobytes(),
+                })
+        except Exception:
+            pass
+        return result
+
+    def _load(self, conn, content_hash):
+        return conn.execute(
+            "SELECT content_hash, detail_hash, width, height, owner, thumbnail, result FROM ocr_cache "
+            "WHERE content_hash = ?",
+            (content_hash,)
+        ).fetchone()
+
+    def _is_near(self, fingerprint, row):
+        if row is None or row['owner'] is None or row['owner'] != fingerprint.get('owner'):
+            return False
+        if not row['detail_hash'] or not row['thumbnail'] or not row['height'] or not fingerprint['height']:
+            return False
+        ratio = (fingerprint['width'] / fingerprint['height']) / (row['width'] / row['height'])
+        if not 0.9 <= ratio <= 1.1:
+            return False
+        if hamming(int(fingerprint['detail_hash'], 16), int(row['detail_hash'], 16)) > self.detail_distance:
+            return False
+        # 逐像素复核：重新编码、缩放只带来轻微差异，文字不同则局部差异明显
+        size = (THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        stored = Image.frombytes('L', size, zlib.decompress(row['thumbnail']))
+        current = Image.frombytes('L', size, fingerprint['thumbnail'])
+        return ImageChops.difference(stored, current).getextrema()[1] <= self.pixel_tolerance
+
+    def _hit(self, conn, row, match, distance):
+        with conn:
+            conn.execute(
+                "UPDATE ocr_cache SET hits = hits + 1, last_hit = ? WHERE content_hash = ?",
+                (time.time(), row['content_hash'])
+            )
+        result = json.loads(row['result'])
+        result.update({'success': True, 'cached': True, 'cache_match': match, 'cache_distance': distance})
+        return result
+
+    def lookup(self, fingerprint):
+        """查询缓存，命中时返回识别结果（含 cached / cache_match），未命中返回 None"""
+        started = time.perf_counter()
+        try:
+            conn = self.connect()
+            row = self._load(conn, fingerprint['content_hash'])
+            if row is not None:
+                result = self._hit(conn, row, 'exact', 0)
+                self._count('exact_hits', (time.perf_counter() - started) * 1000)
+                return result
+
+            if self.near_enabled and fingerprint.get('phash') is not None and fingerprint.get('owner') is not None:
+                with self._tree_lock:
+                    candidates = self._tree.search(fingerprint['phash'], self.max_distance)
+                for distance, _, content_hash in candidates:
+                    row = self._load(conn, content_hash)
+                    if self._is_near(fingerprint, row):
+                        result = self._hit(conn, row, 'near', distance)
+                        self._count('near_hits', (time.perf_counter() - started) * 1000)
+                        return result
+        except Exception as e:
+            logger.warning(f"读取OCR缓存失败: {e}")
+
+        self._count('misses', (time.perf_counter() - started) * 1000)
+        return None
+
+    def store(self, fingerprint, ocr_result):
+        """保存识别成功的结果；启用近似命中时一并保存所属用户与缩略图"""
+        payload = {key: ocr_result.get(key) for key in ('text', 'detections', 'confidence', 'message')}
+        near = self.near_enabled and fingerprint.get('owner') is not None and bool(fingerprint.get('thumbnail'))
+        phash = fingerprint.get('phash') if near else None
+        try:
+            conn = self.connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO ocr_cache "
+                    "(content_hash, phash, detail_hash, width, height, owner, thumbnail, result, created_at, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (
+                        fingerprint['content_hash'],
+                        None if phash is None else _to_signed(phash),
+                        fingerprint.get('detail_hash') if near else None,
+                        fingerprint.get('width'),
+                        fingerprint.get('height'),
+                        fingerprint.get('owner') if near else None,
+                        zlib.compress(fingerprint['thumbnail']) if near else None,
+                        json.dumps(payload, ensure_ascii=False),
+                        time.time(),
+                    )
+                )
+            if cursor.rowcount:
+                self._count('writes')
+                if phash is not None:
+                    with self._tree_lock:
+                        self._tree.add(phash, fingerprint['content_hash'])
+                self._evict_if_needed(conn)
+        except Exception as e:
+            logger.warning(f"写入OCR缓存失败: {e}")
+
+    def _evict_if_needed(self, conn):
+        """超过容量时一次淘汰最久未使用的 10%，随后重建BK树"""
+        count = conn.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - self.max_entries + max(1, self.max_entries // 10)
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM ocr_cache WHERE content_hash IN ("
+                "SELECT content_hash FROM ocr_cache ORDER BY COALESCE(last_hit, created_at) LIMIT ?)",
+                (excess,)
+            )
+        with self._stats_lock:
+            self._stats['evictions'] += cursor.rowcount
+        self._rebuild()
+
+    def clear(self):
+        conn = self.connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM ocr_cache")
+        with self._tree_lock:
+            self._tree = BKTree()
+        return cursor.rowcount
+
+    def stats(self):
+        """返回命中率与查询耗时"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            lookup_ms = self._lookup_ms
+        hits = stats['exact_hits'] + stats['near_hits']
+        lookups = hits + stats['misses']
+        with self._tree_lock:
+            indexed = self._tree.size
+        stats.update({
+            'hits': hits,
+            'lookups': lookups,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'avg_lookup_ms': round(lookup_ms / lookups, 3) if lookups else 0.0,
+            'indexed_hashes': indexed,
+            'max_entries': self.max_entries,
+            'max_distance': self.max_distance,
+        })
+        return stats
+
+
+_ocr_cache = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache():
+    """获取OCR结果缓存单例"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        with _ocr_cache_lock:
+            if _ocr_cache is None:
+                _ocr_cache = OCRCache(
+                    max_entries=config.OCR_CACHE_MAX_ENTRIES,
+                    max_distance=config.OCR_CACHE_MAX_DISTANCE,
+                    detail_distance=config.OCR_CACHE_DETAIL_DISTANCE,
+                    pixel_tolerance=config.OCR_CACHE_PIXEL_TOLERANCE
+                )
+    return _ocr_cache
@@ -0,0 +1,315 @@
+# services/ocr_tiler.py
+"""超大图片分块OCR：切分为相互重叠的图块并发识别，按框几何去重后重建阅读顺序"""
+import io
+import logging
+from difflib import SequenceMatcher
+
+from PIL import Image, ImageOps
+
+from config import config
+from services.executors import get_executor
+from services.text_segmenter import join_fragments
+
+logger = logging.getLogger(__name__)
+
+TILE_JPEG_QUALITY_STEPS = (90, 80, 70)
+
+
+def plan_tiles(width, height, tile_size, overlap):
+    """规划图块，返回 [(x, y, w, h), ...]；相邻图块重叠 overlap 像素，最后一块贴齐边缘"""
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        step = tile_size - overlap
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def needs_tiling(width, height):
+    """长截图（宽高比超过阈值）或超出最长边上限的图片需要分块，否则整图缩放会让文字过小"""
+    long_edge, short_edge = max(width, height), max(min(width, height), 1)
+    if long_edge > config.OCR_TILE_TRIGGER_EDGE:
+        return True
+    return long_edge > config.OCR_IMAGE_MAX_EDGE and long_edge / short_edge >= config.OCR_TILE_TRIGGER_ASPECT
+
+
+def image_size(source):
+    """读取图片尺寸（按EXIF方向校正后），无法识别的文件返回 None"""
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+            if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+    except Exception:
+        return None
+
+
+def detection_box(detection):
+    """取检测结果的外接矩形 (x1, y1, x2, y2)，支持 box=[x, y, w, h] 与 polygon 两种格式"""
+    box = detection.get('box')
+    if box:
+        x, y, w, h = box
+        return x, y, x + w, y + h
+    points = detection.get('polygon') or []
+    if not points:
+        return None
+    xs = [p['x'] if isinstance(p, dict) else p[0] for p in points]
+    ys = [p['y'] if isinstance(p, dict) else p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _offset(detection, dx, dy):
+    x1, y1, x2, y2 = detection['_box']
+    shifted = dict(detection)
+    shifted['_box'] = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+    shifted['box'] = [x1 + dx, y1 + dy, x2 - x1, y2 - y1]
+    if detection.get('polygon'):
+        shifted['polygon'] = [
+            {'x': (p['x'] if isinstance(p, dict) else p[0]) + dx, 'y': (p['y'] if isinstance(p, dict) else p[1]) + dy}
+            for p in detection['polygon']
+        ]
+    return shifted
+
+
+def _area(box):
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+
+def _intersection(a, b):
+    return _area((max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])))
+
+
+def _same_text(a, b):
+    a, b = a.strip(), b.strip()
+    if not a or not b:
+        return False
+    if a in b or b in a:
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= 0.8
+
+
+def _text_overlap(left, right, min_chars=3):
+    """left 的后缀与 right 的前缀相同的最大长度，不足 min_chars 返回 0"""
+    for size in range(min(len(left), len(right)), min_chars - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _stitch_line(items):
+    """拼接同一行中被图块竖边截断的片段：来自不同图块、框横向相交且文字首尾重叠的相邻片段合为一个"""
+    stitched = []
+    for item in sorted(items, key=lambda d: d['_box'][0]):
+        if stitched:
+            left = stitched[-1]
+            if left['_tile'] != item['_tile'] and item['_box'][0] < left['_box'][2] < item['_box'][2]:
+                size = _text_overlap(left['text'], item['text'])
+                if size:
+                    x1, y1, x2, y2 = left['_box']
+                    box = (x1, min(y1, item['_box'][1]), item['_box'][2], max(y2, item['_box'][3]))
+                    left = dict(left, text=left['text'] + item['text'][size:], _box=box, _tile=item['_tile'])
+                    left['box'] = [box[0], box[1], box[2] - box[0], box[3] - box[1]]
+                    left.pop('polygon', None)
+                    stitched[-1] = left
+                    continue
+        stitched.append(item)
+    return stitched
+
+
+def merge_detections(tile_results, overlap_ratio=0.6):
+    """合并各图块的检测结果
+
+    tile_results 为 [((x, y, w, h), detections), ...]，检测框为图块内坐标。
+    来自不同图块、框的交集占较小框面积不少于 overlap_ratio 且文字相近的检测视为重复，
+    保留文字更长（未被图块边缘截断）的一个。返回按阅读顺序排列的检测列表。
+    """
+    merged = []
+    for tile_index, ((tx, ty, _, _), detections) in enumerate(tile_results):
+        for detection in detections:
+            box = detection_box(detection)
+            if box is None:
+                continue
+            item = _offset(dict(detection, _box=box), tx, ty)
+            item['_tile'] = tile_index
+            merged.append(item)
+
+    # 按上边缘排序后，只需和纵向范围有交集的候选比较
+    merged.sort(key=lambda d: d['_box'][1])
+    kept = []
+    for item in merged:
+        box = item['_box']
+        duplicate = None
+        for other in reversed(kept):
+            if other['_box'][3] < box[1] - (box[3] - box[1]) * 4:
+                break
+            if other['_tile'] == item['_tile']:
+                continue
+            smaller = min(_area(box), _area(other['_box'])) or 1
+            if _intersection(box, other['_box']) / smaller >= overlap_ratio and _same_text(item['text'], other['text']):
+                duplicate = other
+                break
+        if duplicate is None:
+            kept.append(item)
+        elif len(item['text'].strip()) > len(duplicate['text'].strip()):
+            kept[kept.index(duplicate)] = item
+
+    return reading_order(kept)
+
+
+def _columns(detections):
+    """按横向投影切分栏：所有检测框在横向上都不覆盖、且宽于两倍中位行高的空白带视为栏间距
+
+    任一栏少于3个检测时不分栏（如页码、侧边标注），保持整体按行排序。
+    """
+    if len(detections) < 2:
+        return [detections]
+    heights = sorted(d['_box'][3] - d['_box'][1] for d in detections)
+    min_gap = 2 * heights[len(heights) // 2]
+    splits = []
+    right = None
+    for x1, _, x2, _ in sorted(d['_box'] for d in detections):
+        if right is not None and x1 - right >= min_gap:
+            splits.append((right + x1) / 2)
+        right = x2 if right is None else max(right, x2)
+    columns = [[] for _ in range(len(splits) + 1)]
+    for item in detections:
+        columns[sum(1 for split in splits if item['_box'][0] > split)].append(item)
+    if any(len(column) < 3 for column in columns):
+        return [detections]
+    return columns
+
+
+def _lines(detections):
+    lines = []
+    for item in sorted(detections, key=lambda d: (d['_box'][1] + d['_box'][3]) / 2):
+        x1, y1, x2, y2 = item['_box']
+        height = max(y2 - y1, 1)
+        if lines:
+            line = lines[-1]
+            overlap = min(y2, line['bottom']) - max(y1, line['top'])
+            if overlap >= 0.5 * min(height, line['bottom'] - line['top']):
+                line['items'].append(item)
+                line['top'], line['bottom'] = min(line['top'], y1), max(line['bottom'], y2)
+                continue
+        lines.append({'top': y1, 'bottom': y2, 'items': [item]})
+    return lines
+
+
+def reading_order(detections):
+    """重建阅读顺序：先分栏，栏内纵向范围重叠过半的检测归为同一行，行内从左到右并拼接被截断的片段"""
+    lines = [line for column in _columns(detections) for line in _lines(column)]
+    ordered = []
+    for line_index, line in enumerate(lines):
+        for item in _stitch_line(line['items']):
+            item = {k: v for k, v in item.items() if not k.startswith('_')}
+            item['line'] = line_index
+            ordered.append(item)
+    return ordered
+
+
+def _encode_tile(tile, max_bytes):
+    """图块编码为JPEG，只降低质量不缩小尺寸，保证检测框坐标与图块像素一致"""
+    data = b''
+    for quality in TILE_JPEG_QUALITY_STEPS:
+        buffer = io.BytesIO()
+        tile.save(buffer, 'JPEG', quality=quality)
+        data = buffer.getvalue()
+        if len(data) <= max_bytes:
+            break
+    return data
+
+
+def _recognize_tile(recognize, tile, max_bytes):
+    data = _encode_tile(tile, max_bytes)
+    tile.close()
+    return recognize(data)
+
+
+def _placeable(result):
+    """图块的检测结果是否都带有可定位的检测框（无文字的检测不计）"""
+    detections = [d for d in result.get('detections') or [] if (d.get('text') or '').strip()]
+    return bool(detections) and all(detection_box(d) is not None for d in detections)
+
+
+def _compose_text(detections, fallbacks):
+    """按行拼接检测文字；无法定位的图块整块文字按图块上边缘插入到其下方第一行之前"""
+    lines = {}
+    for detection in detections:
+        lines.setdefault(detection['line'], []).append(detection)
+    blocks = [
+        (min(d['box'][1] for d in items), join_fragments([d['text'] for d in items]))
+        for _, items in sorted(lines.items())
+    ]
+    for top, text in sorted(fallbacks):
+        position = next((i for i, (line_top, _) in enumerate(blocks) if line_top >= top), len(blocks))
+        blocks.insert(position, (top, text))
+    return '\n'.join(text for _, text in blocks)
+
+
+def recognize_tiled(source, recognize, tile_size=None, overlap=None, max_workers=None):
+    """分块识别大图
+
+    source 为文件路径或文件对象；recognize(data) 识别单个图块的JPEG字节并返回带检测框的结果。
+    返回与单张图片识别相同格式的结果，另含 tiles（图块数）。检测结果缺少检测框的图块改用其整块 text；
+    部分图块识别失败时仍返回其余内容，但标记 partial（调用方不应缓存该结果）。
+    """
+    tile_size = tile_size or config.OCR_TILE_SIZE
+    overlap = config.OCR_TILE_OVERLAP if overlap is None else overlap
+    max_workers = max_workers or config.OCR_TILE_WORKERS
+
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    tiles = plan_tiles(image.width, image.height, tile_size, overlap)
+
+    executor = get_executor('ocr_tiles', max_workers)
+    futures = [
+        executor.submit(_recognize_tile, recognize, image.crop((x, y, x + w, y + h)), config.OCR_IMAGE_MAX_BYTES)
+        for x, y, w, h in tiles
+    ]
+    image.close()
+
+    tile_results = []
+    fallbacks = []
+    failures = []
+    for box, future in zip(tiles, futures):
+        try:
+            result = future.result()
+        except Exception as e:
+            failures.append(str(e))
+            continue
+        if not result.get('success'):
+            failures.append(result.get('message', ''))
+        elif _placeable(result) or not (result.get('text') or '').strip():
+            tile_results.append((box, result.get('detections') or []))
+        else:
+            fallbacks.append((box[1], result['text'].strip()))
+
+    if len(failures) == len(tiles):
+        return {'success': False, 'message': failures[0] or '分块识别失败', 'tiles': len(tiles)}
+
+    detections = merge_detections(tile_results)
+    confidences = [d['confidence'] for d in detections if d.get('confidence') is not None]
+    if fallbacks:
+        logger.warning(f"分块识别: {len(fallbacks)}/{len(tiles)} 个图块的检测结果缺少检测框，使用整块文字")
+    if failures:
+        logger.warning(f"分块识别: {len(failures)}/{len(tiles)} 个图块失败")
+    return {
+        'success': True,
+        'message': '识别成功' if not failures else f'识别完成，{len(failures)}个图块失败',
+        'text': _compose_text(detections, fallbacks),
+        'detections': detections,
+        'confidence': sum(confidences) / len(confidences) if confidences else 0,
+        'tiles': len(tiles),
+        'failed_tiles': len(failures),
+        'partial': bool(failures),
+    }
@@ -0,0 +1,123 @@
+# services/pdf_ocr.py
+"""多页PDF逐页识别：有文字层的页面直接提取文本，扫描页逐页栅格化后并发OCR"""
+import logging
+import os
+import tempfile
+from collections import deque
+
+from config import config
+from services.executors import get_executor
+
+logger = logging.getLogger(__name__)
+
+
+def _open_document(filepath):
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        raise RuntimeError("PDF识别需要安装 PyMuPDF（pip install PyMuPDF）")
+    return fitz, fitz.open(filepath)
+
+
+def count_pages(filepath):
+    """返回PDF页数"""
+    _, document = _open_document(filepath)
+    with document:
+        return document.page_count
+
+
+def _render_page(fitz, page, dpi):
+    """把单页栅格化为灰度PNG临时文件，像素缓冲在写盘后立即释放"""
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    fd, path = tempfile.mkstemp(prefix='pdf_page_', suffix='.png')
+    os.close(fd)
+    try:
+        pixmap.save(path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def _recognize_page(recognize, page_number, image_path):
+    try:
+        result = recognize(image_path)
+    finally:
+        try:
+            os.remove(image_path)
+        except OSError:
+            pass
+    return {
+        'page': page_number,
+        'source': 'ocr',
+        'success': bool(result.get('success')),
+        'text': result.get('text', ''),
+        'confidence': result.get('confidence'),
+        'cached': result.get('cached', False),
+        'message': result.get('message', ''),
+    }
+
+
+def iter_pdf_pages(filepath, recognize, dpi=None, window=None, min_text_chars=None, max_pages=None):
+    """逐页识别PDF，按页码顺序依次产出每页结果
+
+    recognize(image_path) 为单张图片的识别函数。文字层不少于 min_text_chars 个字符的页面不做OCR；
+    扫描页在当前线程逐页栅格化后提交到线程池识别，同时在途的页面最多 window 个，
+    因此任意时刻最多只有 window 张栅格化页面（以临时PNG文件形式）存在。
+    """
+    dpi = dpi or config.PDF_RENDER_DPI
+    window = window or config.PDF_OCR_WORKERS
+    min_text_chars = config.PDF_TEXT_LAYER_MIN_CHARS if min_text_chars is None else min_text_chars
+    max_pages = max_pages or config.PDF_MAX_PAGES
+
+    fitz, document = _open_document(filepath)
+    executor = get_executor('pdf', window)
+    pending = deque()
+
+    def take():
+        page_number, item, _ = pending.popleft()
+        if isinstance(item, dict):
+            return item
+        try:
+            return item.result()
+        except Exception as e:
+            logger.error(f"PDF第{page_number}页识别异常: {e}")
+            return {'page': page_number, 'source': 'ocr', 'success': False, 'text': '', 'message': f'识别失败: {e}'}
+
+    try:
+        with document:
+            for index in range(min(document.page_count, max_pages)):
+                page_number = index + 1
+                page = document.load_page(index)
+                text = page.get_text('text').strip()
+                if len(text) >= min_text_chars:
+                    pending.append((page_number, {
+                        'page': page_number,
+                        'source': 'text_layer',
+                        'success': True,
+                        'text': text,
+                        'confidence': None,
+                        'cached': False,
+                        'message': '已提取文字层',
+                    }, None))
+                else:
+                    image_path = _render_page(fitz, page, dpi)
+                    future = executor.submit(_recognize_page, recognize, page_number, image_path)
+                    pending.append((page_number, future, image_path))
+                page = None
+
+                # 已完成的页面按顺序立即产出；在途页面达到上限时等待最早的一页
+                while pending and (isinstance(pending[0][1], dict) or pending[0][1].done()):
+                    yield take()
+                if len(pending) >= window:
+                    yield take()
+            while pending:
+                yield take()
+    finally:
+        # 提前结束（如客户端断开）时取消尚未开始的页面并清理其临时文件
+        for _, item, image_path in pending:
+            if not isinstance(item, dict) and item.cancel():
+                try:
+                    os.remove(image_path)
+                except OSError:
+                    pass
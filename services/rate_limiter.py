@@ -0,0 +1,206 @@
+# services/rate_limiter.py
+"""腾讯云接口调用限流：令牌桶限制QPS + AIMD自适应并发控制"""
+import logging
+import threading
+import time
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 判定为被服务端限流的错误特征
+THROTTLE_MARKERS = ('RequestLimitExceeded', 'LimitExceeded', 'TooManyRequests', '请求频率', '频率超限')
+
+
+class RateLimitTimeout(Exception):
+    """在截止时间内未能获得调用许可"""
+
+
+def is_throttled(error_or_message):
+    """判断错误信息是否表示被限流"""
+    text = str(error_or_message or '')
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """令牌桶：以 rate 个/秒补充，最多积累 capacity 个"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, deadline):
+        """取一个令牌，必要时等待到 deadline（time.monotonic 时间），超时返回 False"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class AIMDLimiter:
+    """AIMD并发控制：成功时并发上限加性增长，被限流时乘性减小"""
+
+    def __init__(self, initial, minimum=1, maximum=None, increase=1.0, decrease=0.5):
+        self.minimum = minimum
+        self.maximum = maximum or max(initial, minimum)
+        self.increase = increase
+        self.decrease = decrease
+        self._limit = float(min(max(initial, minimum), self.maximum))
+        self._in_flight = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self, deadline):
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._in_flight >= int(self._limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+                return True
+            finally:
+                self._waiting -= 1
+
+    def release(self, throttled=False):
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._limit = max(self.minimum, self._limit * self.decrease)
+            else:
+                # 每完成一个窗口（约 limit 次调用）上限加 increase
+                self._limit = min(self.maximum, self._limit + self.increase / max(self._limit, 1.0))
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'concurrency_limit': int(self._limit),
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+            }
+
+
+class ProviderGate:
+    """单个云接口的调用闸门，组合令牌桶与AIMD并发控制
+
+    调用方在截止时间前排队等待许可，而不是直接失败；超时抛出 RateLimitTimeout。
+    """
+
+    def __init__(self, name, qps, max_concurrency, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.bucket = TokenBucket(qps)
+        self.concurrency = AIMDLimiter(initial=max_concurrency, maximum=max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats = {'calls': 0, 'throttled': 0, 'timeouts': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def call(self, fn, *args, **kwargs):
+        deadline = time.monotonic() + self.timeout
+        if not self.concurrency.acquire(deadline):
+            self._count('timeouts')
+            raise RateLimitTimeout(f"{self.name} 服务繁忙，排队超时")
+        throttled = False
+        try:
+            if not self.bucket.acquire(deadline):
+                self._count('timeouts')
+                raise RateLimitTimeout(f"{self.name} 服务繁忙，排队超时")
+            self._count('calls')
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttled(e)
+                self._count('throttled' if throttled else 'errors')
+                raise
+            # 服务封装通常以 {'success': False, 'message': ...} 返回错误
+            if isinstance(result, dict) and not result.get('success', True) and is_throttled(result.get('message')):
+                throttled = True
+                self._count('throttled')
+            return result
+        finally:
+            self.concurrency.release(throttled=throttled)
+            if throttled:
+                logger.warning(f"{self.name} 接口被限流，并发上限降为 {self.concurrency.limit}")
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(self.concurrency.snapshot())
+        stats.update({
+            'qps': self.bucket.rate,
+            'tokens_available': round(self.bucket.available(), 2),
+            'timeout': self.timeout,
+        })
+        return stats
+
+
+class GatedService:
+    """服务代理：对指定方法的调用经过 ProviderGate，其余属性原样透传"""
+
+    def __init__(self, service, gate, methods):
+        self._service = service
+        self._gate = gate
+        self._methods = set(methods)
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if name in self._methods and callable(attr):
+            def gated(*args, **kwargs):
+                return self._gate.call(attr, *args, **kwargs)
+            return gated
+        return attr
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_gate(name):
+    """获取指定接口（ocr / translate / tts / asr）的调用闸门"""
+    with _gates_lock:
+        gate = _gates.get(name)
+        if gate is None:
+            limits = config.PROVIDER_RATE_LIMITS.get(name, {})
+            gate = _gates[name] = ProviderGate(
+                name,
+                qps=limits.get('qps', 5),
+                max_concurrency=limits.get('concurrency', 5),
+                timeout=config.PROVIDER_QUEUE_TIMEOUT
+            )
+        return gate
+
+
+def rate_limit_stats():
+    """返回全部接口当前的限流参数与排队情况"""
+    with _gates_lock:
+        gates = list(_gates.values())
+    return {gate.name: gate.snapshot() for gate in gates}
@@ -0,0 +1,97 @@
+# services/single_flight.py
+"""合并相同的并发服务调用（single-flight）"""
+import hashlib
+import threading
+from concurrent.futures import Future
+
+
+def make_request_key(*parts):
+    """根据请求参数生成合并键"""
+    raw = '\x1f'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def file_digest(filepath, chunk_size=1024 * 1024):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    """计算内存数据（bytes / memoryview）的SHA-256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _own(result):
+    return dict(result) if isinstance(result, dict) else result
+
+
+class SingleFlight:
+    """同一个键同时只执行一次调用
+
+    第一个调用方负责执行，其余并发调用方等待同一个 Future 并共享其结果；
+    执行抛出的异常同样会传递给所有等待者。调用结束后键即释放，不做结果缓存。
+    结果为 dict 时每个调用方各得到一份浅拷贝，调用方修改结果字段不会影响其他等待者。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'executions': 0, 'coalesced': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self._stats['calls'] += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats['executions'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            return _own(future.result())
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return _own(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name):
+    """获取指定服务的 SingleFlight 实例"""
+    with _flights_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight(name)
+        return flight
+
+
+def single_flight_stats():
+    """返回全部 SingleFlight 实例的统计"""
+    with _flights_lock:
+        flights = list(_flights.values())
+    return {flight.name: flight.stats() for flight in flights}
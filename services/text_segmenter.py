@@ -0,0 +1,169 @@
+# services/text_segmenter.py
+"""文本分句工具：同时识别中日韩与拉丁语系的句末标点"""
+
+# 中日韩句末标点（出现即断句）
+CJK_TERMINATORS = '。！？…．'
+# 拉丁语系句末标点（其后须为空白或文本结尾才断句）
+LATIN_TERMINATORS = '.!?'
+# 句末标点之后仍属于本句的闭合符号
+CLOSING_MARKS = '"\'”’」』）)】]》>'
+# 句点后不应断句的常见缩写
+ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc',
+    'e.g', 'i.e', 'no', 'fig', 'inc', 'ltd', 'co', 'jan', 'feb', 'mar',
+    'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+}
+# 句子之间不使用空格分隔的目标语言
+NO_SPACE_LANGS = {'zh', 'ja', 'zh-tw', 'zh-hk', 'zh-cn'}
+
+
+def _ends_with_abbreviation(text):
+    words = text.rsplit(None, 1)
+    if not words:
+        return False
+    word = words[-1].lower().lstrip('(\'"')
+    # 单个字母（如姓名缩写 J. K.）同样视为缩写
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def split_sentences(text):
+    """将文本切分为句子
+
+    返回 [(句子, 分隔符), ...]，分隔符为句子之后的空白（可能包含换行）。
+    满足 ''.join(s + sep for s, sep in result) == text，便于翻译后按原结构拼接。
+    """
+    pieces = []
+    n = len(text)
+    start = 0
+    i = 0
+
+    # 文本开头的空白单独作为一个空句子的分隔符保留
+    while i < n and text[i].isspace():
+        i += 1
+    if i:
+        pieces.append(('', text[:i]))
+        start = i
+
+    def emit(end, sep_end):
+        content = text[start:end]
+        stripped = content.rstrip()
+        pieces.append((stripped, content[len(stripped):] + text[end:sep_end]))
+
+    while i < n:
+        ch = text[i]
+
+        if ch == '\n':
+            j = i
+            while j < n and text[j].isspace():
+                j += 1
+            emit(i, j)
+            start = i = j
+            continue
+
+        if ch in CJK_TERMINATORS or ch in LATIN_TERMINATORS:
+            j = i + 1
+            while j < n and (text[j] in CJK_TERMINATORS or text[j] in LATIN_TERMINATORS):
+                j += 1
+            while j < n and text[j] in CLOSING_MARKS:
+                j += 1
+
+            if ch in LATIN_TERMINATORS:
+                # 拉丁标点：要求其后为空白，并排除小数、缩写
+                if j < n and not text[j].isspace():
+                    i = j
+                    continue
+                if ch == '.' and j == i + 1 and _ends_with_abbreviation(text[start:i]):
+                    i = j
+                    continue
+
+            k = j
+            while k < n and text[k].isspace() and text[k] != '\n':
+                k += 1
+            if k < n and text[k] == '\n':
+                while k < n and text[k].isspace():
+                    k += 1
+            emit(j, k)
+            start = i = k
+            continue
+
+        i += 1
+
+    if start < n:
+        emit(n, n)
+
+    return pieces
+
+
+def join_separator(separator, target_lang):
+    """根据目标语言调整句间分隔符
+
+    中文、日文句子之间不需要空格；其他语言的句子之间至少保留一个空格。换行保持不变。
+    """
+    if '\n' in separator:
+        return separator
+    if (target_lang or '').lower() in NO_SPACE_LANGS:
+        return ''
+    return separator or ' '
+
+
+def join_sentences(pieces, target_lang):
+    """将 [(译文, 原分隔符), ...] 按目标语言拼接为完整文本"""
+    parts = []
+    last = len(pieces) - 1
+    for index, (sentence, separator) in enumerate(pieces):
+        parts.append(sentence)
+        if index < last:
+            parts.append(join_separator(separator, target_lang))
+        else:
+            parts.append(separator if '\n' in separator else '')
+    return ''.join(parts)
+
+
+def join_fragments(parts):
+    """拼接识别出的文本片段：两侧都是拉丁字母或数字时加空格，中文、日文等直接相连"""
+    text = ''
+    for part in parts:
+        part = (part or '').strip()
+        if not part:
+            continue
+        if text and text[-1].isascii() and text[-1].isalnum() and part[0].isascii() and part[0].isalnum():
+            text += ' '
+        text += part
+    return text
+
+
+def group_sentences(pieces, max_chars):
+    """将句子按长度合并为块，用于分块翻译、分段合成等场景
+
+    块在段落（换行）处优先截断，单块长度尽量不超过 max_chars；超长的单句独立成块。
+    返回 [(块文本, 块后分隔符), ...]，块内句子保留原分隔符。
+    """
+    chunks = []
+    current = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            text = ''.join(s + sep for s, sep in current[:-1]) + current[-1][0]
+            chunks.append((text, current[-1][1]))
+        current = []
+        size = 0
+
+    for sentence, separator in pieces:
+        if not sentence:
+            if current:
+                last_sentence, last_separator = current[-1]
+                current[-1] = (last_sentence, last_separator + separator)
+            elif chunks:
+                chunks[-1] = (chunks[-1][0], chunks[-1][1] + separator)
+            continue
+        if current and size + len(sentence) > max_chars:
+            flush()
+        current.append((sentence, separator))
+        size += len(sentence) + len(separator)
+        # 段落结束且已接近上限时提前截断，使块尽量对齐段落
+        if '\n' in separator and size >= max_chars // 2:
+            flush()
+    flush()
+    return chunks
@@ -0,0 +1,137 @@
+# services/transcript_cache.py
+"""语音识别结果缓存：以解码、规范化后的PCM哈希为键，换容器封装、采样率、声道数的相同音频也能命中"""
+import json
+import logging
+import threading
+import time
+
+from config import config
+from services.cache import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+CACHED_FIELDS = ('text', 'message', 'duration')
+
+
+class TranscriptCache(SQLiteStore):
+    """语音识别结果缓存
+
+    键为 (规范化PCM的SHA-256, 识别引擎)，结果保存在表 transcript_cache 中。
+    总字节数（结果JSON长度）超过 max_bytes 时按最近使用时间淘汰，直到降到 max_bytes 的 90%。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS transcript_cache (
+            cache_key TEXT PRIMARY KEY,
+            result TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_transcript_cache_lru ON transcript_cache (last_access)",
+    )
+
+    def __init__(self, max_bytes, db_path=None):
+        super().__init__(db_path)
+        self.max_bytes = max_bytes
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._bytes = self.connect().execute("SELECT COALESCE(SUM(size), 0) FROM transcript_cache").fetchone()[0]
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def lookup(self, key):
+        """查询缓存，命中时返回识别结果（含 cached=True），未命中返回 None"""
+        try:
+            conn = self.connect()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE transcript_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?",
+                    (time.time(), key)
+                )
+                row = None
+                if cursor.rowcount:
+                    row = conn.execute("SELECT result FROM transcript_cache WHERE cache_key = ?", (key,)).fetchone()
+        except Exception as e:
+            logger.warning(f"读取语音识别缓存失败: {e}")
+            row = None
+
+        if row is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        result = json.loads(row['result'])
+        result.update({'success': True, 'cached': True})
+        return result
+
+    def store(self, key, result):
+        """保存识别成功且有文本的结果"""
+        if not result.get('success') or not result.get('text'):
+            return
+        payload = json.dumps({field: result.get(field) for field in CACHED_FIELDS}, ensure_ascii=False)
+        size = len(payload.encode('utf-8')) + len(key)
+        now = time.time()
+        try:
+            conn = self.connect()
+            with conn:
+                previous = conn.execute("SELECT size FROM transcript_cache WHERE cache_key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO transcript_cache (cache_key, result, size, created_at, last_access, hits) "
+                    "VALUES (?, ?, ?, ?, ?, 0)",
+                    (key, payload, size, now, now)
+                )
+            with self._stats_lock:
+                self._bytes += size - (previous['size'] if previous else 0)
+                self._stats['writes'] += 1
+            if self._bytes > self.max_bytes:
+                self._evict(conn)
+        except Exception as e:
+            logger.warning(f"写入语音识别缓存失败: {e}")
+
+    def _evict(self, conn):
+        """按最近使用时间淘汰，直到总字节数降到预算的 90%"""
+        target = self.max_bytes * 0.9
+        with self._stats_lock:
+            total = self._bytes
+        victims = []
+        for row in conn.execute("SELECT cache_key, size FROM transcript_cache ORDER BY last_access"):
+            if total <= target:
+                break
+            victims.append((row['cache_key'],))
+            total -= row['size']
+        with conn:
+            conn.executemany("DELETE FROM transcript_cache WHERE cache_key = ?", victims)
+        with self._stats_lock:
+            self._bytes = total
+            self._stats['evictions'] += len(victims)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': self.connect().execute("SELECT COUNT(*) FROM transcript_cache").fetchone()[0],
+            'max_bytes': self.max_bytes,
+            'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+        })
+        return stats
+
+
+_transcript_cache = None
+_transcript_cache_lock = threading.Lock()
+
+
+def get_transcript_cache():
+    """获取语音识别结果缓存单例"""
+    global _transcript_cache
+    if _transcript_cache is None:
+        with _transcript_cache_lock:
+            if _transcript_cache is None:
+                _transcript_cache = TranscriptCache(max_bytes=config.ASR_CACHE_MAX_BYTES)
+    return _transcript_cache
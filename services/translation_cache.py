@@ -0,0 +1,192 @@
+# services/translation_cache.py
+"""翻译结果缓存：内存LRU + SQLite持久化两级缓存"""
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+
+from config import config
+from services.cache import LRUCache, SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """规范化待翻译文本，使等价输入得到相同的缓存键"""
+    text = unicodedata.normalize('NFC', text or '')
+    return text.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+class TranslationCache(SQLiteStore):
+    """翻译结果两级缓存
+
+    一级为进程内LRU（按容量和TTL淘汰），二级为SQLite表 translation_cache，
+    键为 (规范化文本, 源语言, 目标语言) 的SHA-256。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS translation_cache (
+            cache_key TEXT PRIMARY KEY,
+            source_lang VARCHAR(10) NOT NULL,
+            target_lang VARCHAR(10) NOT NULL,
+            translated_text TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_hit REAL,
+            hits INTEGER DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_translation_cache_created ON translation_cache (created_at)",
+    )
+
+    def __init__(self, db_path=None, max_size=2048, ttl=None):
+        super().__init__(db_path)
+        self.ttl = ttl
+        self.memory = LRUCache(max_size=max_size, ttl=ttl)
+        self._stats_lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'writes': 0}
+
+    @staticmethod
+    def make_key(text, source_lang, target_lang):
+        """生成缓存键"""
+        raw = '\x1f'.join([(source_lang or '').lower(), (target_lang or '').lower(), normalize_text(text)])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, text, source_lang, target_lang):
+        """查询缓存，未命中返回 None"""
+        key = self.make_key(text, source_lang, target_lang)
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        now = time.time()
+        try:
+            conn = self.connect()
+            row = conn.execute(
+                "SELECT translated_text, created_at FROM translation_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl and row['created_at'] + self.ttl < now:
+                with conn:
+                    conn.execute("DELETE FROM translation_cache WHERE cache_key = ?", (key,))
+                row = None
+            if row is not None:
+                with conn:
+                    conn.execute(
+                        "UPDATE translation_cache SET hits = hits + 1, last_hit = ? WHERE cache_key = ?",
+                        (now, key)
+                    )
+        except Exception as e:
+            logger.warning(f"读取翻译缓存失败: {e}")
+            row = None
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        self._count('db_hits')
+        self.memory.set(key, row['translated_text'])
+        return row['translated_text']
+
+    def set(self, text, source_lang, target_lang, translated_text):
+        """写入缓存"""
+        key = self.make_key(text, source_lang, target_lang)
+        self.memory.set(key, translated_text)
+        try:
+            conn = self.connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO translation_cache "
+                    "(cache_key, source_lang, target_lang, translated_text, created_at, hits) "
+                    "VALUES (?, ?, ?, ?, ?, 0)",
+                    (key, (source_lang or '').lower(), (target_lang or '').lower(), translated_text, time.time())
+                )
+            self._count('writes')
+        except Exception as e:
+            logger.warning(f"写入翻译缓存失败: {e}")
+
+    def invalidate(self, text=None, source_lang=None, target_lang=None):
+        """使缓存失效
+
+        指定 text 时只删除该条；仅指定语言对时删除该语言对的全部条目；都不指定时清空缓存。
+        返回删除的持久化条目数。
+        """
+        conn = self.connect()
+        with conn:
+            if text is not None:
+                key = self.make_key(text, source_lang, target_lang)
+                self.memory.delete(key)
+                cursor = conn.execute("DELETE FROM translation_cache WHERE cache_key = ?", (key,))
+            elif source_lang or target_lang:
+                # 内存层不记录语言对，直接整体清空；与缓存键一致按小写匹配语言
+                self.memory.clear()
+                conditions, params = [], []
+                if source_lang:
+                    conditions.append("LOWER(source_lang) = ?")
+                    params.append(source_lang.lower())
+                if target_lang:
+                    conditions.append("LOWER(target_lang) = ?")
+                    params.append(target_lang.lower())
+                cursor = conn.execute(
+                    f"DELETE FROM translation_cache WHERE {' AND '.join(conditions)}", params
+                )
+            else:
+                self.memory.clear()
+                cursor = conn.execute("DELETE FROM translation_cache")
+        return cursor.rowcount
+
+    def purge_expired(self):
+        """删除已过期的持久化条目"""
+        if not self.ttl:
+            return 0
+        conn = self.connect()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM translation_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        return cursor.rowcount
+
+    def stats(self):
+        """返回命中统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        hits = stats['memory_hits'] + stats['db_hits']
+        lookups = hits + stats['misses']
+        try:
+            persistent_size = self.connect().execute("SELECT COUNT(*) FROM translation_cache").fetchone()[0]
+        except Exception:
+            persistent_size = None
+        stats.update({
+            'hits': hits,
+            'lookups': lookups,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'memory_size': len(self.memory),
+            'memory_capacity': self.memory.max_size,
+            'persistent_size': persistent_size,
+            'ttl': self.ttl,
+        })
+        return stats
+
+
+_translation_cache = None
+_translation_cache_lock = threading.Lock()
+
+
+def get_translation_cache():
+    """获取翻译缓存单例"""
+    global _translation_cache
+    if _translation_cache is None:
+        with _translation_cache_lock:
+            if _translation_cache is None:
+                _translation_cache = TranslationCache(
+                    max_size=config.TRANSLATION_CACHE_SIZE,
+                    ttl=config.TRANSLATION_CACHE_TTL
+                )
+                _translation_cache.purge_expired()
+    return _translation_cache
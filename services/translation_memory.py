@@ -0,0 +1,260 @@
+# services/translation_memory.py
+"""句级翻译记忆：长文本只翻译未见过的句子"""
+import logging
+import threading
+import time
+
+from config import config
+from services.cache import SQLiteStore
+from services.text_segmenter import join_sentences, split_sentences
+from services.translation_cache import TranslationCache
+
+logger = logging.getLogger(__name__)
+
+# SQLite 单条语句可绑定的参数数量有限，批量查询时分批
+_QUERY_CHUNK = 500
+
+# 条目占用的字节数（原句与译文的UTF-8长度）
+_SIZE_SQL = "LENGTH(CAST(source_text AS BLOB)) + LENGTH(CAST(translated_text AS BLOB))"
+
+
+def translate_batch(translation_service, texts, source_lang, target_lang):
+    """一次服务调用翻译多段文本
+
+    翻译服务提供 translate_batch 时直接使用；否则以换行拼接为一次请求，
+    再按行拆分结果。行数对不上时退回逐段翻译。
+    返回 {'success', 'translated': [...], 'message'}。
+    """
+    if not texts:
+        return {'success': True, 'translated': [], 'message': '无需翻译'}
+
+    if hasattr(translation_service, 'translate_batch'):
+        return translation_service.translate_batch(texts, source_lang, target_lang)
+
+    if len(texts) > 1:
+        result = translation_service.translate('\n'.join(texts), source_lang, target_lang)
+        if not result.get('success'):
+            return {'success': False, 'translated': [], 'message': result.get('message', '翻译失败')}
+        lines = result['translated'].split('\n')
+        if len(lines) == len(texts):
+            return {'success': True, 'translated': [line.strip() for line in lines], 'message': result.get('message', '')}
+        logger.warning(f"批量翻译结果行数不匹配: 期望{len(texts)}, 实际{len(lines)}，改为逐段翻译")
+
+    translated = []
+    for text in texts:
+        result = translation_service.translate(text, source_lang, target_lang)
+        if not result.get('success'):
+            return {'success': False, 'translated': [], 'message': result.get('message', '翻译失败')}
+        translated.append(result['translated'])
+    return {'success': True, 'translated': translated, 'message': '翻译成功'}
+
+
+class TranslationMemory(SQLiteStore):
+    """句级翻译记忆库，按 (句子, 源语言, 目标语言) 存储译文
+
+    超过 ttl 秒未被使用的句子视为过期；总字节数超过 max_bytes 时先删除过期句子，
+    再按最近使用时间淘汰，直到降到 max_bytes 的 90%。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS translation_memory (
+            segment_key TEXT PRIMARY KEY,
+            source_lang VARCHAR(10) NOT NULL,
+            target_lang VARCHAR(10) NOT NULL,
+            source_text TEXT NOT NULL,
+            translated_text TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL,
+            uses INTEGER DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_translation_memory_lru "
+        "ON translation_memory (COALESCE(last_used, created_at))",
+    )
+
+    def __init__(self, db_path=None, max_bytes=None, ttl=None):
+        super().__init__(db_path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self._stats = {'segments': 0, 'reused_segments': 0, 'translated_chars': 0, 'saved_chars': 0,
+                       'evictions': 0}
+        self._bytes = self.connect().execute(
+            f"SELECT COALESCE(SUM({_SIZE_SQL}), 0) FROM translation_memory"
+        ).fetchone()[0]
+
+    def lookup(self, segments, source_lang, target_lang):
+        """批量查询句子译文，返回 {句子: 译文}"""
+        keys = {TranslationCache.make_key(s, source_lang, target_lang): s for s in set(segments)}
+        found = {}
+        conn = self.connect()
+        key_list = list(keys)
+        fresh_after = time.time() - self.ttl if self.ttl else 0
+        for offset in range(0, len(key_list), _QUERY_CHUNK):
+            chunk = key_list[offset:offset + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f"SELECT segment_key, translated_text FROM translation_memory WHERE segment_key IN ({placeholders}) "
+                "AND COALESCE(last_used, created_at) >= ?",
+                chunk + [fresh_after]
+            ).fetchall()
+            for row in rows:
+                found[keys[row['segment_key']]] = row['translated_text']
+
+        if found:
+            now = time.time()
+            hit_keys = [TranslationCache.make_key(s, source_lang, target_lang) for s in found]
+            with conn:
+                conn.executemany(
+                    "UPDATE translation_memory SET uses = uses + 1, last_used = ? WHERE segment_key = ?",
+                    [(now, key) for key in hit_keys]
+                )
+        return found
+
+    def store(self, pairs, source_lang, target_lang):
+        """保存 [(原句, 译文), ...]"""
+        if not pairs:
+            return
+        now = time.time()
+        rows = {
+            TranslationCache.make_key(src, source_lang, target_lang): (source_lang, target_lang, src, dst, now)
+            for src, dst in pairs
+        }
+        conn = self.connect()
+        with conn:
+            previous = 0
+            key_list = list(rows)
+            for offset in range(0, len(key_list), _QUERY_CHUNK):
+                chunk = key_list[offset:offset + _QUERY_CHUNK]
+                previous += conn.execute(
+                    f"SELECT COALESCE(SUM({_SIZE_SQL}), 0) FROM translation_memory "
+                    f"WHERE segment_key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO translation_memory "
+                "(segment_key, source_lang, target_lang, source_text, translated_text, created_at, uses) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                [(key,) + row for key, row in rows.items()]
+            )
+        added = sum(len(src.encode('utf-8')) + len(dst.encode('utf-8')) for _, _, src, dst, _ in rows.values())
+        with self._stats_lock:
+            self._bytes += added - previous
+        if self.max_bytes and self._bytes > self.max_bytes:
+            self._evict(conn)
+
+    def purge_expired(self):
+        """删除超过 ttl 秒未被使用的句子，返回删除条数"""
+        if not self.ttl:
+            return 0
+        cutoff = time.time() - self.ttl
+        conn = self.connect()
+        with conn:
+            freed = conn.execute(
+                f"SELECT COALESCE(SUM({_SIZE_SQL}), 0) FROM translation_memory "
+                "WHERE COALESCE(last_used, created_at) < ?", (cutoff,)
+            ).fetchone()[0]
+            cursor = conn.execute(
+                "DELETE FROM translation_memory WHERE COALESCE(last_used, created_at) < ?", (cutoff,)
+            )
+        with self._stats_lock:
+            self._bytes -= freed
+            self._stats['evictions'] += cursor.rowcount
+        return cursor.rowcount
+
+    def _evict(self, conn):
+        """删除过期句子后按最近使用时间淘汰，直到总字节数降到预算的 90%"""
+        self.purge_expired()
+        target = self.max_bytes * 0.9
+        with self._stats_lock:
+            total = self._bytes
+        victims = []
+        for row in conn.execute(
+            f"SELECT segment_key, {_SIZE_SQL} AS size FROM translation_memory "
+            "ORDER BY COALESCE(last_used, created_at)"
+        ):
+            if total <= target:
+                break
+            victims.append((row['segment_key'],))
+            total -= row['size']
+        with conn:
+            conn.executemany("DELETE FROM translation_memory WHERE segment_key = ?", victims)
+        with self._stats_lock:
+            self._bytes = total
+            self._stats['evictions'] += len(victims)
+
+    def translate(self, text, source_lang, target_lang, translation_service):
+        """按句翻译：记忆库命中的句子直接复用，其余句子一次批量提交翻译服务后按原顺序拼接"""
+        pieces = split_sentences(text)
+        sentences = [sentence for sentence, _ in pieces if sentence]
+
+        try:
+            known = self.lookup(sentences, source_lang, target_lang)
+        except Exception as e:
+            logger.warning(f"读取翻译记忆失败: {e}")
+            known = {}
+
+        # 去重后只翻译未命中的句子
+        missing = list(dict.fromkeys(s for s in sentences if s not in known))
+        result = translate_batch(translation_service, missing, source_lang, target_lang)
+        if not result.get('success'):
+            return result
+
+        fresh = dict(zip(missing, result['translated']))
+        try:
+            self.store(list(fresh.items()), source_lang, target_lang)
+        except Exception as e:
+            logger.warning(f"写入翻译记忆失败: {e}")
+
+        translations = {**known, **fresh}
+        translated = join_sentences(
+            [(translations.get(sentence, sentence) if sentence else '', sep) for sentence, sep in pieces],
+            target_lang
+        )
+
+        reused = sum(1 for s in sentences if s in known)
+        with self._stats_lock:
+            self._stats['segments'] += len(sentences)
+            self._stats['reused_segments'] += reused
+            self._stats['translated_chars'] += sum(len(s) for s in missing)
+            self._stats['saved_chars'] += sum(len(s) for s in sentences if s in known)
+
+        return {
+            'success': True,
+            'translated': translated,
+            'message': result.get('message') or '翻译成功',
+            'segments': len(sentences),
+            'reused_segments': reused
+        }
+
+    def stats(self):
+        """返回复用统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['bytes'] = self._bytes
+        stats.update({'max_bytes': self.max_bytes, 'ttl': self.ttl})
+        stats['reuse_rate'] = round(stats['reused_segments'] / stats['segments'], 4) if stats['segments'] else 0.0
+        try:
+            stats['size'] = self.connect().execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+        except Exception:
+            stats['size'] = None
+        return stats
+
+
+_translation_memory = None
+_translation_memory_lock = threading.Lock()
+
+
+def get_translation_memory():
+    """获取翻译记忆库单例"""
+    global _translation_memory
+    if _translation_memory is None:
+        with _translation_memory_lock:
+            if _translation_memory is None:
+                _translation_memory = TranslationMemory(
+                    max_bytes=config.TRANSLATION_MEMORY_MAX_BYTES,
+                    ttl=config.TRANSLATION_MEMORY_TTL
+                )
+                _translation_memory.purge_expired()
+    return _translation_memory
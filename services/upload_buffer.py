@@ -0,0 +1,83 @@
+# services/upload_buffer.py
+"""上传文件的内存缓冲：小文件全程留在内存中，按需零拷贝读取与base64编码"""
+import base64
+import io
+import tempfile
+
+from flask import Request
+
+from config import config
+
+
+class SpooledUploadRequest(Request):
+    """UPLOAD_SPOOL_ENDPOINTS 中的接口上传文件先写入内存缓冲，超过 UPLOAD_SPOOL_MAX_BYTES 才落到临时文件
+
+    其余接口（批量、PDF等可能一次上传大量文件）沿用 werkzeug 默认：超过 500KB 的请求体直接使用磁盘临时文件。
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint not in config.UPLOAD_SPOOL_ENDPOINTS:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return tempfile.SpooledTemporaryFile(max_size=config.UPLOAD_SPOOL_MAX_BYTES, mode='rb+')
+
+
+class BufferReader(io.RawIOBase):
+    """以只读文件对象的方式读取 bytes / memoryview，不复制整个缓冲（io.BytesIO(view) 会复制）
+
+    关闭时释放对缓冲的引用，应使用 with 语句，否则上传文件的内存缓冲无法关闭。
+    """
+
+    def __init__(self, data):
+        self._view = memoryview(data)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self._view) - self._position)
+        if size <= 0:
+            return 0
+        buffer[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def buffer_view(file):
+    """返回上传文件内容的 memoryview
+
+    内容仍在内存缓冲中时直接引用该缓冲，不复制；已落盘时读入内存。
+    调用方应在使用完毕后 release()（或使用 with 语句），否则缓冲无法关闭。
+    """
+    stream = file.stream
+    raw = getattr(stream, '_file', stream)  # SpooledTemporaryFile 内部的 BytesIO
+    if isinstance(raw, io.BytesIO):
+        return raw.getbuffer()
+    stream.seek(0)
+    return memoryview(stream.read())
+
+
+def encode_base64(data):
+    """把 bytes / memoryview 编码为base64字符串，memoryview 不会先被复制成 bytes"""
+    return base64.b64encode(data).decode('ascii')
@@ -0,0 +1,328 @@
+# services/upload_store.py
+"""内容寻址的上传文件存储：按SHA-256分片目录存放，相同内容只保存一份，后台按总容量淘汰"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from config import config
+from services.cache import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_EXT_PATTERN = re.compile(r'^\.[a-z0-9]{1,8}$')
+
+
+def _normalize_ext(filename):
+    ext = os.path.splitext(filename or '')[1].lower()
+    return ext if _EXT_PATTERN.match(ext) else ''
+
+
+class UploadStore(SQLiteStore):
+    """上传文件存储
+
+    文件保存在 root/<哈希前2位>/<哈希3-4位>/<哈希><扩展名>，元数据在表 upload_objects 中。
+    引用计数由 translation_history 上的触发器维护：历史记录的 image_path 指向某个文件时计数加一，
+    记录删除或改指其他文件时减一，因此任何写入历史记录的途径都无需额外处理。
+
+    后台回收线程在总字节数超过 max_bytes 时按最近使用时间淘汰引用计数为 0 且未固定的文件，
+    直到降到 max_bytes 的 90%；最近 grace_period 秒内用过的文件不回收，避免删除处理中的上传。
+    不写历史记录却已把地址返回给客户端的文件（如单张图片识别保留的原图）通过 pin 固定，不参与回收。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS upload_objects (
+            digest TEXT PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            pinned INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_upload_objects_lru ON upload_objects (refcount, last_access)",
+        "CREATE INDEX IF NOT EXISTS idx_history_image_path ON translation_history (image_path)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_upload_ref_insert AFTER INSERT ON translation_history
+        WHEN NEW.image_path IS NOT NULL
+        BEGIN
+            UPDATE upload_objects SET refcount = refcount + 1 WHERE path = NEW.image_path;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_upload_ref_delete AFTER DELETE ON translation_history
+        WHEN OLD.image_path IS NOT NULL
+        BEGIN
+            UPDATE upload_objects SET refcount = refcount - 1 WHERE path = OLD.image_path;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_upload_ref_update AFTER UPDATE OF image_path ON translation_history
+        WHEN OLD.image_path IS NOT NEW.image_path
+        BEGIN
+            UPDATE upload_objects SET refcount = refcount - 1 WHERE path = OLD.image_path;
+            UPDATE upload_objects SET refcount = refcount + 1 WHERE path = NEW.image_path;
+        END
+        """,
+    )
+
+    def __init__(self, root, url_prefix, max_bytes, grace_period=3600, gc_interval=300, db_path=None):
+        super().__init__(db_path)
+        self.root = root
+        self.url_prefix = url_prefix.rstrip('/')
+        self.max_bytes = max_bytes
+        self.grace_period = grace_period
+        self.gc_interval = gc_interval
+        self._lock = threading.Lock()  # 串行化“查找/落盘”与“回收删除”，避免删除刚被复用的文件
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._stats = {'stored': 0, 'deduplicated': 0, 'evicted': 0, 'evicted_bytes': 0, 'gc_runs': 0}
+        self._ensure_pinned_column()
+        self.sync_refcounts()
+
+    def _ensure_pinned_column(self):
+        """为早期创建的 upload_objects 表补充 pinned 列"""
+        conn = self.connect()
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(upload_objects)")}
+        if 'pinned' not in columns:
+            with conn:
+                conn.execute("ALTER TABLE upload_objects ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0")
+
+    # ---------- 写入 ----------
+
+    def _object_path(self, digest, ext):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + ext)
+
+    def _result(self, digest, path, size, deduplicated):
+        relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+        return {
+            'digest': digest,
+            'filename': os.path.basename(path),
+            'filepath': path,
+            'url': f"{self.url_prefix}/{relative}",
+            'size': size,
+            'deduplicated': deduplicated,
+        }
+
+    def _reuse(self, conn, digest):
+        """已存在相同内容时刷新使用时间并返回该记录"""
+        with conn:
+            cursor = conn.execute(
+                "UPDATE upload_objects SET last_access = ? WHERE digest = ?", (time.time(), digest)
+            )
+            if not cursor.rowcount:
+                return None
+            return conn.execute("SELECT path, size FROM upload_objects WHERE digest = ?", (digest,)).fetchone()
+
+    def put_stream(self, stream, filename):
+        """保存可读文件流，相同内容只写一次，返回文件信息（含 deduplicated）"""
+        if not stream.seekable():
+            spooled = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+            shutil.copyfileobj(stream, spooled)
+            stream = spooled
+        stream.seek(0)
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            size += len(chunk)
+        digest = digest.hexdigest()
+
+        conn = self.connect()
+        with self._lock:
+            row = self._reuse(conn, digest)
+        if row is not None:
+            self._stats['deduplicated'] += 1
+            return self._result(digest, row['path'], row['size'], True)
+
+        # 新内容：先写临时文件，再在锁内原子改名并登记
+        path = self._object_path(digest, _normalize_ext(filename))
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        stream.seek(0)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(stream, f, 1024 * 1024)
+            with self._lock:
+                row = self._reuse(conn, digest)
+                if row is None:
+                    os.replace(tmp_path, path)
+                    now = time.time()
+                    with conn:
+                        conn.execute(
+                            "INSERT INTO upload_objects (digest, path, size, created_at, last_access, refcount) "
+                            "VALUES (?, ?, ?, ?, ?, "
+                            "(SELECT COUNT(*) FROM translation_history WHERE image_path = ?))",
+                            (digest, path, size, now, now, path)
+                        )
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if row is not None:
+            self._stats['deduplicated'] += 1
+            return self._result(digest, row['path'], row['size'], True)
+        self._stats['stored'] += 1
+        self._wakeup.set()
+        return self._result(digest, path, size, False)
+
+    def put(self, file):
+        """保存 werkzeug 上传文件"""
+        return self.put_stream(file.stream, file.filename)
+
+    def pin(self, result):
+        """固定文件：不被历史记录引用也不回收，用于用户要求保留（keep_image）、地址已返回但不写历史记录的上传"""
+        conn = self.connect()
+        with self._lock:
+            with conn:
+                conn.execute("UPDATE upload_objects SET pinned = 1 WHERE digest = ?", (result['digest'],))
+
+    def discard(self, result):
+        """丢弃刚保存且未被复用、未被引用的文件（如识别失败的上传）"""
+        if result.get('deduplicated'):
+            return False
+        conn = self.connect()
+        with self._lock:
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM upload_objects WHERE digest = ? AND refcount <= 0 AND pinned = 0 "
+                    "AND last_access <= created_at",
+                    (result['digest'],)
+                )
+            if not cursor.rowcount:
+                return False
+            try:
+                os.remove(result['filepath'])
+            except OSError:
+                pass
+        return True
+
+    # ---------- 引用计数与回收 ----------
+
+    def sync_refcounts(self):
+        """按历史记录重新计算全部引用计数（启动时校正）"""
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                "UPDATE upload_objects SET refcount = "
+                "(SELECT COUNT(*) FROM translation_history WHERE image_path = upload_objects.path)"
+            )
+
+    def total_bytes(self):
+        return self.connect().execute("SELECT COALESCE(SUM(size), 0) FROM upload_objects").fetchone()[0]
+
+    def collect(self):
+        """总容量超出预算时按LRU淘汰未被引用的文件，返回释放的字节数"""
+        self._stats['gc_runs'] += 1
+        conn = self.connect()
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        target = self.max_bytes * 0.9
+        cutoff = time.time() - self.grace_period
+        candidates = conn.execute(
+            "SELECT digest, path, size FROM upload_objects "
+            "WHERE refcount <= 0 AND pinned = 0 AND last_access < ? ORDER BY last_access",
+            (cutoff,)
+        ).fetchall()
+
+        freed = 0
+        for row in candidates:
+            if total - freed <= target:
+                break
+            with self._lock:
+                with conn:
+                    # 条件删除：期间被复用或被历史记录引用的文件不会被删除
+                    cursor = conn.execute(
+                        "DELETE FROM upload_objects WHERE digest = ? AND refcount <= 0 AND pinned = 0 "
+                        "AND last_access < ?",
+                        (row['digest'], cutoff)
+                    )
+                if not cursor.rowcount:
+                    continue
+                try:
+                    os.remove(row['path'])
+                except OSError:
+                    pass
+            freed += row['size']
+            self._stats['evicted'] += 1
+            self._stats['evicted_bytes'] += row['size']
+
+        if total - freed > self.max_bytes:
+            logger.warning(
+                f"上传文件占用 {total - freed} 字节，仍超出预算 {self.max_bytes}（其余文件被历史记录引用、已固定或仍在使用）"
+            )
+        elif freed:
+            logger.info(f"上传文件回收完成: 释放 {freed} 字节")
+        return freed
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.gc_interval)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            try:
+                self.collect()
+            except Exception as e:
+                logger.error(f"上传文件回收失败: {e}")
+
+    def start(self):
+        """启动后台回收线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='upload-gc', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+
+    def stats(self):
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT COUNT(*) AS objects, COALESCE(SUM(size), 0) AS bytes, "
+            "COALESCE(SUM(CASE WHEN refcount > 0 THEN 1 ELSE 0 END), 0) AS referenced, "
+            "COALESCE(SUM(pinned), 0) AS pinned FROM upload_objects"
+        ).fetchone()
+        stats = dict(self._stats)
+        stats.update({
+            'objects': row['objects'],
+            'bytes': row['bytes'],
+            'referenced_objects': row['referenced'],
+            'pinned_objects': row['pinned'],
+            'max_bytes': self.max_bytes,
+        })
+        return stats
+
+
+_upload_store = None
+_upload_store_lock = threading.Lock()
+
+
+def get_upload_store():
+    """获取上传文件存储单例（首次调用时启动后台回收线程）
+
+    表触发器依赖 translation_history，须在数据库表创建之后调用。
+    """
+    global _upload_store
+    if _upload_store is None:
+        with _upload_store_lock:
+            if _upload_store is None:
+                _upload_store = UploadStore(
+                    root=config.UPLOAD_STORE_DIR,
+                    url_prefix=config.UPLOAD_STORE_URL,
+                    max_bytes=config.UPLOAD_STORE_MAX_BYTES,
+                    grace_period=config.UPLOAD_STORE_GRACE_PERIOD,
+                    gc_interval=config.UPLOAD_GC_INTERVAL
+                )
+                _upload_store.start()
+    return _upload_store